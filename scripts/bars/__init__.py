@@ -0,0 +1,76 @@
+"""
+Shared data layer for the NIFTY 50 analysis scripts.
+
+Scripts add the `scripts/` directory to sys.path and import from here:
+
+    from bars import load_bars
+    df_2hr = load_bars('120min')
+"""
+
+from .store import load_bars, load_table, convert_csv, convert_all, epoch_ns
+from .resample import resample_bars, derive_bars
+from .cube import SessionCube, load_session_cube, build_session_cube, cube_from_bars
+from .indicators import ema, ema_periods, slope_degrees, true_range, atr, adx, swing_flags
+from .streaming import StreamingEMA, StreamingSlope, StreamingATR, StreamingADX, DayRange, StreamingTrend
+from .asof import asof_join, attach_trend
+from .sessions import SessionIndex, load_session_index, build_session_index, session_index
+from .daily_trend import load_daily_trends, load_trend_map
+from .highlow import (HighLowCurves, ConditionalCurves, high_low_curves, bar_high_low_curves,
+                      bar_conditional_curves, masked_curves, bar_masked_curves)
+from .features import first_bar_features, day_features, load_day_features
+from .scenarios import scenario_masks, load_scenarios
+from .patterns import color_codes, pattern_labels, day_outcomes, pattern_outcomes
+from .ranges import RangeTable, range_table
+
+__all__ = [
+    'load_bars',
+    'load_table',
+    'convert_csv',
+    'convert_all',
+    'epoch_ns',
+    'resample_bars',
+    'derive_bars',
+    'SessionCube',
+    'load_session_cube',
+    'build_session_cube',
+    'cube_from_bars',
+    'ema',
+    'ema_periods',
+    'slope_degrees',
+    'true_range',
+    'atr',
+    'adx',
+    'swing_flags',
+    'StreamingEMA',
+    'StreamingSlope',
+    'StreamingATR',
+    'StreamingADX',
+    'DayRange',
+    'StreamingTrend',
+    'asof_join',
+    'attach_trend',
+    'SessionIndex',
+    'load_session_index',
+    'build_session_index',
+    'session_index',
+    'load_daily_trends',
+    'load_trend_map',
+    'HighLowCurves',
+    'high_low_curves',
+    'bar_high_low_curves',
+    'ConditionalCurves',
+    'bar_conditional_curves',
+    'masked_curves',
+    'bar_masked_curves',
+    'first_bar_features',
+    'day_features',
+    'load_day_features',
+    'scenario_masks',
+    'load_scenarios',
+    'color_codes',
+    'pattern_labels',
+    'day_outcomes',
+    'pattern_outcomes',
+    'RangeTable',
+    'range_table',
+]
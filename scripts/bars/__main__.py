@@ -0,0 +1,73 @@
+"""
+Command-line entry point for the bar store.
+
+    cd scripts
+    python -m bars convert                  # (re)convert every CSV in data/
+    python -m bars check-resample 120min    # stored vs derived bar drift
+    python -m bars ingest 120min new.csv    # append new sessions
+    python -m bars refresh-trend            # recompute 120min uptrend/downtrend
+"""
+
+import argparse
+
+from . import store
+from .ingest import ingest_csv, refresh_trend_columns
+from .resample import compare_with_stored, finest_source
+
+
+def cmd_convert(args):
+    if args.timeframes:
+        for tf in args.timeframes:
+            store.convert_csv(tf)
+    else:
+        store.convert_all()
+
+
+def cmd_check_resample(args):
+    for tf in args.timeframes or ['30min', '120min']:
+        try:
+            diff = compare_with_stored(tf)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{tf}: {e}")
+            continue
+        print(f"{tf} (derived from {finest_source(tf)}): {len(diff)} mismatched bars")
+        if len(diff):
+            print(diff.head(20).to_string(index=False))
+
+
+def cmd_ingest(args):
+    for path in args.files:
+        ingest_csv(args.timeframe, path)
+
+
+def cmd_refresh_trend(args):
+    refresh_trend_columns(args.timeframe)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bars")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('convert', help="Convert CSVs into the Parquet store")
+    p.add_argument('timeframes', nargs='*')
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser('check-resample', help="Compare stored bars with bars derived from the finest source")
+    p.add_argument('timeframes', nargs='*')
+    p.set_defaults(func=cmd_check_resample)
+
+    p = sub.add_parser('ingest', help="Append bars newer than the store from CSV files")
+    p.add_argument('timeframe')
+    p.add_argument('files', nargs='+')
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser('refresh-trend', help="Recompute uptrend/downtrend over the full history")
+    p.add_argument('timeframe', nargs='?', default='120min')
+    p.set_defaults(func=cmd_refresh_trend)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Point-in-Time Joins
+===================
+Attach higher-timeframe state to lower-timeframe bars using only
+higher-timeframe bars that had fully closed at the time of the lower bar,
+so no analysis sees an indicator value before it existed.
+
+A bar's close time is its start + timeframe, capped at the 15:30 session
+end (the 15:15 bar of the 2-hour series closes at 15:30). The join key of
+each lower bar is chosen with `at`:
+
+    'open'     the lower bar's start       (state known when the bar opens)
+    'close'    the lower bar's close       (state known once the bar is done)
+    'session'  09:15 of the bar's date     (one state for the whole day: the
+                                            previous session's last bar)
+
+    df = load_bars('5min')
+    df = attach_trend(df, at='session')       # adds htf_uptrend/htf_downtrend/...
+
+Matching is a searchsorted over sorted int64 timestamps (merge-asof
+semantics, backward direction), so it is a single vectorized pass.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import store
+from .cube import (NS_PER_DAY, NS_PER_MINUTE, SESSION_END_MINUTE,
+                   SESSION_START_MINUTE, timeframe_minutes)
+from .indicators import trend_columns
+
+
+JOIN_POINTS = ('open', 'close', 'session')
+
+
+# =============================================================================
+# TIMESTAMPS
+# =============================================================================
+
+def bar_close_ns(ts: np.ndarray, timeframe: str) -> np.ndarray:
+    """Close time of bars starting at `ts` (epoch ns), capped at the session end"""
+    ts = np.asarray(ts, dtype='int64')
+    day_ns = ts - ts % NS_PER_DAY
+    session_end = day_ns + SESSION_END_MINUTE * NS_PER_MINUTE
+    close = ts + timeframe_minutes(timeframe) * NS_PER_MINUTE
+    # Bars starting after the session end (none in the NSE files) keep their raw close
+    return np.where(ts < session_end, np.minimum(close, session_end), close)
+
+
+def join_keys(ts: np.ndarray, at: str = 'open',
+              timeframe: Optional[str] = None) -> np.ndarray:
+    """Epoch-ns time at which each lower bar looks up higher-timeframe state"""
+    ts = np.asarray(ts, dtype='int64')
+    if at == 'open':
+        return ts
+    if at == 'close':
+        if timeframe is None:
+            raise ValueError("at='close' needs the timeframe of the lower bars")
+        return bar_close_ns(ts, timeframe)
+    if at == 'session':
+        return ts - ts % NS_PER_DAY + SESSION_START_MINUTE * NS_PER_MINUTE
+    raise ValueError(f"Unknown join point '{at}'. Expected one of {JOIN_POINTS}")
+
+
+# =============================================================================
+# JOIN
+# =============================================================================
+
+def asof_positions(keys: np.ndarray, right_close: np.ndarray) -> np.ndarray:
+    """
+    Row of the last right bar closed at or before each key (-1 if none).
+    `right_close` must be sorted.
+    """
+    return np.searchsorted(right_close, keys, side='right') - 1
+
+
+def asof_join(left: pd.DataFrame, right: pd.DataFrame, right_timeframe: str,
+              columns: Optional[List[str]] = None, at: str = 'open',
+              left_timeframe: Optional[str] = None, prefix: str = 'htf_') -> pd.DataFrame:
+    """
+    Copy of `left` with `right` columns as of the last fully-closed right bar.
+
+    Args:
+        left: Lower-timeframe bars with a `date` column (any order)
+        right: Higher-timeframe bars sorted by `date`
+        right_timeframe: Timeframe of `right`, e.g. '120min'
+        columns: Right columns to attach (default: all but `date`)
+        at: Join point of each left bar: 'open', 'close' or 'session'
+        left_timeframe: Timeframe of `left` (needed for at='close')
+        prefix: Prefix of the attached column names
+
+    Returns:
+        `left` plus `<prefix><column>` for each column and `<prefix>asof`,
+        the close time of the matched right bar (NaN/NaT where none had closed)
+    """
+    columns = columns or [c for c in right.columns if c != 'date']
+    right_close = bar_close_ns(store.epoch_ns(right['date']), right_timeframe)
+    keys = join_keys(store.epoch_ns(left['date']), at, left_timeframe)
+    pos = asof_positions(keys, right_close)
+    found = pos >= 0
+    take = np.where(found, pos, 0)
+
+    out = left.copy()
+    for col in columns:
+        values = right[col].to_numpy()
+        if values.dtype == bool:
+            # Keep booleans boolean; bars before the first close are False
+            out[prefix + col] = found & values[take] if len(values) else False
+        else:
+            joined = values[take].astype('float64' if values.dtype.kind in 'iuf' else object)
+            joined[~found] = np.nan
+            out[prefix + col] = joined
+
+    asof = np.where(found, right_close[take] if len(right_close) else 0, np.iinfo('int64').min)
+    out[prefix + 'asof'] = pd.to_datetime(asof.view('datetime64[ns]'))
+    return out
+
+
+# =============================================================================
+# TREND CONTEXT
+# =============================================================================
+
+def trend_bars(timeframe: str = '120min') -> pd.DataFrame:
+    """Higher-timeframe bars with the rules.md trend columns (ema11/ema21/ema21_slope/uptrend/downtrend)"""
+    df = store.load_bars(timeframe, columns=['close'])
+    trend, _ = trend_columns(df['close'].to_numpy())
+    trend.insert(0, 'date', df['date'])
+    return trend
+
+
+def attach_trend(df: pd.DataFrame, timeframe: str = '120min', at: str = 'session',
+                 left_timeframe: Optional[str] = None, prefix: str = 'htf_') -> pd.DataFrame:
+    """
+    Leak-free rules.md trend context for every bar of `df`.
+
+    With the default at='session' every bar of a day gets the trend at the
+    close of the previous session; use at='open' for intraday updates.
+    """
+    return asof_join(df, trend_bars(timeframe), timeframe, at=at,
+                     left_timeframe=left_timeframe, prefix=prefix)
@@ -0,0 +1,240 @@
+"""
+Intraday Backtest
+=================
+Bracket orders (entry, stop, up to three scale-out targets, holding limit)
+run against the session cube, every order of every day in one pass.
+
+Each order belongs to one cube row (day) and is flat by the session close.
+Slots are the cube's bar slots (slot 0 = the 09:15 bar, "bar 1"). Entries:
+
+    'market'  fills at `entry` at the end of slot `entry_from` (e.g. bar 1's close)
+    'limit'   fills in the first slot of [entry_from, entry_until] that trades
+              at `entry` or better (at the open if it opened beyond)
+    'stop'    fills in the first such slot that trades through `entry` the
+              other way (at the open if it opened beyond)
+
+From the fill, the stop is checked from the fill slot (resting entries) or
+the next slot (market entries), targets from the next slot, until
+fill + max_holding or the day's last bar. A portion exits at the first
+of its target and the stop; when both trade in the same bar the stop is
+taken (the order inside a bar is unknown). Gaps through a level fill at
+the open. Whatever is left exits at the close of the last slot.
+
+Shorts are handled as longs on negated prices, so every touch test is a
+single array comparison over (orders x slots), and `first_touch` turns
+each into the first slot per order with one argmax.
+
+    trades = backtest_orders(cube, day, side, entry, stop, targets, weights,
+                             kind='limit', entry_from=1, entry_until=5)
+"""
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from .cube import CLOSE, HIGH, LOW, OPEN, SessionCube
+
+
+ENTRY_KINDS = ['market', 'limit', 'stop']
+EXIT_REASONS = ['no_fill', 'stop', 'target', 'time']
+
+TRADE_FIELDS = [
+    'filled', 'fill_slot', 'fill_price', 'exit_slot', 'exit_price',
+    'targets_hit', 'stopped', 'exit_reason', 'risk', 'pnl', 'r_multiple',
+]
+
+
+# =============================================================================
+# TOUCHES
+# =============================================================================
+
+def first_touch(hit: np.ndarray, start, end) -> np.ndarray:
+    """
+    First slot in [start, end] (inclusive, per row) where `hit` is True;
+    hit.shape[1] where there is none.
+    """
+    n_bars = hit.shape[1]
+    slots = np.arange(n_bars)
+    start = np.asarray(start)[..., None]
+    end = np.asarray(end)[..., None]
+    hit = hit & (slots >= start) & (slots <= end)
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), n_bars)
+
+
+def _at(values: np.ndarray, slot: np.ndarray) -> np.ndarray:
+    """values[i, slot[i]] (slot clipped to the last column)"""
+    return values[np.arange(len(values)), np.minimum(slot, values.shape[1] - 1)]
+
+
+def _per_order(value, n: int, dtype='float64') -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n,))
+
+
+# =============================================================================
+# BACKTEST
+# =============================================================================
+
+def backtest_orders(cube: SessionCube, day, side, entry, stop, targets,
+                    weights=None, kind='market', entry_from=0, entry_until=None,
+                    max_holding=None) -> pd.DataFrame:
+    """
+    Run bracket orders against the cube.
+
+    Args:
+        cube: Session cube the `day` rows index
+        day: Cube row of each order
+        side: +1 long / -1 short per order
+        entry: Entry price
+        stop: Stop-loss price
+        targets: (orders x k) target prices (NaN = no target)
+        weights: Share of the position exiting at each target, (k,) or
+            (orders x k); default equal shares
+        kind: 'market', 'limit' or 'stop' (scalar or per order)
+        entry_from: First slot the entry can fill in
+        entry_until: Last slot the entry can fill in (default entry_from)
+        max_holding: Bars to hold after the fill (default: to the close)
+
+    Returns:
+        One row per order with TRADE_FIELDS. Prices are actual prices; `pnl`
+        is in points per unit (weighted over the targets), `risk` the
+        distance from the fill to the stop and `r_multiple` = pnl / risk.
+        Unfilled orders have fill_slot -1 and zero pnl.
+    """
+    day = np.asarray(day, dtype='int64')
+    n = len(day)
+    side = _per_order(side, n)
+    targets = np.asarray(targets, dtype='float64')
+    # k from the array itself when it is 2-D: reshape(0, -1) cannot infer it
+    targets = targets.reshape(n, targets.shape[-1] if targets.ndim == 2 else -1)
+    k = targets.shape[1]
+    weights = np.full(k, 1.0 / k) if weights is None else np.asarray(weights, dtype='float64')
+    weights = np.broadcast_to(weights, (n, k))
+    kind = np.broadcast_to(np.asarray(kind), (n,))
+    kind_code = np.select([kind == name for name in ENTRY_KINDS], range(len(ENTRY_KINDS)), default=-1)
+    if (kind_code < 0).any():
+        raise ValueError(f"Unknown entry kind. Expected one of {ENTRY_KINDS}")
+    market = kind_code == 0
+    entry_from = _per_order(entry_from, n, 'int64')
+    entry_until = entry_from if entry_until is None else _per_order(entry_until, n, 'int64')
+
+    # Bars of each order's day, signed so that up is the position's favour
+    bars = cube.values[day]
+    mask = cube.mask[day]
+    s = side[:, None]
+    open_ = bars[:, :, OPEN] * s
+    close = bars[:, :, CLOSE] * s
+    favourable = np.where(s > 0, bars[:, :, HIGH], -bars[:, :, LOW])
+    adverse = np.where(s > 0, bars[:, :, LOW], -bars[:, :, HIGH])
+    entry_s = _per_order(entry, n) * side
+    stop_s = _per_order(stop, n) * side
+    targets_s = targets * side[:, None]
+
+    n_bars = cube.n_bars
+    slots = np.arange(n_bars)
+    last_bar = n_bars - 1 - mask[:, ::-1].argmax(axis=1)
+    until = np.minimum(entry_until, last_bar)
+
+    # Entry
+    limit_slot = first_touch(adverse <= entry_s[:, None], entry_from, until)
+    stop_entry_slot = first_touch(favourable >= entry_s[:, None], entry_from, until)
+    market_slot = np.where(entry_from <= last_bar, entry_from, n_bars)
+    fill_slot = np.choose(kind_code, [market_slot, limit_slot, stop_entry_slot])
+    filled = fill_slot < n_bars
+    fill_open = _at(open_, fill_slot)
+    fill = np.choose(kind_code, [entry_s, np.minimum(fill_open, entry_s),
+                                 np.maximum(fill_open, entry_s)])
+
+    # Exit window (empty for unfilled orders)
+    end = last_bar if max_holding is None else np.minimum(fill_slot + _per_order(max_holding, n, 'int64'),
+                                                          last_bar)
+    end = np.where(filled, end, -1)
+    stop_slot = first_touch(adverse <= stop_s[:, None], fill_slot + market, end)
+    # Close of the last available bar at or before `end`
+    available = np.maximum.accumulate(np.where(mask, slots, 0), axis=1)
+    last_close = _at(close, _at(available, np.maximum(end, 0)))
+
+    pnl = np.zeros(n)
+    exit_slot = np.full(n, -1)
+    exit_value = np.zeros(n)
+    targets_hit = np.zeros(n, dtype='int64')
+    stopped = np.zeros(n, dtype=bool)
+    stop_exit = np.minimum(_at(open_, stop_slot), stop_s)
+    for j in range(k):
+        target_slot = first_touch(favourable >= targets_s[:, j, None], fill_slot + 1, end)
+        at_target = target_slot < stop_slot
+        at_stop = ~at_target & (stop_slot <= end)
+        exit_j = np.select([at_target, at_stop],
+                           [np.maximum(_at(open_, target_slot), targets_s[:, j]), stop_exit],
+                           default=last_close)
+        slot_j = np.select([at_target, at_stop], [target_slot, stop_slot], default=end)
+        w = weights[:, j]
+        pnl += np.where(filled, w * (exit_j - fill), 0.0)
+        exit_value += np.where(filled, w * exit_j, 0.0)
+        exit_slot = np.maximum(exit_slot, np.where(filled, slot_j, -1))
+        targets_hit += at_target & filled
+        stopped |= at_stop & filled
+
+    total_weight = weights.sum(axis=1)
+    risk = np.where(filled, fill - stop_s, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_multiple = np.where(filled & (risk > 0), pnl / risk, np.nan)
+        exit_price = np.where(filled, exit_value / total_weight * side, np.nan)
+    reason = np.select([~filled, stopped, targets_hit == k], [0, 1, 2], default=3)
+
+    return pd.DataFrame({
+        'filled': filled,
+        'fill_slot': np.where(filled, fill_slot, -1),
+        'fill_price': np.where(filled, fill * side, np.nan),
+        'exit_slot': exit_slot,
+        'exit_price': exit_price,
+        'targets_hit': targets_hit,
+        'stopped': stopped,
+        'exit_reason': pd.Categorical.from_codes(reason, categories=EXIT_REASONS),
+        'risk': risk,
+        'pnl': pnl,
+        'r_multiple': r_multiple,
+    })
+
+
+# =============================================================================
+# SUMMARIES
+# =============================================================================
+
+def trade_summary(trades: pd.DataFrame, by: Sequence[str]) -> pd.DataFrame:
+    """
+    Per-group counts, fill/hit rates and P&L of backtest trades.
+
+    `trades` needs the backtest_orders columns plus the `by` columns; hit
+    rates are over filled trades.
+    """
+    by = list(by)
+    filled = trades[trades['filled']]
+    grouped = filled.groupby(by, observed=True)
+    summary = pd.DataFrame({
+        'ideas': trades.groupby(by, observed=True).size(),
+        'trades': grouped.size(),
+        'win_rate': grouped['pnl'].apply(lambda p: (p > 0).mean()),
+        'stop_rate': grouped['stopped'].mean(),
+        'all_targets_rate': grouped['exit_reason'].apply(lambda r: (r == 'target').mean()),
+        'avg_targets_hit': grouped['targets_hit'].mean(),
+        'avg_pnl': grouped['pnl'].mean(),
+        'total_pnl': grouped['pnl'].sum(),
+        'avg_r': grouped['r_multiple'].mean(),
+    })
+    summary['trades'] = summary['trades'].fillna(0).astype('int64')
+    summary.insert(2, 'fill_rate', summary['trades'] / summary['ideas'])
+    return summary.reset_index()
+
+
+def equity_curves(trades: pd.DataFrame, by: str, date: str = 'date',
+                  value: str = 'pnl') -> pd.DataFrame:
+    """Cumulative `value` per date (rows) for each `by` group (columns)"""
+    daily = trades.pivot_table(index=date, columns=by, values=value,
+                               aggfunc='sum', fill_value=0.0, observed=True)
+    return daily.sort_index().cumsum()
+
+
+def max_drawdown(equity: pd.DataFrame) -> pd.Series:
+    """Largest peak-to-trough fall of each equity column"""
+    return (equity.cummax() - equity).max()
@@ -0,0 +1,233 @@
+"""
+Session Cube
+============
+Intraday bars reshaped into a dense (n_days, bars_per_session, 4) float array
+of open/high/low/close, persisted as .npy files and opened memory-mapped, so
+every process and notebook shares the same pages without re-parsing.
+
+Layout (under data/store/cube/<timeframe>/):
+    values.npy   # float64 (n_days, n_bars, 4), NaN where a bar is missing
+    dates.npy    # datetime64[D] (n_days,)
+    mask.npy     # bool (n_days, n_bars), True where a bar exists
+    meta.json    # source signature used to detect a stale cube
+
+Bar slots are positional within the NSE session (09:15 -> slot 0), so slot
+k of every day is the same clock time and per-bar-index statistics are plain
+axis-0 reductions.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import store
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+SESSION_START_MINUTE = 9 * 60 + 15   # 09:15
+SESSION_END_MINUTE = 15 * 60 + 30    # 15:30
+SESSION_MINUTES = SESSION_END_MINUTE - SESSION_START_MINUTE
+
+CUBE_FIELDS = ['open', 'high', 'low', 'close']
+OPEN, HIGH, LOW, CLOSE = range(4)
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+
+def timeframe_minutes(timeframe: str) -> int:
+    """'5min' -> 5"""
+    if not timeframe.endswith('min'):
+        raise ValueError(f"Unsupported timeframe '{timeframe}'")
+    return int(timeframe[:-3])
+
+
+def bars_per_session(timeframe: str) -> int:
+    """Number of bar slots in a full session (last bar may be truncated)"""
+    minutes = timeframe_minutes(timeframe)
+    return -(-SESSION_MINUTES // minutes)
+
+
+def cube_path(timeframe: str) -> Path:
+    return store.STORE_DIR / "cube" / timeframe
+
+
+# =============================================================================
+# CUBE CONTAINER
+# =============================================================================
+
+@dataclass
+class SessionCube:
+    """Dense per-day view of intraday bars"""
+    values: np.ndarray  # (n_days, n_bars, 4)
+    dates: np.ndarray   # datetime64[D] (n_days,)
+    mask: np.ndarray    # bool (n_days, n_bars)
+
+    @property
+    def n_days(self) -> int:
+        return self.values.shape[0]
+
+    @property
+    def n_bars(self) -> int:
+        return self.values.shape[1]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.values[:, :, OPEN]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.values[:, :, HIGH]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.values[:, :, LOW]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.values[:, :, CLOSE]
+
+    def day_high(self) -> np.ndarray:
+        return np.nanmax(self.high, axis=1)
+
+    def day_low(self) -> np.ndarray:
+        return np.nanmin(self.low, axis=1)
+
+    def high_so_far(self) -> np.ndarray:
+        """Running session high; missing bars carry the previous value"""
+        return np.fmax.accumulate(self.high, axis=1)
+
+    def low_so_far(self) -> np.ndarray:
+        return np.fmin.accumulate(self.low, axis=1)
+
+    def day_open(self) -> np.ndarray:
+        """Open of the first available bar of each day"""
+        first = self.mask.argmax(axis=1)
+        return self.open[np.arange(self.n_days), first]
+
+    def day_close(self) -> np.ndarray:
+        """Close of the last available bar of each day"""
+        last = self.n_bars - 1 - self.mask[:, ::-1].argmax(axis=1)
+        return self.close[np.arange(self.n_days), last]
+
+    def bar_count(self) -> np.ndarray:
+        return self.mask.sum(axis=1)
+
+    def day_index(self, day) -> int:
+        """Row of a given date (anything np.datetime64 accepts)"""
+        key = np.datetime64(pd.Timestamp(day).date(), 'D')
+        pos = np.searchsorted(self.dates, key)
+        if pos >= self.n_days or self.dates[pos] != key:
+            raise KeyError(f"{day} not in cube")
+        return int(pos)
+
+    def select(self, rows) -> 'SessionCube':
+        """Subset of days by boolean mask or integer rows (copies)"""
+        return SessionCube(self.values[rows], self.dates[rows], self.mask[rows])
+
+    def select_dates(self, dates) -> 'SessionCube':
+        """Subset of days whose date is in `dates`"""
+        wanted = np.asarray(pd.to_datetime(pd.Index(dates)).values.astype('datetime64[D]'))
+        return self.select(np.isin(self.dates, wanted))
+
+    def date_list(self):
+        """Dates as python datetime.date objects (matches df['date'].dt.date)"""
+        return list(pd.to_datetime(self.dates).date)
+
+
+# =============================================================================
+# BUILD / LOAD
+# =============================================================================
+
+def cube_from_bars(df: pd.DataFrame, timeframe: str = '5min') -> SessionCube:
+    """
+    Scatter a bar DataFrame (as returned by load_bars) into a SessionCube.
+    Bars outside the 09:15-15:30 session are ignored.
+    """
+    minutes = timeframe_minutes(timeframe)
+    n_bars = bars_per_session(timeframe)
+
+    ts = store.epoch_ns(df['date'])
+    day_ns = ts - ts % NS_PER_DAY
+    minute_of_day = (ts - day_ns) // NS_PER_MINUTE
+    slot = (minute_of_day - SESSION_START_MINUTE) // minutes
+
+    in_session = (minute_of_day >= SESSION_START_MINUTE) & (minute_of_day < SESSION_END_MINUTE)
+    day_ns, slot = day_ns[in_session], slot[in_session]
+    prices = df[CUBE_FIELDS].to_numpy(dtype='float64')[in_session]
+
+    day_keys, day_idx = np.unique(day_ns, return_inverse=True)
+
+    values = np.full((len(day_keys), n_bars, len(CUBE_FIELDS)), np.nan)
+    mask = np.zeros((len(day_keys), n_bars), dtype=bool)
+    values[day_idx, slot] = prices
+    mask[day_idx, slot] = True
+
+    dates = day_keys.view('datetime64[ns]').astype('datetime64[D]')
+    return SessionCube(values, dates, mask)
+
+
+def _source_signature(timeframe: str) -> str:
+    """Identity of the store contents a cube was built from"""
+    return store.store_checksum(timeframe)
+
+
+def build_session_cube(timeframe: str = '5min') -> SessionCube:
+    """Build the cube from the bar store and persist it as .npy files"""
+    print(f"Building {timeframe} session cube...")
+    df = store.load_bars(timeframe, columns=CUBE_FIELDS)
+    cube = cube_from_bars(df, timeframe)
+
+    out_dir = cube_path(timeframe)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "values.npy", cube.values)
+    np.save(out_dir / "dates.npy", cube.dates)
+    np.save(out_dir / "mask.npy", cube.mask)
+    with open(out_dir / "meta.json", 'w') as f:
+        json.dump({'timeframe': timeframe,
+                   'shape': list(cube.values.shape),
+                   'source': _source_signature(timeframe)}, f, indent=2)
+
+    print(f"Cube saved to {out_dir} (days={cube.n_days}, bars={cube.n_bars})")
+    return cube
+
+
+def _is_current(timeframe: str) -> bool:
+    meta_file = cube_path(timeframe) / "meta.json"
+    if not meta_file.exists():
+        return False
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return meta.get('source') == _source_signature(timeframe)
+
+
+def load_session_cube(timeframe: str = '5min', mmap: bool = True,
+                      rebuild: Optional[bool] = None) -> SessionCube:
+    """
+    Open the persisted cube, building it first if missing or stale.
+
+    Args:
+        timeframe: Bar timeframe of the cube
+        mmap: Open arrays read-only memory-mapped (zero-copy, shared)
+        rebuild: Force (True) or skip (False) the staleness check rebuild
+    """
+    if not store.has_store(timeframe):
+        store.convert_csv(timeframe)
+
+    if rebuild or (rebuild is None and not _is_current(timeframe)):
+        build_session_cube(timeframe)
+
+    out_dir = cube_path(timeframe)
+    mode = 'r' if mmap else None
+    return SessionCube(
+        values=np.load(out_dir / "values.npy", mmap_mode=mode),
+        dates=np.load(out_dir / "dates.npy"),
+        mask=np.load(out_dir / "mask.npy", mmap_mode=mode),
+    )
@@ -0,0 +1,166 @@
+"""
+Daily Trend Labels
+==================
+One row per trading day with the day's trend label under every convention
+the analysis scripts use, computed once from the 120-min bars and cached as
+Parquet with categorical (dictionary-encoded) label columns.
+
+Conventions (labels BULL / BEAR / SIDEWAYS):
+    method1_0915        rules.md method1 on the day's 09:15 2-hour bar. This is
+                        what the opening-pattern scripts use; note the bar's
+                        EMAs already include the 09:15-11:15 move.
+    method1_prev_close  rules.md method1 at the previous session's last bar
+                        (leak-free version of the above)
+    prev_close_ema      EMA11 > EMA21 at the previous session's last bar
+                        (BULL/BEAR; the get_trend_map convention)
+    ma50                previous session close vs the 50-session simple
+                        moving average of daily closes up to that session
+                        (BULL/BEAR; FirstBarTradeGenerator.classify_trend
+                        without the large-gap relabelling)
+
+Numeric columns `prev_close`, `ma50_value` and `ma50_diff_pct` are kept so
+callers can apply classify_trend's own thresholds.
+
+    labels = load_daily_trends()                  # DataFrame, date + label columns
+    trend_map = load_trend_map('method1_0915')    # {datetime.date: 'BULL', ...}
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import store
+from .cube import NS_PER_DAY, NS_PER_MINUTE, SESSION_START_MINUTE
+from .indicators import trend_columns
+from .sessions import session_index
+
+
+TREND_TIMEFRAME = '120min'
+MA_PERIOD = 50
+
+LABELS = ['BULL', 'BEAR', 'SIDEWAYS']
+CONVENTIONS = ['method1_0915', 'method1_prev_close', 'prev_close_ema', 'ma50']
+
+
+def table_path() -> Path:
+    return store.STORE_DIR / "daily_trend" / f"{TREND_TIMEFRAME}.parquet"
+
+
+def _label(bull: np.ndarray, bear: np.ndarray, known: np.ndarray) -> pd.Categorical:
+    codes = np.select([bull, bear], [0, 1], default=2)
+    codes[~known] = -1
+    return pd.Categorical.from_codes(codes, categories=LABELS)
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """Value of the previous day (NaN for the first)"""
+    out = np.full(len(values), np.nan)
+    out[1:] = values[:-1]
+    return out
+
+
+# =============================================================================
+# BUILD / LOAD
+# =============================================================================
+
+def daily_trend_table(bars: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the label table from time-sorted 2-hour bars (date/close).
+    """
+    close = bars['close'].to_numpy(dtype='float64')
+    trend, _ = trend_columns(close)
+    up = trend['uptrend'].to_numpy()
+    down = trend['downtrend'].to_numpy()
+    ema_fast = trend['ema11'].to_numpy()
+    ema_slow = trend['ema21'].to_numpy()
+
+    idx = session_index(bars)
+    n_days = idx.n_days
+
+    # method1 on the 09:15 bar (days without one are unlabelled)
+    ts = store.epoch_ns(bars['date'])
+    at_open = (ts % NS_PER_DAY) == SESSION_START_MINUTE * NS_PER_MINUTE
+    open_rows = np.full(n_days, -1)
+    open_rows[idx.day_ids()[at_open]] = np.flatnonzero(at_open)
+    has_open = open_rows >= 0
+    take = np.where(has_open, open_rows, 0)
+
+    # State at the previous session's last bar
+    last = idx.end - 1
+    prev_up = _previous(up[last].astype('float64')) == 1
+    prev_down = _previous(down[last].astype('float64')) == 1
+    prev_fast = _previous(ema_fast[last])
+    prev_slow = _previous(ema_slow[last])
+    has_prev = np.arange(n_days) > 0
+
+    daily_close = close[last]
+    ma = pd.Series(daily_close).rolling(MA_PERIOD).mean().to_numpy()
+    prev_close = _previous(daily_close)
+    prev_ma = _previous(ma)
+    with np.errstate(invalid='ignore'):
+        diff_pct = (prev_close - prev_ma) / prev_ma * 100
+
+    table = pd.DataFrame({'date': pd.to_datetime(idx.dates).astype('datetime64[ns]')})
+    table['method1_0915'] = _label(up[take], down[take], has_open)
+    table['method1_prev_close'] = _label(prev_up, prev_down, has_prev)
+    table['prev_close_ema'] = _label(prev_fast > prev_slow, ~(prev_fast > prev_slow), has_prev)
+    table['ma50'] = _label(diff_pct > 0, ~(diff_pct > 0), ~np.isnan(diff_pct))
+    table['prev_close'] = prev_close
+    table['ma50_value'] = prev_ma
+    table['ma50_diff_pct'] = diff_pct
+    return table
+
+
+def _source_signature() -> str:
+    return store.store_checksum(TREND_TIMEFRAME)
+
+
+def build_daily_trends() -> pd.DataFrame:
+    """Recompute the table from the 120-min store and write the cache"""
+    print("Building daily trend labels...")
+    if not store.has_store(TREND_TIMEFRAME):
+        store.convert_csv(TREND_TIMEFRAME)
+    table = daily_trend_table(store.load_bars(TREND_TIMEFRAME, columns=['close']))
+
+    path = table_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table.to_parquet(path, index=False)
+    with open(path.with_suffix('.json'), 'w') as f:
+        json.dump({'source': _source_signature(), 'days': len(table)}, f, indent=2)
+    return table
+
+
+def _is_current() -> bool:
+    meta = table_path().with_suffix('.json')
+    if not (meta.exists() and table_path().exists() and store.has_store(TREND_TIMEFRAME)):
+        return False
+    with open(meta) as f:
+        return json.load(f).get('source') == _source_signature()
+
+
+def load_daily_trends(rebuild: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Daily label table (date + categorical label columns), rebuilt when the
+    120-min store has changed.
+
+    Args:
+        rebuild: Force (True) or skip (False) the staleness check rebuild
+    """
+    if rebuild or (rebuild is None and not _is_current()):
+        return build_daily_trends()
+    table = pd.read_parquet(table_path())
+    table['date'] = table['date'].astype('datetime64[ns]')
+    return table
+
+
+def load_trend_map(convention: str = 'method1_0915') -> Dict:
+    """{datetime.date: label} for one convention (unlabelled days omitted)"""
+    if convention not in CONVENTIONS:
+        raise ValueError(f"Unknown convention '{convention}'. Expected one of {CONVENTIONS}")
+    table = load_daily_trends()
+    labels = table[convention]
+    known = labels.notna().to_numpy()
+    return dict(zip(table['date'].dt.date[known], labels[known].astype(str)))
@@ -0,0 +1,108 @@
+"""
+Signal Evaluation
+=================
+Forward-return scoring of bull/bear signal columns, for any number of
+signals and horizons at once.
+
+A bull signal is correct if the close `h` bars later is higher, a bear
+signal if it is lower; bars without a full forward window are not counted.
+This is the definition used by evaluate_trend_method in
+trend_analysis_methods.py, computed with one (bars x horizons) forward-return
+matrix and matrix products instead of a row loop.
+
+    curves = signal_curves(df['close'], df['method1_bull'], df['method1_bear'], range(1, 49))
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+SCORE_FIELDS = [
+    'bull_signals', 'bull_correct', 'bull_accuracy', 'bull_avg_return',
+    'bear_signals', 'bear_correct', 'bear_accuracy', 'bear_avg_return',
+    'total_signals', 'overall_accuracy',
+]
+
+
+# =============================================================================
+# FORWARD RETURNS
+# =============================================================================
+
+def forward_return_pct(close, forward_bars: int) -> np.ndarray:
+    """% change from each close to the close `forward_bars` later (NaN at the end)"""
+    close = np.asarray(close, dtype='float64')
+    out = np.full(len(close), np.nan)
+    if len(close) > forward_bars:
+        out[:-forward_bars] = (close[forward_bars:] - close[:-forward_bars]) / close[:-forward_bars] * 100
+    return out
+
+
+def forward_return_matrix(close, horizons: Sequence[int]) -> np.ndarray:
+    """
+    (bars x len(horizons)) array, column j = forward_return_pct(close, horizons[j])
+    """
+    close = np.asarray(close, dtype='float64')
+    out = np.empty((len(close), len(horizons)))
+    for j, h in enumerate(horizons):
+        out[:, j] = forward_return_pct(close, h)
+    return out
+
+
+# =============================================================================
+# SCORING
+# =============================================================================
+
+def score_signals(bull, bear, returns) -> Dict[str, np.ndarray]:
+    """
+    Score boolean signal columns against forward returns.
+
+    Args:
+        bull / bear: (bars,) or (bars x signals) booleans
+        returns: (bars,) or (bars x horizons) % returns, NaN where unknown
+
+    Returns:
+        SCORE_FIELDS -> (horizons x signals) arrays; accuracy/avg return
+        are 0 where there are no signals
+    """
+    bull = np.asarray(bull, dtype=bool).reshape(len(bull), -1).astype('float64')
+    bear = np.asarray(bear, dtype=bool).reshape(len(bear), -1).astype('float64')
+    returns = np.asarray(returns, dtype='float64').reshape(len(returns), -1)
+
+    valid = (~np.isnan(returns)).astype('float64').T
+    up = (returns > 0).astype('float64').T
+    down = (returns < 0).astype('float64').T
+    filled = np.where(np.isnan(returns), 0.0, returns).T
+
+    bull_signals = valid @ bull
+    bear_signals = valid @ bear
+    bull_correct = up @ bull
+    bear_correct = down @ bear
+    total = bull_signals + bear_signals
+
+    def ratio(num, den, scale=1.0):
+        out = np.zeros(num.shape)
+        np.divide(num, den, out=out, where=den > 0)
+        return out * scale
+
+    return {
+        'bull_signals': bull_signals.astype('int64'),
+        'bull_correct': bull_correct.astype('int64'),
+        'bull_accuracy': ratio(bull_correct, bull_signals, 100),
+        'bull_avg_return': ratio(filled @ bull, bull_signals),
+        'bear_signals': bear_signals.astype('int64'),
+        'bear_correct': bear_correct.astype('int64'),
+        'bear_accuracy': ratio(bear_correct, bear_signals, 100),
+        'bear_avg_return': ratio(filled @ bear, bear_signals),
+        'total_signals': total.astype('int64'),
+        'overall_accuracy': ratio(bull_correct + bear_correct, total, 100),
+    }
+
+
+def signal_curves(close, bull, bear, horizons: Sequence[int]) -> pd.DataFrame:
+    """Scores of one bull/bear signal pair at every horizon (one row per horizon)"""
+    scores = score_signals(bull, bear, forward_return_matrix(close, horizons))
+    curves = pd.DataFrame({name: values[:, 0] for name, values in scores.items()})
+    curves.insert(0, 'horizon', list(horizons))
+    return curves
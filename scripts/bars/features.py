@@ -0,0 +1,183 @@
+"""
+Per-Day Features
+================
+One row per session with the first bar's shape, the gap, the opening bar
+colors and the day's range, as columns the opening-pattern scripts join on
+and the scenario masks of bars.scenarios are evaluated over:
+
+    features = load_day_features('5min')            # cached, indexed by date
+    features = day_features(df)                     # any time-sorted bar frame
+    first = first_bar_features(df)                  # first-bar columns only
+
+First-bar columns (first_bar_features): date (the session day), the first
+bar's open/high/low/close, prev_close (previous bar's close, NaN on the
+first day) and gap, candle_len, body, upper_wick, lower_wick, is_bull /
+is_bear, and the gap_bucket and first_bar labels of bars.highlow. Every
+other column of the first bar (e.g. a per-bar trend label) is kept too.
+
+Day columns (day_features, indexed by date): the above plus
+    upper_wick_ratio / lower_wick_ratio   first bar wick / range (NaN if flat)
+    day_close                             last bar's close
+    session_close                         close of the last bar before 15:30
+    day_high / day_low / day_range
+    high_bar / low_bar                    position in the day of the first bar
+                                          making the day's high / low
+    color_1 .. color_N                    1 bull, -1 bear, 0 flat, NaN missing
+                                          for the bars at the first N session
+                                          slots (09:15, 09:20, ...)
+The cached table adds one column per bars.daily_trend convention
+(method1_0915, method1_prev_close, prev_close_ema, ma50).
+
+All of it comes from grouped reductions over the session index and cube,
+so scripts join on the date instead of scanning a daily frame per day.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import store
+from .cube import CLOSE, OPEN, cube_from_bars
+from .daily_trend import CONVENTIONS, TREND_TIMEFRAME, load_daily_trends
+from .highlow import GAP_THRESHOLD, WICK_RATIO, first_bar_frame, first_bar_type, gap_bucket
+from .sessions import session_index
+
+
+FEATURE_COLUMNS = ['open', 'high', 'low', 'close']
+DEFAULT_COLORS = 6   # first-hour colors on 5-min bars
+
+
+def feature_path(timeframe: str) -> Path:
+    return store.STORE_DIR / "features" / f"day-{timeframe}.parquet"
+
+
+# =============================================================================
+# FEATURES
+# =============================================================================
+
+def first_bar_features(df: pd.DataFrame, gap_threshold: float = GAP_THRESHOLD,
+                       wick_ratio: float = WICK_RATIO) -> pd.DataFrame:
+    """
+    First-bar feature row per day of a time-sorted bar frame (date/OHLC).
+
+    Args:
+        df: Bar frame, e.g. load_bars('5min')
+        gap_threshold: Split of the gap_bucket label
+        wick_ratio: "Strong" wick limit of the first_bar label
+    """
+    first = first_bar_frame(df)
+    first['date'] = first['date'].dt.normalize()
+    first['candle_len'] = first['high'] - first['low']
+    first['body'] = first['close'] - first['open']
+    first['upper_wick'] = first['high'] - first['close']
+    first['lower_wick'] = first['close'] - first['low']
+    first['is_bull'] = first['close'] > first['open']
+    first['is_bear'] = first['close'] < first['open']
+    first['gap_bucket'] = gap_bucket(first['gap'], gap_threshold)
+    first['first_bar'] = first_bar_type(first['open'], first['high'], first['low'], first['close'],
+                                        wick_ratio)
+    return first
+
+
+def day_features(df: pd.DataFrame, timeframe: str = '5min', n_colors: int = DEFAULT_COLORS,
+                 gap_threshold: float = GAP_THRESHOLD, wick_ratio: float = WICK_RATIO) -> pd.DataFrame:
+    """
+    Day feature table (indexed by date) of a time-sorted bar frame.
+
+    Args:
+        df: Bar frame, e.g. load_bars('5min')
+        timeframe: Bar length of `df` (sets the session slots of the colors)
+        n_colors: Number of opening bar colors (color_1 .. color_N)
+        gap_threshold / wick_ratio: As in first_bar_features
+    """
+    features = first_bar_features(df, gap_threshold, wick_ratio)
+    flat = features['candle_len'] == 0
+    features['upper_wick_ratio'] = (features['upper_wick'] / features['candle_len']).mask(flat)
+    features['lower_wick_ratio'] = (features['lower_wick'] / features['candle_len']).mask(flat)
+
+    # Day reductions over the rows of each session
+    idx = session_index(df)
+    high = df['high'].to_numpy(dtype='float64')
+    low = df['low'].to_numpy(dtype='float64')
+    close = df['close'].to_numpy(dtype='float64')
+    features['day_close'] = close[idx.end - 1]
+    day_high = np.maximum.reduceat(high, idx.start) if idx.n_days else np.empty(0)
+    day_low = np.minimum.reduceat(low, idx.start) if idx.n_days else np.empty(0)
+    features['day_high'] = day_high
+    features['day_low'] = day_low
+    features['day_range'] = day_high - day_low
+    features['high_bar'] = _first_position(high == np.repeat(day_high, idx.count), idx)
+    features['low_bar'] = _first_position(low == np.repeat(day_low, idx.count), idx)
+
+    # Session slots (clock positions) from the cube, aligned on the date
+    cube = cube_from_bars(df, timeframe)
+    days = pd.DatetimeIndex(pd.to_datetime(cube.dates))
+    session_close = pd.Series(cube.day_close(), index=days)
+    features['session_close'] = features['date'].map(session_close).to_numpy()
+    n_colors = min(n_colors, cube.n_bars)
+    colors = np.sign(cube.values[:, :n_colors, CLOSE] - cube.values[:, :n_colors, OPEN])
+    colors = pd.DataFrame(colors, index=days, columns=[f"color_{k + 1}" for k in range(n_colors)])
+    features = features.join(colors, on='date')
+    return features.set_index('date')
+
+
+def _first_position(hit: np.ndarray, idx) -> np.ndarray:
+    """Position within its day of the first True row of every day"""
+    rows = np.flatnonzero(hit)
+    day_of_row = idx.day_ids()[rows]
+    days, first = np.unique(day_of_row, return_index=True)
+    out = np.full(idx.n_days, -1, dtype='int64')
+    out[days] = rows[first] - idx.start[days]
+    return out
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def _source_signature(timeframe: str) -> str:
+    return f"{store.store_checksum(timeframe)}:{store.store_checksum(TREND_TIMEFRAME)}"
+
+
+def build_day_features(timeframe: str = '5min') -> pd.DataFrame:
+    """Recompute the table from the store and write the cache"""
+    print(f"Building {timeframe} day features...")
+    features = day_features(store.load_bars(timeframe, columns=FEATURE_COLUMNS), timeframe)
+    trends = load_daily_trends().set_index('date')
+    features = features.join(trends[CONVENTIONS])
+
+    path = feature_path(timeframe)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    features.to_parquet(path)
+    with open(path.with_suffix('.json'), 'w') as f:
+        json.dump({'source': _source_signature(timeframe), 'days': len(features)}, f, indent=2)
+    return features
+
+
+def _is_current(timeframe: str) -> bool:
+    meta = feature_path(timeframe).with_suffix('.json')
+    if not (meta.exists() and feature_path(timeframe).exists()):
+        return False
+    with open(meta) as f:
+        return json.load(f).get('source') == _source_signature(timeframe)
+
+
+def load_day_features(timeframe: str = '5min', rebuild: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Cached day feature table of a stored timeframe (indexed by date), rebuilt
+    when the bar store or the 120-min trend store has changed.
+
+    Args:
+        timeframe: Stored timeframe
+        rebuild: Force (True) or skip (False) the staleness check rebuild
+    """
+    if not store.has_store(timeframe):
+        store.convert_csv(timeframe)
+    if rebuild or (rebuild is None and not _is_current(timeframe)):
+        return build_day_features(timeframe)
+    features = pd.read_parquet(feature_path(timeframe))
+    features.index = features.index.astype('datetime64[ns]')
+    return features
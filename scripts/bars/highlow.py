@@ -0,0 +1,454 @@
+"""
+High/Low-Set Probabilities
+==========================
+Probability that the day's high (low, either) has already been seen by each
+bar of the session, for every noise offset 0..max_offset points at once.
+
+A bar counts as "high set" at offset `o` when high_so_far + o >= day_high
+(low: low_so_far - o <= day_low), the definition of the old per-script
+calculate_probabilities. Because high_so_far only rises through the day,
+each (day, bar) cell has a smallest integer offset from which it counts as
+set, and the first bar of a day that is within `o` of the final high is the
+first bar whose required offset is <= o. So one pass computes the required
+offsets, a per-bar histogram of them is accumulated over the offset axis,
+and the whole probability surface falls out of that cumulative sum, no
+matter how many offsets are read from it.
+
+    curves = high_low_curves(load_session_cube('5min'), max_offset=50)
+    stats = curves.stats(10)                        # bar_index, *_count, prob_*
+    surface = curves.probability('either')          # (offsets x bars)
+
+`bar_high_low_curves(df)` does the same for a bar frame (bars numbered by
+position within the day, as groupby().cumcount() does), e.g. after
+filtering days by a scenario.
+
+Conditional Curves
+------------------
+`bar_conditional_curves(df, categories)` keeps the counts separately for
+every combination of per-day categories (trend, gap bucket, first-bar type,
+...) in one (categories... x offsets x bars) array, built with a single
+bincount. A scenario is then a selection of labels and any dimension left
+out is summed over:
+
+    first = first_bar_frame(df)                     # one row per day
+    cube = bar_conditional_curves(df, {
+        'gap': gap_bucket(first['gap']),
+        'first_bar': first_bar_type(first['open'], first['high'], first['low'], first['close']),
+    })
+    curves = cube.select(gap='up_large', first_bar=['strong_bull', 'weak_bull'])
+    n_days = cube.day_count(gap='up_large')
+
+Day subsets that are not unions of category cells (the overlapping masks of
+bars.scenarios) go through `bar_masked_curves(df, masks)`, one set of curves
+per mask from the same required offsets.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cube import SessionCube
+from .sessions import session_index
+
+
+DEFAULT_MAX_OFFSET = 100
+
+SET_FIELDS = ('high', 'low', 'either')
+
+# Gap of the first bar's open from the previous close, split at +/- GAP_THRESHOLD
+GAP_THRESHOLD = 50
+GAP_BUCKETS = ['down_large', 'down_small', 'up_small', 'up_large', 'unknown']
+
+# First bar body direction; "strong" = the wick against the move is at most
+# WICK_RATIO of the bar's range
+WICK_RATIO = 0.10
+FIRST_BAR_TYPES = ['strong_bull', 'weak_bull', 'doji', 'weak_bear', 'strong_bear']
+
+
+# =============================================================================
+# CURVES CONTAINER
+# =============================================================================
+
+@dataclass
+class HighLowCurves:
+    """Set counts per (offset, bar index)"""
+    high_set: np.ndarray    # int64 (n_offsets, n_bars)
+    low_set: np.ndarray     # int64 (n_offsets, n_bars)
+    either_set: np.ndarray  # int64 (n_offsets, n_bars)
+    total_days: np.ndarray  # int64 (n_bars,) days with a bar at that index
+
+    @property
+    def max_offset(self) -> int:
+        return self.high_set.shape[0] - 1
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return np.arange(self.max_offset + 1)
+
+    @property
+    def n_bars(self) -> int:
+        return self.high_set.shape[1]
+
+    def counts(self, field: str) -> np.ndarray:
+        if field not in SET_FIELDS:
+            raise ValueError(f"Unknown field '{field}'. Expected one of {SET_FIELDS}")
+        return getattr(self, f'{field}_set')
+
+    def probability(self, field: str = 'either') -> np.ndarray:
+        """(offsets x bars) probability surface (NaN where no day has the bar)"""
+        counts = self.counts(field)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return counts / np.where(self.total_days > 0, self.total_days, np.nan)
+
+    def stats(self, offset: int = 0) -> pd.DataFrame:
+        """
+        Per-bar table for one offset, with the columns of the old
+        calculate_probabilities (bar_index is 1-based; bars no day reaches
+        are dropped).
+        """
+        if offset != int(offset) or not 0 <= offset <= self.max_offset:
+            raise ValueError(f"Offset must be an integer in 0..{self.max_offset}, got {offset}")
+        o = int(offset)
+        stats = pd.DataFrame({
+            'bar_index': np.arange(1, self.n_bars + 1),
+            'high_set_count': self.high_set[o],
+            'low_set_count': self.low_set[o],
+            'either_set_count': self.either_set[o],
+            'total_days': self.total_days,
+        })
+        stats = stats[stats['total_days'] > 0].reset_index(drop=True)
+        stats['prob_high_set'] = stats['high_set_count'] / stats['total_days']
+        stats['prob_low_set'] = stats['low_set_count'] / stats['total_days']
+        stats['prob_either_set'] = stats['either_set_count'] / stats['total_days']
+        return stats
+
+
+@dataclass
+class ConditionalCurves:
+    """Set counts per category combination, offset and bar index"""
+    dims: Tuple[str, ...]          # category names, e.g. ('trend', 'gap', 'first_bar')
+    labels: Dict[str, List[str]]   # dim -> labels along that axis
+    high_set: np.ndarray           # int64 (*categories, n_offsets, n_bars)
+    low_set: np.ndarray
+    either_set: np.ndarray
+    total_days: np.ndarray         # int64 (*categories, n_bars)
+    days: np.ndarray               # int64 (*categories) days per combination
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.days.shape
+
+    def _indexer(self, selection: Dict) -> List[np.ndarray]:
+        unknown = set(selection) - set(self.dims)
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {sorted(unknown)}. Expected {list(self.dims)}")
+        index = []
+        for dim in self.dims:
+            labels = self.labels[dim]
+            wanted = selection.get(dim)
+            if wanted is None:
+                index.append(np.arange(len(labels)))
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            missing = [w for w in wanted if w not in labels]
+            if missing:
+                raise ValueError(f"Unknown {dim} label(s) {missing}. Expected one of {labels}")
+            index.append(np.array([labels.index(w) for w in wanted], dtype='int64'))
+        return index
+
+    def _sum(self, values: np.ndarray, index: List[np.ndarray]) -> np.ndarray:
+        """Sum `values` over the selected labels of every category axis"""
+        for axis, rows in enumerate(index):
+            values = np.take(values, rows, axis=axis)
+        return values.reshape((-1,) + values.shape[len(index):]).sum(axis=0)
+
+    def select(self, **selection) -> HighLowCurves:
+        """
+        Curves of the days matching `selection` (dim=label or dim=[labels]);
+        dimensions not named are summed over.
+        """
+        index = self._indexer(selection)
+        return HighLowCurves(
+            high_set=self._sum(self.high_set, index),
+            low_set=self._sum(self.low_set, index),
+            either_set=self._sum(self.either_set, index),
+            total_days=self._sum(self.total_days, index),
+        )
+
+    def day_count(self, **selection) -> int:
+        """Number of days matching `selection`"""
+        return int(self._sum(self.days, self._indexer(selection)))
+
+    def marginal(self, *keep: str) -> 'ConditionalCurves':
+        """Cube over the `keep` dimensions only (the others summed over)"""
+        unknown = set(keep) - set(self.dims)
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {sorted(unknown)}. Expected {list(self.dims)}")
+        drop = tuple(i for i, dim in enumerate(self.dims) if dim not in keep)
+        return ConditionalCurves(
+            dims=tuple(dim for dim in self.dims if dim in keep),
+            labels={dim: self.labels[dim] for dim in self.dims if dim in keep},
+            high_set=self.high_set.sum(axis=drop),
+            low_set=self.low_set.sum(axis=drop),
+            either_set=self.either_set.sum(axis=drop),
+            total_days=self.total_days.sum(axis=drop),
+            days=self.days.sum(axis=drop),
+        )
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+def required_offsets(high_so_far: np.ndarray, low_so_far: np.ndarray,
+                     day_high: np.ndarray, day_low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Smallest integer offset at which each bar counts as high / low set.
+
+    Matches the float comparisons `high_so_far + o >= day_high` and
+    `low_so_far - o <= day_low` exactly: ceil of the distance, stepped back
+    by one where the rounded sum already reaches the extreme.
+    """
+    with np.errstate(invalid='ignore'):
+        need_high = np.ceil(np.maximum(day_high - high_so_far, 0))
+        need_low = np.ceil(np.maximum(low_so_far - day_low, 0))
+        need_high -= (need_high > 0) & (high_so_far + (need_high - 1) >= day_high)
+        need_low -= (need_low > 0) & (low_so_far - (need_low - 1) <= day_low)
+    return need_high, need_low
+
+
+def _needs(high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Required high / low / either offsets of (days x bars) high and low arrays"""
+    high = np.asarray(high, dtype='float64')
+    low = np.asarray(low, dtype='float64')
+    if high.size == 0:
+        return high.copy(), high.copy(), high.copy()
+    day_high = np.nanmax(high, axis=1)[:, np.newaxis]
+    day_low = np.nanmin(low, axis=1)[:, np.newaxis]
+    need_high, need_low = required_offsets(np.fmax.accumulate(high, axis=1),
+                                           np.fmin.accumulate(low, axis=1),
+                                           day_high, day_low)
+    return need_high, need_low, np.fmin(need_high, need_low)
+
+
+def _grouped_counts(need: np.ndarray, mask: np.ndarray, cell: np.ndarray,
+                    n_cells: int, max_offset: int) -> np.ndarray:
+    """
+    (cells x offsets x bars) number of days with need <= offset, over the
+    cells in `mask`, grouped by each day's `cell`.
+    """
+    n_bars = need.shape[1]
+    width = max_offset + 2   # last bucket: not set within max_offset
+    bucket = np.minimum(need[mask], max_offset + 1).astype('int64')
+    bar = np.broadcast_to(np.arange(n_bars), need.shape)[mask]
+    group = np.broadcast_to(cell[:, np.newaxis], need.shape)[mask]
+    key = (group * n_bars + bar) * width + bucket
+    hist = np.bincount(key, minlength=n_cells * n_bars * width).reshape(n_cells, n_bars, width)
+    return np.cumsum(hist, axis=2)[:, :, :max_offset + 1].transpose(0, 2, 1)
+
+
+def _bar_matrix(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(days x bars) high, low and mask of a time-sorted bar frame, bars by position"""
+    idx = session_index(df)
+    n_bars = int(idx.count.max()) if idx.n_days else 0
+    rows, cols = idx.day_ids(), idx.bar_number()
+
+    high = np.full((idx.n_days, n_bars), np.nan)
+    low = np.full((idx.n_days, n_bars), np.nan)
+    mask = np.zeros((idx.n_days, n_bars), dtype=bool)
+    high[rows, cols] = df['high'].to_numpy(dtype='float64')
+    low[rows, cols] = df['low'].to_numpy(dtype='float64')
+    mask[rows, cols] = True
+    return high, low, mask
+
+
+def curves_from_matrix(high: np.ndarray, low: np.ndarray, mask: np.ndarray,
+                       max_offset: int = DEFAULT_MAX_OFFSET) -> HighLowCurves:
+    """
+    Curves from (days x bars) high/low arrays.
+
+    Args:
+        high / low: Bar highs and lows, NaN where a bar is missing
+        mask: True where a bar exists (only those cells are counted)
+        max_offset: Largest offset in points
+    """
+    cube = conditional_curves(high, low, mask, {}, max_offset)
+    return cube.select()
+
+
+def high_low_curves(cube: SessionCube, max_offset: int = DEFAULT_MAX_OFFSET) -> HighLowCurves:
+    """Curves over a session cube (bar index = clock slot within the session)"""
+    return curves_from_matrix(cube.high, cube.low, cube.mask, max_offset)
+
+
+def bar_high_low_curves(df: pd.DataFrame, max_offset: int = DEFAULT_MAX_OFFSET) -> HighLowCurves:
+    """
+    Curves over a time-sorted bar frame (date/high/low), bar index = position
+    of the bar within its day.
+    """
+    return curves_from_matrix(*_bar_matrix(df), max_offset)
+
+
+# =============================================================================
+# CONDITIONAL CURVES
+# =============================================================================
+
+def _category_codes(name: str, values) -> Tuple[np.ndarray, List[str]]:
+    """Integer codes and labels of one per-day category"""
+    values = pd.Series(values).reset_index(drop=True)
+    if values.isna().any():
+        raise ValueError(f"Category '{name}' has missing values")
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        cat = values.cat
+    else:
+        cat = values.astype(str).astype('category').cat
+    return cat.codes.to_numpy(dtype='int64'), [str(c) for c in cat.categories]
+
+
+def conditional_curves(high: np.ndarray, low: np.ndarray, mask: np.ndarray,
+                       categories: Dict[str, Sequence],
+                       max_offset: int = DEFAULT_MAX_OFFSET) -> ConditionalCurves:
+    """
+    Conditional curves from (days x bars) high/low arrays.
+
+    Args:
+        high / low / mask: As in curves_from_matrix
+        categories: dim name -> one label per day (row of `high`); a
+            Categorical keeps its category order, anything else is sorted
+        max_offset: Largest offset in points
+    """
+    mask = np.asarray(mask, dtype=bool)
+    n_days = mask.shape[0]
+    dims, labels, codes = [], {}, []
+    for name, values in categories.items():
+        day_codes, day_labels = _category_codes(name, values)
+        if len(day_codes) != n_days:
+            raise ValueError(f"Category '{name}' has {len(day_codes)} values for {n_days} days")
+        dims.append(name)
+        labels[name] = day_labels
+        codes.append(day_codes)
+
+    shape = tuple(len(labels[d]) for d in dims)
+    n_cells = int(np.prod(shape, dtype='int64'))
+    cell = np.ravel_multi_index(codes, shape) if dims else np.zeros(n_days, dtype='int64')
+
+    need_high, need_low, need_either = _needs(high, low)
+    n_bars = mask.shape[1]
+
+    def counts(need):
+        return _grouped_counts(need, mask, cell, n_cells, max_offset).reshape(shape + (max_offset + 1, n_bars))
+
+    total_days = np.zeros((n_cells, n_bars), dtype='int64')
+    np.add.at(total_days, cell, mask.astype('int64'))
+    return ConditionalCurves(
+        dims=tuple(dims),
+        labels=labels,
+        high_set=counts(need_high),
+        low_set=counts(need_low),
+        either_set=counts(need_either),
+        total_days=total_days.reshape(shape + (n_bars,)),
+        days=np.bincount(cell, minlength=n_cells).astype('int64').reshape(shape),
+    )
+
+
+def bar_conditional_curves(df: pd.DataFrame, categories: Dict[str, Sequence],
+                           max_offset: int = DEFAULT_MAX_OFFSET) -> ConditionalCurves:
+    """
+    Conditional curves over a time-sorted bar frame, bar index = position
+    of the bar within its day. `categories` values are one label per day of
+    `df`, in date order (e.g. columns of first_bar_frame(df)).
+    """
+    return conditional_curves(*_bar_matrix(df), categories, max_offset)
+
+
+def masked_curves(high: np.ndarray, low: np.ndarray, mask: np.ndarray,
+                  day_masks: Dict[str, np.ndarray],
+                  max_offset: int = DEFAULT_MAX_OFFSET) -> Dict[str, HighLowCurves]:
+    """
+    Curves of many (possibly overlapping) day subsets, e.g. the columns of
+    bars.scenarios.scenario_masks, sharing one required-offset pass.
+
+    Args:
+        high / low / mask: As in curves_from_matrix
+        day_masks: name -> boolean per day (row of `high`)
+        max_offset: Largest offset in points
+    """
+    mask = np.asarray(mask, dtype=bool)
+    needs = _needs(high, low)
+    no_cell = np.zeros(mask.shape[0], dtype='int64')
+    out = {}
+    for name, days in day_masks.items():
+        days = np.asarray(days, dtype=bool)
+        if len(days) != mask.shape[0]:
+            raise ValueError(f"Day mask '{name}' has {len(days)} values for {mask.shape[0]} days")
+        cells = mask & days[:, np.newaxis]
+        high_set, low_set, either_set = (_grouped_counts(need, cells, no_cell, 1, max_offset)[0]
+                                         for need in needs)
+        out[name] = HighLowCurves(high_set=high_set, low_set=low_set, either_set=either_set,
+                                  total_days=cells.sum(axis=0).astype('int64'))
+    return out
+
+
+def bar_masked_curves(df: pd.DataFrame, day_masks: Dict[str, Sequence],
+                      max_offset: int = DEFAULT_MAX_OFFSET) -> Dict[str, HighLowCurves]:
+    """masked_curves over a time-sorted bar frame, bar index = position within the day"""
+    return masked_curves(*_bar_matrix(df), day_masks, max_offset)
+
+
+# =============================================================================
+# DAY CATEGORIES
+# =============================================================================
+
+def first_bar_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    First bar of every day of a time-sorted bar frame, with `prev_close`
+    (the previous bar's close, NaN for the first day) and `gap`.
+    """
+    idx = session_index(df)
+    close = df['close'].to_numpy(dtype='float64')
+    prev_close = np.full(idx.n_days, np.nan)
+    prev_close[1:] = close[idx.start[1:] - 1]
+
+    first = df.iloc[idx.start].reset_index(drop=True)
+    first['prev_close'] = prev_close
+    first['gap'] = first['open'] - first['prev_close']
+    return first
+
+
+def gap_bucket_codes(gap, threshold: float = GAP_THRESHOLD) -> np.ndarray:
+    """Codes into GAP_BUCKETS of gap_bucket (no Categorical, for per-bar use)"""
+    gap = np.asarray(gap, dtype='float64')
+    return np.select(
+        [gap <= -threshold, gap <= 0, gap < threshold, gap >= threshold],
+        [0, 1, 2, 3], default=4)
+
+
+def gap_bucket(gap, threshold: float = GAP_THRESHOLD) -> pd.Categorical:
+    """
+    GAP_BUCKETS label of each gap: down_large (<= -threshold), down_small
+    (<= 0), up_small (< threshold), up_large (>= threshold), unknown (NaN).
+    """
+    return pd.Categorical.from_codes(gap_bucket_codes(gap, threshold), categories=GAP_BUCKETS)
+
+
+def first_bar_type_codes(open_, high, low, close, wick_ratio: float = WICK_RATIO) -> np.ndarray:
+    """Codes into FIRST_BAR_TYPES of first_bar_type (no Categorical, for per-bar use)"""
+    open_, high, low, close = (np.asarray(a, dtype='float64') for a in (open_, high, low, close))
+    candle_len = high - low
+    bull = close > open_
+    bear = close < open_
+    strong_bull = bull & (high - close <= wick_ratio * candle_len)
+    strong_bear = bear & (close - low <= wick_ratio * candle_len)
+    return np.select([strong_bull, bull, strong_bear, bear], [0, 1, 4, 3], default=2)
+
+
+def first_bar_type(open_, high, low, close, wick_ratio: float = WICK_RATIO) -> pd.Categorical:
+    """
+    FIRST_BAR_TYPES label of each bar. strong_bull: close > open with an
+    upper wick <= wick_ratio of the range; strong_bear: close < open with a
+    lower wick <= wick_ratio of the range.
+    """
+    codes = first_bar_type_codes(open_, high, low, close, wick_ratio)
+    return pd.Categorical.from_codes(codes, categories=FIRST_BAR_TYPES)
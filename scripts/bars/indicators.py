@@ -0,0 +1,225 @@
+"""
+Indicators
+==========
+Array-in/array-out NumPy versions of the indicators used across the
+analysis scripts (EMA, slope in degrees, ATR, ADX/DI, higher-high/lower-low
+flags). Values are identical to the per-script helpers they replace; see
+utils/bench_indicators.py.
+
+Inputs may be 1-D (one series) or 2-D (bars x series), and `ema_periods`
+evaluates several spans of one series at once. EMA and slope accept an
+optional carried-over state so a series can be extended without
+recomputing its history.
+"""
+
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _frame(values: np.ndarray):
+    """Wrap a 1-D/2-D array so pandas' C ewm/rolling kernels can run on it"""
+    return pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+
+
+# libm atan2 applied element-wise: np.arctan2 can differ from math.atan2 in the
+# last ulp, which would make slopes (and thresholded trend flags) drift from
+# the values the existing reports were produced with
+_atan2 = np.frompyfunc(math.atan2, 2, 1)
+
+
+def _shifted_diff(values: np.ndarray, lookback: int) -> np.ndarray:
+    """values[i] - values[i - lookback], NaN for the first `lookback` rows"""
+    out = np.full(values.shape, np.nan)
+    if len(values) > lookback:
+        out[lookback:] = values[lookback:] - values[:-lookback]
+    return out
+
+
+# =============================================================================
+# CORE INDICATORS
+# =============================================================================
+
+def ema(values, period: int, initial=None) -> np.ndarray:
+    """
+    Exponential Moving Average, identical to
+    `Series.ewm(span=period, adjust=False).mean()`.
+
+    Args:
+        values: 1-D array of prices, or 2-D (bars x series)
+        period: EMA span
+        initial: EMA value(s) of the bar before values[0], if continuing a series
+    """
+    values = np.asarray(values, dtype='float64')
+    if initial is None:
+        return _frame(values).ewm(span=period, adjust=False).mean().to_numpy()
+
+    # Seeding with the previous EMA: the first output becomes
+    # alpha * x0 + (1 - alpha) * initial, exactly the recursive update
+    seed = np.broadcast_to(np.asarray(initial, dtype='float64'), values.shape[1:])
+    seeded = np.concatenate((seed[np.newaxis], values))
+    return _frame(seeded).ewm(span=period, adjust=False).mean().to_numpy()[1:]
+
+
+def ema_periods(values, periods: Sequence[int]) -> np.ndarray:
+    """
+    EMAs of one series for several spans.
+
+    Returns:
+        (bars x len(periods)) array, column j = ema(values, periods[j])
+    """
+    values = np.asarray(values, dtype='float64')
+    out = np.empty((len(values), len(periods)))
+    for j, period in enumerate(periods):
+        out[:, j] = ema(values, period)
+    return out
+
+
+def slope_degrees(values, lookback: int = 1,
+                  initial: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Angle of a line in degrees over `lookback` bars: atan2(y[i] - y[i-lookback], lookback).
+    The first `lookback` values are 0 unless the preceding values are given.
+
+    Args:
+        values: 1-D array (usually an EMA), or 2-D (bars x series)
+        lookback: Number of bars between the compared points
+        initial: The `lookback` values preceding values[0], if continuing a series
+    """
+    values = np.asarray(values, dtype='float64')
+    if initial is not None:
+        history = np.asarray(initial, dtype='float64')[-lookback:]
+        full = np.concatenate((history, values))
+        return slope_degrees(full, lookback)[len(history):]
+
+    slopes = np.zeros(values.shape)
+    if len(values) > lookback:
+        y_diff = values[lookback:] - values[:-lookback]
+        slopes[lookback:] = np.degrees(_atan2(y_diff, lookback).astype('float64'))
+    return slopes
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """
+    max(high - low, |high - prev close|, |low - prev close|);
+    the first bar has no previous close and uses high - low.
+    """
+    high = np.asarray(high, dtype='float64')
+    low = np.asarray(low, dtype='float64')
+    close = np.asarray(close, dtype='float64')
+
+    tr = high - low
+    if len(tr) > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.fmax(tr[1:], np.fmax(np.abs(high[1:] - prev_close),
+                                         np.abs(low[1:] - prev_close)))
+    return tr
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range: simple rolling mean of true_range (NaN until `period` bars)"""
+    tr = true_range(high, low, close)
+    return _frame(tr).rolling(window=period).mean().to_numpy()
+
+
+def adx(high, low, close, period: int = 14,
+        wilder: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Average Directional Index with +DI/-DI.
+
+    Directional movement is smoothed with an EMA of span `period` (as in
+    trend_analysis_methods.py) and divided by the rolling-mean ATR. With
+    `wilder=True` DM, TR and DX use Wilder's smoothing (alpha = 1/period)
+    instead, which is the textbook definition.
+
+    Returns:
+        (adx, plus_di, minus_di)
+    """
+    high = np.asarray(high, dtype='float64')
+    low = np.asarray(low, dtype='float64')
+
+    up = _shifted_diff(high, 1)
+    down = -_shifted_diff(low, 1)
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+
+    smooth = {'alpha': 1.0 / period} if wilder else {'span': period}
+    if wilder:
+        range_avg = _frame(true_range(high, low, close)).ewm(adjust=False, **smooth).mean().to_numpy()
+    else:
+        range_avg = atr(high, low, close, period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * _frame(plus_dm).ewm(adjust=False, **smooth).mean().to_numpy() / range_avg
+        minus_di = 100 * _frame(minus_dm).ewm(adjust=False, **smooth).mean().to_numpy() / range_avg
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+    adx_values = _frame(dx).ewm(adjust=False, **smooth).mean().to_numpy()
+    return adx_values, plus_di, minus_di
+
+
+def swing_flags(high, low, lookback: int = 5) -> Dict[str, np.ndarray]:
+    """
+    Higher-high / higher-low / lower-high / lower-low versus the bar
+    `lookback` bars earlier (False where there is no earlier bar).
+
+    Returns:
+        {'hh', 'hl', 'lh', 'll'} boolean arrays
+    """
+    high_diff = _shifted_diff(np.asarray(high, dtype='float64'), lookback)
+    low_diff = _shifted_diff(np.asarray(low, dtype='float64'), lookback)
+    return {
+        'hh': high_diff > 0,
+        'hl': low_diff > 0,
+        'lh': high_diff < 0,
+        'll': low_diff < 0,
+    }
+
+
+# =============================================================================
+# TREND RULE (rules.md)
+# =============================================================================
+
+FAST_PERIOD = 11
+SLOW_PERIOD = 21
+SLOPE_THRESHOLD = 10.0
+
+
+def trend_columns(close, state: Optional[Dict] = None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    uptrend/downtrend flags per rules.md:
+        uptrend   = EMA11 > EMA21 and slope(EMA21) > 10 deg
+        downtrend = EMA11 < EMA21 and slope(EMA21) < -10 deg
+
+    Args:
+        close: Closing prices of the bars to label
+        state: {'ema11', 'ema21'} after the bar preceding close[0]
+
+    Returns:
+        (DataFrame with ema11/ema21/ema21_slope/uptrend/downtrend, new state)
+    """
+    state = state or {}
+    ema_fast = ema(close, FAST_PERIOD, state.get('ema11'))
+    ema_slow = ema(close, SLOW_PERIOD, state.get('ema21'))
+
+    prev_slow = state.get('ema21')
+    slope = slope_degrees(ema_slow, 1, None if prev_slow is None else [prev_slow])
+
+    out = pd.DataFrame({
+        'ema11': ema_fast,
+        'ema21': ema_slow,
+        'ema21_slope': slope,
+    })
+    out['uptrend'] = (out['ema11'] > out['ema21']) & (out['ema21_slope'] > SLOPE_THRESHOLD)
+    out['downtrend'] = (out['ema11'] < out['ema21']) & (out['ema21_slope'] < -SLOPE_THRESHOLD)
+
+    new_state = dict(state)
+    if len(out):
+        new_state = {'ema11': float(ema_fast[-1]), 'ema21': float(ema_slow[-1])}
+    return out, new_state
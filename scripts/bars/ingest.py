@@ -0,0 +1,114 @@
+"""
+Incremental Ingestion
+=====================
+Appends new bars to a timeframe's store as a new Parquet part instead of
+rewriting history, recomputes derived columns only for the appended tail
+using the indicator state carried in the manifest, and records the new
+part's row count and checksum so downstream caches (session cube,
+resampled series) know exactly what changed.
+
+CLI:
+    python -m bars ingest 120min path/to/new_bars.csv
+    python -m bars refresh-trend                     # full recompute of uptrend/downtrend
+"""
+
+from typing import Dict
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from . import store
+from .indicators import trend_columns
+
+
+# Timeframes whose store carries the rules.md uptrend/downtrend columns
+TREND_TIMEFRAMES = ['120min']
+
+
+def _trend_state(timeframe: str, manifest: Dict) -> Dict:
+    """EMA state after the last stored bar (bootstrapped once from history)"""
+    if manifest.get('state'):
+        return manifest['state']
+
+    print(f"Bootstrapping {timeframe} indicator state from stored history...")
+    history = store.load_bars(timeframe, columns=['close'])
+    _, state = trend_columns(history['close'].to_numpy())
+    return state
+
+
+def _match_schema(new: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Order columns like the existing parts; refuse incompatible files"""
+    existing = pq.read_schema(store.list_parts(timeframe)[0]).names
+    missing = [c for c in existing if c not in new.columns]
+    extra = [c for c in new.columns if c not in existing]
+    if missing or extra:
+        raise ValueError(f"Columns do not match the {timeframe} store "
+                         f"(missing: {missing}, unexpected: {extra})")
+    return new[existing]
+
+
+def ingest_csv(timeframe: str, path) -> Dict:
+    """
+    Append bars from `path` that are newer than the last stored bar.
+
+    Returns:
+        The updated manifest
+    """
+    if not store.has_store(timeframe):
+        store.convert_csv(timeframe)
+    manifest = store.read_manifest(timeframe)
+
+    new = store.read_source_csv(path)
+    new = new.drop_duplicates('ts', keep='last')
+    if manifest['last_ts'] is not None:
+        new = new[new['ts'] > manifest['last_ts']]
+    new = new.reset_index(drop=True)
+
+    if new.empty:
+        print(f"No bars newer than the {timeframe} store in {path}")
+        return manifest
+
+    state = manifest.get('state', {})
+    if timeframe in TREND_TIMEFRAMES:
+        state = _trend_state(timeframe, manifest)
+        cols, state = trend_columns(new['close'].to_numpy(), state)
+        new['uptrend'] = cols['uptrend'].to_numpy()
+        new['downtrend'] = cols['downtrend'].to_numpy()
+
+    new = _match_schema(new, timeframe)
+
+    part_path = store.write_part(new, timeframe, store.next_part(timeframe))
+    parts = manifest['parts'] + [store.part_record(part_path, new)]
+    manifest = store.write_manifest(timeframe, parts, state)
+
+    first = pd.Timestamp(int(new['ts'].iloc[0]))
+    last = pd.Timestamp(int(new['ts'].iloc[-1]))
+    sessions = pd.Series(pd.to_datetime(new['ts']).dt.date).nunique()
+    print(f"Appended {len(new)} {timeframe} bars ({sessions} sessions, {first} -> {last}) "
+          f"as {part_path.name}; store now {manifest['rows']} rows")
+    return manifest
+
+
+def refresh_trend_columns(timeframe: str = '120min') -> Dict:
+    """
+    Recompute uptrend/downtrend over the whole history and compact the store
+    into a single part. Only needed if the trend rule itself changes.
+    """
+    if not store.has_store(timeframe):
+        store.convert_csv(timeframe)
+
+    table = store.load_table(timeframe)
+    df = table.to_pandas()
+    cols, state = trend_columns(df['close'].to_numpy())
+    df['uptrend'] = cols['uptrend'].to_numpy()
+    df['downtrend'] = cols['downtrend'].to_numpy()
+
+    # New part first, then the manifest pointing at it; the old parts are
+    # deleted only once no manifest references them
+    old_parts = store.list_parts(timeframe)
+    part_path = store.write_part(df, timeframe, store.next_part(timeframe))
+    manifest = store.write_manifest(timeframe, [store.part_record(part_path, df)], state)
+    for part in old_parts:
+        part.unlink(missing_ok=True)
+    print(f"Recomputed trend columns for {manifest['rows']} {timeframe} bars")
+    return manifest
@@ -0,0 +1,386 @@
+"""
+Live High/Low-Set Probabilities
+===============================
+asyncio pipeline from a stream of 5-min bars to, after every bar, the
+historical probability that the day's high / low / either has already been
+seen by that bar, for the day's (trend, gap bucket, first-bar type) cell.
+
+    table = live_probability_table(load_session_cube('5min'), offsets=(0, 10))
+    engine = LiveHighLowEngine(table, trend=StreamingTrend.from_store('120min'))
+    updates = engine.subscribe()
+    await engine.run(csv_feed('today.csv'))        # or socket_feed(host, port)
+
+Day state is kept with the streaming objects: DayRange for the running
+open/high/low, StreamingTrend fed the close of every completed 2-hour bucket
+(09:15, 11:15, 13:15, 15:15) of the stream. A session's trend is EMA11 vs
+EMA21 at the previous session's last bucket, the daily_trend
+`prev_close_ema` convention the table is built with; the gap is the first
+bar's open against the previous session's last close and the first-bar
+type is highlow.first_bar_type of bar 1. On the first streamed session,
+with no earlier state, the cell is summed over the trend (and over the gap
+without a `prev_close`).
+
+Every cell's (fields x offsets x bars) probabilities are computed when the
+table is built, so a bar costs a few scalar updates and one table read. A
+feed is any async iterable of bars (date/open/high/low/close); the engine
+reads it through a bounded queue, stamps each bar when it is received and
+records receipt-to-publish latency (a bar that arrives inside a list is
+stamped when the engine reaches it, and the list's receipt-to-last-publish
+time is recorded separately). Subscribers get their own bounded
+queues; a subscriber that falls behind loses its oldest updates instead of
+holding up the engine. Each queue gets None when the feed ends.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cube import NS_PER_DAY, NS_PER_MINUTE, SESSION_END_MINUTE, SESSION_START_MINUTE, SessionCube
+from .daily_trend import load_daily_trends
+from .highlow import (FIRST_BAR_TYPES, GAP_BUCKETS, SET_FIELDS, conditional_curves, first_bar_type,
+                      first_bar_type_codes, gap_bucket, gap_bucket_codes)
+from .streaming import DayRange, StreamingTrend
+
+
+BAR_MINUTES = 5
+TREND_BUCKET_MINUTES = 120
+TREND_LABELS = ['BULL', 'BEAR']
+DEFAULT_OFFSETS = (0, 10)
+
+BAR_QUEUE_SIZE = 1024
+SUBSCRIBER_QUEUE_SIZE = 1024
+LATENCY_WINDOW = 100_000
+DEFAULT_BUDGET_US = 1000.0
+
+
+# =============================================================================
+# PROBABILITY TABLE
+# =============================================================================
+
+@dataclass
+class LiveProbabilityTable:
+    """
+    Set probabilities per (trend, gap bucket, first-bar type) cell; None in a
+    key means "any" (the cell summed over that dimension).
+    """
+    offsets: Tuple[int, ...]
+    cells: Dict[Tuple, np.ndarray]   # key -> float64 (SET_FIELDS x offsets x bars), NaN = no days
+    days: Dict[Tuple, int]           # key -> number of days
+    n_bars: int
+
+    def lookup(self, trend: Optional[str], gap: Optional[str],
+               first_bar: Optional[str]) -> Tuple[np.ndarray, int]:
+        key = (trend, gap, first_bar)
+        return self.cells[key], self.days[key]
+
+
+def live_probability_table(cube: SessionCube, offsets: Sequence[int] = DEFAULT_OFFSETS,
+                           trends: Optional[pd.DataFrame] = None) -> LiveProbabilityTable:
+    """
+    Table over every day of a 5-min session cube, bar index = session slot.
+
+    Args:
+        cube: 5-min session cube
+        offsets: Offsets (points) to publish probabilities for
+        trends: load_daily_trends() table (loaded if not given)
+    """
+    offsets = tuple(int(o) for o in offsets)
+    if not offsets or min(offsets) < 0:
+        raise ValueError(f"Offsets must be non-negative integers, got {offsets}")
+    trends = load_daily_trends() if trends is None else trends
+
+    dates = pd.to_datetime(cube.dates)
+    label = dates.map(pd.Series(trends['prev_close_ema'].astype(object).to_numpy(), index=trends['date']))
+    day_close = cube.day_close()
+    prev_close = np.r_[np.nan, day_close[:-1]]
+    first = cube.values[:, 0, :]
+    categories = {
+        'trend': pd.Categorical(label.fillna('unknown'), categories=TREND_LABELS + ['unknown']),
+        'gap': gap_bucket(first[:, 0] - prev_close),
+        'first_bar': first_bar_type(first[:, 0], first[:, 1], first[:, 2], first[:, 3]),
+    }
+    cube_curves = conditional_curves(cube.high, cube.low, cube.mask, categories, max(offsets))
+
+    cells, days = {}, {}
+    for trend in TREND_LABELS + [None]:
+        for gap in GAP_BUCKETS[:-1] + [None]:
+            for bar in FIRST_BAR_TYPES + [None]:
+                selection = {dim: value for dim, value in
+                             (('trend', trend), ('gap', gap), ('first_bar', bar)) if value is not None}
+                curves = cube_curves.select(**selection)
+                cells[(trend, gap, bar)] = np.stack([curves.probability(field)[list(offsets)]
+                                                     for field in SET_FIELDS])
+                days[(trend, gap, bar)] = cube_curves.day_count(**selection)
+    return LiveProbabilityTable(offsets, cells, days, cube.n_bars)
+
+
+# =============================================================================
+# LATENCY
+# =============================================================================
+
+class LatencyStats:
+    """Latencies (ns) of the last `window` events, in a ring buffer"""
+
+    def __init__(self, window: int = LATENCY_WINDOW, budget_us: Optional[float] = None):
+        self.samples = np.zeros(window, dtype='int64')
+        self.count = 0
+        self.over_budget = 0
+        self.budget_ns = None if budget_us is None else int(budget_us * 1000)
+        self.lock = threading.Lock()
+
+    def record(self, ns: int):
+        with self.lock:
+            self.samples[self.count % len(self.samples)] = ns
+            self.count += 1
+            if self.budget_ns is not None and ns > self.budget_ns:
+                self.over_budget += 1
+
+    def snapshot(self) -> Dict:
+        """count, mean/p50/p99/max in microseconds (and over_budget with a budget)"""
+        with self.lock:
+            kept = self.samples[:min(self.count, len(self.samples))].copy()
+            count, over = self.count, self.over_budget
+        out = {'count': count}
+        if len(kept):
+            us = kept / 1000
+            p50, p99 = np.percentile(us, [50, 99])
+            out.update(window=len(kept), mean_us=round(float(us.mean()), 2),
+                       p50_us=round(float(p50), 2), p99_us=round(float(p99), 2),
+                       max_us=round(float(us.max()), 2))
+        if self.budget_ns is not None:
+            out['over_budget'] = over
+        return out
+
+
+# =============================================================================
+# FEEDS
+# =============================================================================
+
+async def frame_feed(df: pd.DataFrame, interval: float = 0.0) -> AsyncIterator[Dict]:
+    """Replay a bar frame (date/open/high/low/close), `interval` seconds apart"""
+    columns = ['date', 'open', 'high', 'low', 'close']
+    for row in df[columns].itertuples(index=False):
+        yield dict(zip(columns, row))
+        await asyncio.sleep(interval)
+
+
+async def csv_feed(path, interval: float = 0.0) -> AsyncIterator[Dict]:
+    """Replay a CSV of bars (a `date` or `datetime` column plus OHLC)"""
+    df = pd.read_csv(path)
+    if 'date' not in df.columns:
+        df = df.rename(columns={'datetime': 'date'})
+    df['date'] = pd.to_datetime(df['date'])
+    async for bar in frame_feed(df, interval):
+        yield bar
+
+
+async def socket_feed(host: str, port: int) -> AsyncIterator[Dict]:
+    """Bars as JSON lines from a TCP connection, until it closes"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while line := await reader.readline():
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        writer.close()
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+class BarUpdate:
+    """What the engine publishes after one bar"""
+    __slots__ = ('date', 'bar_index', 'open', 'high', 'low', 'close', 'day_open', 'high_so_far',
+                 'low_so_far', 'trend', 'gap', 'gap_bucket', 'first_bar', 'days', 'offsets',
+                 'prob_high_set', 'prob_low_set', 'prob_either_set', 'latency_us')
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _nan_to_none(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _published_rows(probs: np.ndarray) -> List[Tuple[Tuple[Optional[float], ...], ...]]:
+    """A cell's (SET_FIELDS x offsets x bars) array as per-bar (high, low, either)
+    tuples, shared by every update of the cell"""
+    return [tuple(tuple(_nan_to_none(probs[f, :, i])) for f in range(len(SET_FIELDS)))
+            for i in range(probs.shape[2])]
+
+
+class LiveHighLowEngine:
+    """
+    Bar-by-bar day range, trend context and first-bar classification with
+    the table's set probabilities for the current bar index.
+    """
+
+    def __init__(self, table: LiveProbabilityTable, trend: Optional[StreamingTrend] = None,
+                 prev_close: Optional[float] = None, budget_us: float = DEFAULT_BUDGET_US):
+        """
+        Args:
+            table: live_probability_table()
+            trend: 2-hour trend state before the first streamed bar (e.g.
+                StreamingTrend.from_store('120min')); fresh if not given
+            prev_close: Last close before the first streamed bar
+            budget_us: Per-bar latency budget counted in the stats
+        """
+        self.table = table
+        self.trend = trend or StreamingTrend()
+        self.day = DayRange()
+        self.day_ns = None
+        self.prev_close = prev_close
+        self.last_close = prev_close
+        self.bucket = None            # current 2-hour bucket of the day
+        self.session_trend = None
+        self.gap = None
+        self.gap_bucket = None
+        self.first_bar = None
+        self.cell = None
+        self.rows = {}                # cell key -> _published_rows, built on first use
+        self.latency = LatencyStats(budget_us=budget_us)
+        self.batch_latency = LatencyStats()
+        self.subscribers: List[asyncio.Queue] = []
+        self.dropped = 0
+        self.skipped = 0
+
+    # -------------------------------------------------------------------------
+    # PER BAR
+    # -------------------------------------------------------------------------
+
+    def _close_bucket(self):
+        if self.bucket is not None:
+            self.trend.update(self.last_close)
+            self.bucket = None
+
+    def _new_session(self):
+        self._close_bucket()
+        self.prev_close = self.last_close
+        fast, slow = self.trend.fast.value, self.trend.slow.value
+        self.session_trend = None if fast is None or slow is None else TREND_LABELS[0 if fast > slow else 1]
+        self.gap = self.gap_bucket = self.first_bar = None
+
+    def on_bar(self, bar: Dict, received_ns: Optional[int] = None) -> Optional[BarUpdate]:
+        """
+        Feed one bar (date/open/high/low/close, optionally `ts` in epoch ns
+        instead of parsing `date`); returns the update, or None for a bar
+        outside the session.
+        """
+        received_ns = time.perf_counter_ns() if received_ns is None else received_ns
+        ts = bar['ts'] if 'ts' in bar else pd.Timestamp(bar['date']).value
+        minute = (ts % NS_PER_DAY) // NS_PER_MINUTE
+        if not SESSION_START_MINUTE <= minute < SESSION_END_MINUTE:
+            self.skipped += 1
+            return None
+        slot = (minute - SESSION_START_MINUTE) // BAR_MINUTES
+        bucket = (minute - SESSION_START_MINUTE) // TREND_BUCKET_MINUTES
+
+        day_ns = ts - ts % NS_PER_DAY
+        if day_ns != self.day_ns:
+            self.day_ns = day_ns
+            self._new_session()
+        elif bucket != self.bucket:
+            self._close_bucket()
+        self.bucket = bucket
+        open_, high, low, close = float(bar['open']), float(bar['high']), float(bar['low']), float(bar['close'])
+        high_so_far, low_so_far = self.day.update_day(day_ns, open_, high, low)
+        self.last_close = close
+
+        if self.day.bars == 1:
+            if self.prev_close is not None:
+                self.gap = open_ - self.prev_close
+                self.gap_bucket = GAP_BUCKETS[int(gap_bucket_codes(self.gap))]
+            self.first_bar = FIRST_BAR_TYPES[int(first_bar_type_codes(open_, high, low, close))]
+            key = (self.session_trend, self.gap_bucket, self.first_bar)
+            if key not in self.rows:
+                self.rows[key] = _published_rows(self.table.lookup(*key)[0])
+            self.cell = (self.rows[key], self.table.days[key])
+
+        rows, days = self.cell
+        at = min(slot, self.table.n_bars - 1)
+        update = BarUpdate()
+        update.date = pd.Timestamp(ts)
+        update.bar_index = slot
+        update.open, update.high, update.low, update.close = open_, high, low, close
+        update.day_open, update.high_so_far, update.low_so_far = self.day.open, high_so_far, low_so_far
+        update.trend, update.gap, update.gap_bucket = self.session_trend, self.gap, self.gap_bucket
+        update.first_bar, update.days, update.offsets = self.first_bar, days, self.table.offsets
+        update.prob_high_set, update.prob_low_set, update.prob_either_set = rows[at]
+        latency = time.perf_counter_ns() - received_ns
+        update.latency_us = latency / 1000
+        self.latency.record(latency)
+        return update
+
+    # -------------------------------------------------------------------------
+    # ASYNC PIPELINE
+    # -------------------------------------------------------------------------
+
+    def subscribe(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> asyncio.Queue:
+        """Queue receiving every BarUpdate (None once the feed has ended)"""
+        queue = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        return queue
+
+    def _publish(self, update: Optional[BarUpdate]):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(update)
+
+    async def run(self, feed: AsyncIterator[Dict], queue_size: int = BAR_QUEUE_SIZE):
+        """
+        Consume `feed` until it ends, publishing an update per session bar.
+        Items are bars or lists of bars (e.g. bars.replay.replay_sessions).
+        Bars of a list are stamped as on_bar starts on them, so their
+        latency is the engine's own work; the list's receipt-to-last-publish
+        time goes to `batch_latency`.
+        """
+        bars = asyncio.Queue(queue_size)
+
+        async def receive():
+            try:
+                async for bar in feed:
+                    await bars.put((time.perf_counter_ns(), bar))
+            finally:
+                # Never blocks: with a full queue the loop below stops once it
+                # has drained the queue and sees the receiver done
+                if not bars.full():
+                    bars.put_nowait(None)
+
+        receiver = asyncio.create_task(receive())
+        try:
+            while not (bars.empty() and receiver.done()):
+                if (item := await bars.get()) is None:
+                    break
+                received, batch = item
+                if not isinstance(batch, list):
+                    if (update := self.on_bar(batch, received)) is not None:
+                        self._publish(update)
+                    continue
+                for bar in batch:
+                    if (update := self.on_bar(bar)) is not None:
+                        self._publish(update)
+                self.batch_latency.record(time.perf_counter_ns() - received)
+        finally:
+            # Nothing reads the queue any more, so a receiver blocked on a full
+            # one must be cancelled rather than awaited
+            receiver.cancel()
+            self._publish(None)
+            await asyncio.wait([receiver])
+            if not receiver.cancelled():
+                receiver.result()   # feed errors
+
+    def stats(self) -> Dict:
+        """Per-bar latency, drops and skips (and `batch` latency when lists were fed)"""
+        out = dict(self.latency.snapshot(), dropped=self.dropped, skipped=self.skipped)
+        if self.batch_latency.count:
+            out['batch'] = self.batch_latency.snapshot()
+        return out
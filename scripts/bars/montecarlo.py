@@ -0,0 +1,180 @@
+"""
+Monte Carlo Equity Paths
+========================
+Drawdown and ruin risk of position-sizing policies, from a (days x
+policies) matrix of historical daily returns (% of capital, 0 on days
+without a trade). Each path is a block bootstrap over days: blocks of
+`block` consecutive days are drawn at random and strung together to
+`horizon` days, which keeps the clustering of losing days that a
+per-trade shuffle would break up. Every policy is run on the same drawn
+days, so policies are compared on identical sequences.
+
+Returns compound (equity *= 1 + r / 100), so a path is the cumulative sum
+of log growth over its drawn days. Every possible block is summarised once
+(total, high, low and inner drawdown of its log growth), so a path costs
+one step per block rather than per day; paths are generated in chunks of
+(paths x blocks x policies) arrays and only the per-path results are kept.
+
+    result = simulate_paths(returns, n_paths=100_000, horizon=250, block=5)
+    table = result.summary()       # ruin_prob, max_drawdown_p*, return_p* per policy
+
+A path is ruined once its equity falls to `ruin_level` of the starting
+capital (default 0.5, i.e. half the account lost) at any point.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_N_PATHS = 100_000
+DEFAULT_BLOCK = 5
+DEFAULT_RUIN_LEVEL = 0.5
+DRAWDOWN_QUANTILES = (0.50, 0.90, 0.95, 0.99)
+RETURN_QUANTILES = (0.05, 0.50, 0.95)
+
+# Elements of one (paths x blocks x policies) chunk
+CHUNK_CELLS = 1 << 22
+
+
+# =============================================================================
+# RESULT CONTAINER
+# =============================================================================
+
+@dataclass
+class MonteCarloResult:
+    """Per-path outcomes, (paths x policies)"""
+    policies: List[str]
+    max_drawdown: np.ndarray    # float64, largest peak-to-trough fall, % of the peak
+    final_equity: np.ndarray    # float64, ending equity / starting capital
+    ruined: np.ndarray          # bool, equity reached ruin_level
+    horizon: int
+    block: int
+    ruin_level: float
+
+    @property
+    def n_paths(self) -> int:
+        return self.max_drawdown.shape[0]
+
+    def summary(self, drawdown_quantiles: Sequence[float] = DRAWDOWN_QUANTILES,
+                return_quantiles: Sequence[float] = RETURN_QUANTILES) -> pd.DataFrame:
+        """
+        One row per policy: ruin probability, max drawdown quantiles (%),
+        ending return quantiles (%) and the share of paths ending below the
+        starting capital.
+        """
+        table = pd.DataFrame({'policy': self.policies,
+                              'ruin_prob': self.ruined.mean(axis=0)})
+        for q in drawdown_quantiles:
+            table[f"max_drawdown_p{q * 100:g}"] = np.quantile(self.max_drawdown, q, axis=0)
+        final_return = (self.final_equity - 1) * 100
+        for q in return_quantiles:
+            table[f"return_p{q * 100:g}"] = np.quantile(final_return, q, axis=0)
+        table['prob_loss'] = (self.final_equity < 1).mean(axis=0)
+        return table
+
+
+# =============================================================================
+# SIMULATION
+# =============================================================================
+
+def block_starts(n_days: int, n_paths: int, horizon: int, block: int,
+                 rng: np.random.Generator) -> np.ndarray:
+    """
+    (n_paths x ceil(horizon / block)) first days of the blocks of each path
+    (moving-block bootstrap: starts drawn uniformly from every full block).
+    """
+    n_blocks = -(-horizon // block)
+    return rng.integers(0, n_days - block + 1, size=(n_paths, n_blocks))
+
+
+def block_bootstrap(n_days: int, n_paths: int, horizon: int, block: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """(n_paths x horizon) day indices of block_starts paths"""
+    block = max(1, min(block, n_days))
+    starts = block_starts(n_days, n_paths, horizon, block, rng)
+    days = starts[:, :, None] + np.arange(block)
+    return days.reshape(n_paths, -1)[:, :horizon]
+
+
+def _block_stats(growth: np.ndarray, length: int) -> Tuple[np.ndarray, ...]:
+    """
+    For a block of `length` days from every start: total log growth, highest
+    and lowest level after each day, and the largest fall from a running
+    peak (the block's opening level counts as a peak), each (starts x policies)
+    relative to the level the block opens at.
+    """
+    n_starts = len(growth) - length + 1
+    level = np.cumsum(growth[np.arange(n_starts)[:, None] + np.arange(length)], axis=1)
+    peak = np.maximum(np.maximum.accumulate(level, axis=1), 0.0)
+    return level[:, -1], level.max(axis=1), level.min(axis=1), (peak - level).max(axis=1)
+
+
+def simulate_paths(returns, n_paths: int = DEFAULT_N_PATHS, horizon: Optional[int] = None,
+                   block: int = DEFAULT_BLOCK, ruin_level: float = DEFAULT_RUIN_LEVEL,
+                   seed: int = 0) -> MonteCarloResult:
+    """
+    Bootstrap equity paths of every policy at once.
+
+    Args:
+        returns: (days x policies) daily return, % of capital (DataFrame
+            columns name the policies; a 1-D array is one policy)
+        n_paths: Number of paths
+        horizon: Days per path (default: the length of the history)
+        block: Days per bootstrap block
+        ruin_level: Equity (fraction of the start) at which a path is ruined
+        seed: Seed of the day draws
+
+    Returns:
+        MonteCarloResult
+    """
+    if isinstance(returns, pd.DataFrame):
+        policies = [str(c) for c in returns.columns]
+        returns = returns.to_numpy(dtype='float64')
+    else:
+        returns = np.asarray(returns, dtype='float64')
+        if returns.ndim == 1:
+            returns = returns[:, None]
+        policies = [str(i) for i in range(returns.shape[1])]
+    if not 0 < ruin_level < 1:
+        raise ValueError(f"ruin_level must be between 0 and 1, got {ruin_level}")
+    n_days, n_policies = returns.shape
+    horizon = n_days if horizon is None else int(horizon)
+    block = max(1, min(int(block), n_days))
+
+    # A day losing the whole account is -inf growth: ruined, drawdown 100%
+    with np.errstate(divide='ignore'):
+        growth = np.log(np.maximum(1 + returns / 100, 0.0))
+
+    # A path only ever uses whole blocks (the last one cut to the horizon), so
+    # each block is reduced to four numbers per start up front and a path is
+    # scanned block by block instead of day by day
+    stats = np.stack(_block_stats(growth, block))               # (4 x starts x policies)
+    last = horizon - block * (-(-horizon // block) - 1)
+    last_stats = np.stack(_block_stats(growth, last)) if last < block else stats
+
+    rng = np.random.default_rng(seed)
+    max_drawdown = np.empty((n_paths, n_policies))
+    final_equity = np.empty((n_paths, n_policies))
+    ruined = np.empty((n_paths, n_policies), dtype=bool)
+    n_blocks = -(-horizon // block)
+    chunk = max(1, CHUNK_CELLS // (n_blocks * n_policies))
+    for lo in range(0, n_paths, chunk):
+        hi = min(lo + chunk, n_paths)
+        starts = block_starts(n_days, hi - lo, horizon, block, rng)
+        total, high, low, fall = stats[:, starts]               # (paths x blocks x policies)
+        total[:, -1], high[:, -1], low[:, -1], fall[:, -1] = last_stats[:, starts[:, -1]]
+        end = np.cumsum(total, axis=1)
+        opening = np.concatenate([np.zeros_like(end[:, :1]), end[:, :-1]], axis=1)
+        # Highest level before each block (at least the starting capital)
+        peak = np.maximum.accumulate(opening + high, axis=1)
+        peak = np.maximum(np.concatenate([np.zeros_like(peak[:, :1]), peak[:, :-1]], axis=1), 0.0)
+        trough = opening + low
+        drawdown = np.maximum(fall, peak - trough).max(axis=1)
+        max_drawdown[lo:hi] = -np.expm1(-drawdown) * 100
+        final_equity[lo:hi] = np.exp(end[:, -1])
+        ruined[lo:hi] = trough.min(axis=1) <= np.log(ruin_level)
+    return MonteCarloResult(policies, max_drawdown, final_equity, ruined,
+                            horizon, block, ruin_level)
@@ -0,0 +1,163 @@
+"""
+Parameter Search Helpers
+========================
+Grid / random parameter sets, anchored walk-forward splits, per-window
+equity metrics and the expectancy-vs-drawdown Pareto front, for optimizers
+that score each parameter set on a (days x series) matrix of daily P&L.
+
+    sets = random_parameters(space, 2000, seed=1)
+    splits = walk_forward_splits(n_days, 4)
+    metrics = window_metrics(pnl, traded, {'full': slice(None)})
+    front = pareto_front(table, maximize='expectancy', minimize='max_drawdown')
+
+Evaluation of many sets is split across processes with `map_parallel`,
+which hands each worker a round-robin chunk (as bars.sweep does).
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+METRIC_FIELDS = ['trades', 'expectancy', 'total', 'max_drawdown', 'win_rate']
+
+
+# =============================================================================
+# PARAMETER SETS
+# =============================================================================
+
+def parameter_grid(space: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of the values in `space` ({name: values})"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def grid_size(space: Dict[str, Sequence]) -> int:
+    return int(np.prod([len(values) for values in space.values()]))
+
+
+def random_parameters(space: Dict[str, Sequence], n: int, seed: int = 0) -> List[Dict]:
+    """
+    Up to `n` distinct sets drawn uniformly from the grid of `space`
+    (the whole grid, in order, if it has no more than `n` sets).
+    """
+    total = grid_size(space)
+    if total <= n:
+        return parameter_grid(space)
+    rng = np.random.default_rng(seed)
+    sizes = [len(values) for values in space.values()]
+    picks = rng.choice(total, size=n, replace=False)
+    names = list(space)
+    out = []
+    for flat in picks:
+        cell = np.unravel_index(flat, sizes)
+        out.append({name: space[name][i] for name, i in zip(names, cell)})
+    return out
+
+
+# =============================================================================
+# WALK-FORWARD
+# =============================================================================
+
+def walk_forward_splits(n_days: int, n_splits: int) -> List[Tuple[slice, slice]]:
+    """
+    Anchored walk-forward: the days are cut into n_splits + 1 consecutive
+    blocks; split k trains on blocks 0..k and tests on block k + 1.
+    """
+    edges = np.linspace(0, n_days, n_splits + 2).round().astype(int)
+    return [(slice(0, edges[k + 1]), slice(edges[k + 1], edges[k + 2])) for k in range(n_splits)]
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def window_metrics(pnl: np.ndarray, traded: np.ndarray,
+                   windows: Dict[str, slice]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Equity metrics of each P&L series over each window of days.
+
+    Args:
+        pnl: (days x series) P&L per day (0 on days without a trade)
+        traded: (days x series) number of trades per day
+        windows: {name: slice of days}
+
+    Returns:
+        {window: {metric: (series,) array}} for METRIC_FIELDS: trade count,
+        expectancy (P&L per trade), total P&L, max drawdown of the
+        cumulative P&L (from 0) and share of traded days with P&L > 0
+    """
+    pnl = np.asarray(pnl, dtype='float64')
+    traded = np.asarray(traded)
+    out = {}
+    for name, days in windows.items():
+        p, t = pnl[days], traded[days]
+        trades = t.sum(axis=0)
+        total = p.sum(axis=0)
+        equity = np.vstack([np.zeros(p.shape[1]), np.cumsum(p, axis=0)])
+        drawdown = (np.maximum.accumulate(equity, axis=0) - equity).max(axis=0)
+        active = (t > 0).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[name] = {
+                'trades': trades,
+                'expectancy': np.where(trades > 0, total / trades, np.nan),
+                'total': total,
+                'max_drawdown': drawdown,
+                'win_rate': np.where(active > 0, ((p > 0) & (t > 0)).sum(axis=0) / active, np.nan),
+            }
+    return out
+
+
+def pareto_front(table: pd.DataFrame, maximize: str, minimize: str) -> np.ndarray:
+    """
+    Boolean mask of the rows no other row beats on both columns (higher
+    `maximize`, lower `minimize`); rows with NaN are never on the front.
+    """
+    gain = table[maximize].to_numpy(dtype='float64')
+    cost = table[minimize].to_numpy(dtype='float64')
+    valid = ~(np.isnan(gain) | np.isnan(cost))
+    front = np.zeros(len(table), dtype=bool)
+    # Best gain first (ties: lowest cost first); a row is on the front if its
+    # cost is below every cost seen so far
+    order = np.flatnonzero(valid)[np.lexsort((cost[valid], -gain[valid]))]
+    best_cost = np.inf
+    for i in order:
+        if cost[i] < best_cost:
+            front[i] = True
+            best_cost = cost[i]
+    return front
+
+
+# =============================================================================
+# PARALLEL EVALUATION
+# =============================================================================
+
+def map_parallel(func: Callable[[List], List], items: Sequence,
+                 workers: Optional[int] = None,
+                 initializer: Optional[Callable] = None, initargs: Tuple = (),
+                 min_items: int = 2) -> List:
+    """
+    func(chunk) -> list of results, over round-robin chunks of `items` in a
+    process pool; results come back in `items` order. `initializer` runs
+    once per worker (and in-process when there are too few items or
+    workers == 1).
+    """
+    items = list(items)
+    workers = min(workers or os.cpu_count() or 1, len(items))
+    if workers <= 1 or len(items) < min_items:
+        if initializer is not None:
+            initializer(*initargs)
+        return func(items)
+
+    chunks = [items[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                             initargs=initargs) as pool:
+        parts = list(pool.map(func, chunks))
+    results = [None] * len(items)
+    for i, part in enumerate(parts):
+        results[i::workers] = part
+    return results
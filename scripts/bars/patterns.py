@@ -0,0 +1,156 @@
+"""
+Bar Color Patterns
+==================
+The colors of a window of session bars (from slot `start`, `length` bars)
+as one integer per day, so every pattern of every day is known at once and
+outcome tables over all patterns are a single grouped aggregation:
+
+    cube = load_session_cube('30min')
+    codes = color_codes(cube, start=0, length=3)                  # base 3, -1 if a bar is missing
+    table = pattern_outcomes(codes, 3, day_outcomes(cube, 0, 3),
+                             by={'trend': trend_labels})          # every trend x pattern
+    table.loc[('BULL', 'Bull-Bear-Bull')]
+
+Base 3 digits are bear 0, flat 1, bull 2; base 2 digits are bull 1 and
+"not bull" 0 (a flat bar counts as bear, as in the opening-pattern scripts).
+The first bar of the window is the most significant digit, so codes sort
+like the pattern labels read.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .cube import CLOSE, OPEN, SessionCube
+
+
+COLOR_NAMES = {3: ['Bear', 'Flat', 'Bull'], 2: ['Bear', 'Bull']}
+
+
+def _check_base(base: int):
+    if base not in COLOR_NAMES:
+        raise ValueError(f"Unknown base {base}. Expected one of {list(COLOR_NAMES)}")
+
+
+# =============================================================================
+# ENCODE
+# =============================================================================
+
+def bar_colors(cube: SessionCube) -> np.ndarray:
+    """(days x bars) int8: 1 bull, -1 bear, 0 flat or missing"""
+    with np.errstate(invalid='ignore'):
+        return np.nan_to_num(np.sign(cube.values[:, :, CLOSE] - cube.values[:, :, OPEN])).astype('int8')
+
+
+def color_codes(cube: SessionCube, start: int = 0, length: int = 3, base: int = 3) -> np.ndarray:
+    """
+    Pattern code of slots [start, start + length) of every day (int64, -1
+    where any of those bars is missing).
+
+    Args:
+        cube: Session cube
+        start: First slot of the window (0 = 09:15)
+        length: Bars in the window
+        base: 3 (bull / flat / bear) or 2 (bull / not bull)
+    """
+    _check_base(base)
+    end = start + length
+    if start < 0 or length < 1 or end > cube.n_bars:
+        raise ValueError(f"Window [{start}, {end}) is outside the {cube.n_bars} session slots")
+    colors = bar_colors(cube)[:, start:end].astype('int64')
+    digits = colors + 1 if base == 3 else (colors > 0).astype('int64')
+    codes = digits @ (base ** np.arange(length - 1, -1, -1, dtype='int64'))
+    codes[~cube.mask[:, start:end].all(axis=1)] = -1
+    return codes
+
+
+def pattern_labels(length: int, base: int = 3) -> List[str]:
+    """Label of every code 0 .. base**length - 1, e.g. 'Bull-Bear-Flat'"""
+    _check_base(base)
+    names = COLOR_NAMES[base]
+    labels = []
+    for code in range(base ** length):
+        digits = [(code // base ** p) % base for p in range(length - 1, -1, -1)]
+        labels.append("-".join(names[d] for d in digits))
+    return labels
+
+
+# =============================================================================
+# OUTCOMES
+# =============================================================================
+
+def day_outcomes(cube: SessionCube, start: int = 0, length: int = 3) -> pd.DataFrame:
+    """
+    Per-day outcomes relative to the window [start, start + length):
+        day_bull / day_bear     last bar's close above / below the first open
+        high_slot / low_slot    slot of the first bar making the day's high / low
+        high_in_window / low_in_window      that bar lies inside the window
+        high_after_window / low_after_window  ... after it
+        first_low_holds         the window's first bar low is not broken
+                                after the window (False when nothing follows)
+        first_high_holds        same for its high
+    """
+    end = start + length
+    day_open, day_close = cube.day_open(), cube.day_close()
+    high, low = cube.high, cube.low
+    with np.errstate(invalid='ignore'):
+        high_slot = np.argmax(high == cube.day_high()[:, np.newaxis], axis=1)
+        low_slot = np.argmax(low == cube.day_low()[:, np.newaxis], axis=1)
+        has_rest = cube.mask[:, end:].any(axis=1)
+        rest_low = np.fmin.reduce(low[:, end:], axis=1) if end < cube.n_bars else np.full(cube.n_days, np.nan)
+        rest_high = np.fmax.reduce(high[:, end:], axis=1) if end < cube.n_bars else np.full(cube.n_days, np.nan)
+        return pd.DataFrame({
+            'day_bull': day_close > day_open,
+            'day_bear': day_close < day_open,
+            'high_slot': high_slot,
+            'low_slot': low_slot,
+            'high_in_window': (high_slot >= start) & (high_slot < end),
+            'low_in_window': (low_slot >= start) & (low_slot < end),
+            'high_after_window': high_slot >= end,
+            'low_after_window': low_slot >= end,
+            'first_low_holds': has_rest & (low[:, start] <= rest_low),
+            'first_high_holds': has_rest & (high[:, start] >= rest_high),
+        })
+
+
+def pattern_outcomes(codes: np.ndarray, length: int, outcomes: pd.DataFrame,
+                     by: Optional[Dict[str, Sequence]] = None, base: int = 3) -> pd.DataFrame:
+    """
+    Outcome counts of every (by..., pattern) combination in one groupby.
+
+    Args:
+        codes: color_codes of every day (-1 days are left out)
+        length / base: Window length and base the codes were built with
+        outcomes: One row per day; each column is summed (bool = count)
+        by: Extra per-day keys, e.g. {'trend': labels, 'gap': buckets};
+            days with a missing key are left out
+
+    Returns:
+        DataFrame indexed by (*by, pattern) with `days` and the outcome
+        sums; every label combination is present (zeros when unseen).
+    """
+    by = by or {}
+    labels = pattern_labels(length, base)
+    frame = outcomes.reset_index(drop=True).copy()
+    frame['pattern'] = pd.Categorical.from_codes(np.asarray(codes, dtype='int64'), categories=labels)
+    levels = []
+    for name, values in by.items():
+        values = pd.Series(values).reset_index(drop=True)
+        if len(values) != len(frame):
+            raise ValueError(f"Key '{name}' has {len(values)} values for {len(frame)} days")
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            levels.append(list(values.cat.categories))
+        else:
+            levels.append(sorted(values.dropna().unique().tolist()))
+        frame[name] = values
+    keys = list(by) + ['pattern']
+    frame = frame.dropna(subset=keys)
+
+    table = frame.groupby(keys, observed=True).agg(
+        days=('pattern', 'size'), **{c: (c, 'sum') for c in outcomes.columns})
+    if not by:
+        table.index = table.index.astype(object)
+        return table.reindex(pd.Index(labels, name='pattern'), fill_value=0)
+    full = pd.MultiIndex.from_product(levels + [labels], names=keys)
+    return table.reindex(full, fill_value=0)
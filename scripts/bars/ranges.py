@@ -0,0 +1,96 @@
+"""
+Window Range Queries
+====================
+Sparse tables of the session cube's highs and lows: level k holds the
+high / low of the 2**k slots starting at every slot, so the high or low of
+any window [a, b] (both inclusive) is the max / min of two overlapping
+power-of-two blocks, for every day at once:
+
+    cube = load_session_cube('5min')
+    ranges = range_table(cube)
+    ranges.window_high(14, 18)                      # (n_days,) bars 15-19
+    ranges.contains_high(0, 2)                      # day high made in slots 0-2
+    a = np.arange(cube.n_bars)
+    ranges.contains_low(a[:, None], a[None, :])     # (n_days, n_bars, n_bars), every window
+
+`a` and `b` may be ints or arrays that broadcast against each other; the
+result has the days first and the broadcast shape after. Missing bars are
+skipped (fmax / fmin); a window with no bars is NaN and never contains the
+day extreme.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .cube import SessionCube
+
+
+# =============================================================================
+# TABLE CONTAINER
+# =============================================================================
+
+@dataclass
+class RangeTable:
+    """Power-of-two window highs / lows of every day and start slot"""
+    highs: np.ndarray      # float64 (n_levels, n_days, n_bars), NaN past the session end
+    lows: np.ndarray       # float64 (n_levels, n_days, n_bars)
+    day_high: np.ndarray   # float64 (n_days,)
+    day_low: np.ndarray    # float64 (n_days,)
+
+    @property
+    def n_days(self) -> int:
+        return self.highs.shape[1]
+
+    @property
+    def n_bars(self) -> int:
+        return self.highs.shape[2]
+
+    def _blocks(self, a, b):
+        """Level and the two block starts covering [a, b]"""
+        a, b = np.broadcast_arrays(np.asarray(a, dtype='int64'), np.asarray(b, dtype='int64'))
+        if np.any((a < 0) | (b >= self.n_bars) | (a > b)):
+            raise ValueError(f"Expected windows 0 <= a <= b < {self.n_bars}")
+        level = np.floor(np.log2(b - a + 1)).astype('int64')
+        return level, a, b - (1 << level) + 1
+
+    def _query(self, levels: np.ndarray, a, b, combine) -> np.ndarray:
+        level, left, right = self._blocks(a, b)
+        # Advanced indices around the day slice put the days last
+        out = combine(levels[level, :, left], levels[level, :, right])
+        return np.moveaxis(out, -1, 0)
+
+    def window_high(self, a, b) -> np.ndarray:
+        """High of slots [a, b] of every day"""
+        return self._query(self.highs, a, b, np.fmax)
+
+    def window_low(self, a, b) -> np.ndarray:
+        """Low of slots [a, b] of every day"""
+        return self._query(self.lows, a, b, np.fmin)
+
+    def contains_high(self, a, b) -> np.ndarray:
+        """True where the day's high was made inside slots [a, b]"""
+        high = self.window_high(a, b)
+        return high == self.day_high.reshape((-1,) + (1,) * (high.ndim - 1))
+
+    def contains_low(self, a, b) -> np.ndarray:
+        """True where the day's low was made inside slots [a, b]"""
+        low = self.window_low(a, b)
+        return low == self.day_low.reshape((-1,) + (1,) * (low.ndim - 1))
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def range_table(cube: SessionCube) -> RangeTable:
+    """Sparse table of a cube's highs and lows (n_bars log n_bars per day)"""
+    n_levels = max(int(cube.n_bars).bit_length(), 1)
+    highs = np.full((n_levels, cube.n_days, cube.n_bars), np.nan)
+    lows = np.full((n_levels, cube.n_days, cube.n_bars), np.nan)
+    highs[0], lows[0] = cube.high, cube.low
+    for k in range(1, n_levels):
+        half, width = 1 << (k - 1), cube.n_bars - (1 << k) + 1
+        highs[k, :, :width] = np.fmax(highs[k - 1, :, :width], highs[k - 1, :, half:half + width])
+        lows[k, :, :width] = np.fmin(lows[k - 1, :, :width], lows[k - 1, :, half:half + width])
+    return RangeTable(highs, lows, cube.day_high(), cube.day_low())
@@ -0,0 +1,156 @@
+"""
+Bar Store Replay
+================
+Sessions from the bar store re-emitted as a timed stream, so live code
+(bars.live, trend_analysis/signal_service.py) can be run against history.
+
+    feed = replay_bars('5min', start='2024-01-01', speed=None)     # as fast as possible
+    await LiveHighLowEngine(table).run(feed)
+
+    feed = replay_bars('5min', speed=60)          # 60x: a 5-min bar every 5 s
+    feed = replay_sessions('5min')                # one list of bars per session
+    server = await serve_replay('5min', port=9000, speed=None)    # JSON lines for bars.live.socket_feed
+
+Bars keep their stored timestamps: `date` (datetime64) plus `ts` (epoch
+ns, which bars.live uses without re-parsing), so a replay is deterministic
+whatever the speed. Pacing follows a virtual clock that runs through the
+sessions back to back (`session_gap` seconds of virtual time between two
+sessions, nothing for nights and weekends): a bar is emitted when it would
+have closed, at start + virtual time / speed on the event loop's clock,
+so sleeps never accumulate drift. speed=None (or 0) skips the clock and
+only yields to the event loop once per session.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .cube import SESSION_MINUTES, timeframe_minutes
+from .sessions import session_index
+from .store import epoch_ns, load_bars
+
+
+REPLAY_COLUMNS = ['open', 'high', 'low', 'close']
+NS_PER_SECOND = 1_000_000_000
+
+
+def _sessions(timeframe: str, start=None, end=None, bars: Optional[pd.DataFrame] = None) -> List[List[Dict]]:
+    """Stored bars of [start, end] (or the given frame) as one list of bar dicts per session"""
+    df = load_bars(timeframe, start=start, end=end, columns=REPLAY_COLUMNS) if bars is None else bars
+    ts = epoch_ns(df['date'])
+    dates = ts.astype('datetime64[ns]')
+    values = [df[c].to_numpy(dtype='float64').tolist() for c in REPLAY_COLUMNS]
+    rows = [{'date': d, 'ts': t, 'open': o, 'high': h, 'low': l, 'close': c}
+            for d, t, o, h, l, c in zip(dates, ts.tolist(), *values)]
+    idx = session_index(df)
+    return [rows[a:b] for a, b in zip(idx.start.tolist(), idx.end.tolist())]
+
+
+def _schedule(sessions: List[List[Dict]], bar_minutes: int, session_gap: float) -> List[np.ndarray]:
+    """Virtual emission time (s) of every bar: its close within the session,
+    sessions laid end to end"""
+    session_seconds = SESSION_MINUTES * 60 + session_gap
+    out = []
+    for k, bars in enumerate(sessions):
+        ts = np.array([bar['ts'] for bar in bars], dtype='int64')
+        since_open = (ts - ts[0]) / NS_PER_SECOND + bar_minutes * 60
+        out.append(k * session_seconds + since_open)
+    return out
+
+
+async def _paced(sessions: List[List[Dict]], timeframe: str, speed: Optional[float],
+                 session_gap: float, per_session: bool) -> AsyncIterator:
+    if not speed:
+        for bars in sessions:
+            if per_session:
+                yield bars
+            else:
+                for bar in bars:
+                    yield bar
+            await asyncio.sleep(0)
+        return
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    schedule = _schedule(sessions, timeframe_minutes(timeframe), session_gap)
+    for bars, due in zip(sessions, schedule):
+        if per_session:
+            wait = start + due[-1] / speed - loop.time()
+            await asyncio.sleep(max(wait, 0))
+            yield bars
+            continue
+        for bar, at in zip(bars, due.tolist()):
+            wait = start + at / speed - loop.time()
+            await asyncio.sleep(max(wait, 0))
+            yield bar
+
+
+async def replay_bars(timeframe: str = '5min', start=None, end=None,
+                      speed: Optional[float] = None, session_gap: float = 0.0,
+                      bars: Optional[pd.DataFrame] = None) -> AsyncIterator[Dict]:
+    """
+    Stored bars of [start, end], one dict (date/ts/open/high/low/close) at
+    a time.
+
+    Args:
+        timeframe: Stored (or derivable) timeframe
+        start / end: Date range, as for load_bars
+        speed: Virtual seconds per wall second (1 = real time); None or 0
+            = as fast as the consumer takes them
+        session_gap: Virtual seconds between the close of one session and
+            the first bar of the next
+        bars: Replay this time-sorted frame (date + OHLC) instead of the
+            store; timeframe still sets the bar length
+    """
+    async for bar in _paced(_sessions(timeframe, start, end, bars), timeframe, speed, session_gap, False):
+        yield bar
+
+
+async def replay_sessions(timeframe: str = '5min', start=None, end=None,
+                          speed: Optional[float] = None,
+                          session_gap: float = 0.0,
+                          bars: Optional[pd.DataFrame] = None) -> AsyncIterator[List[Dict]]:
+    """As replay_bars, but a whole session per item (emitted at its close)"""
+    async for session in _paced(_sessions(timeframe, start, end, bars), timeframe, speed, session_gap, True):
+        yield session
+
+
+async def replay_into(queue: asyncio.Queue, feed: AsyncIterator):
+    """Put every item of `feed` on an in-process queue, then None"""
+    try:
+        async for item in feed:
+            await queue.put(item)
+    finally:
+        await queue.put(None)
+
+
+def bar_json(bar: Dict) -> str:
+    """One bar as a JSON line body (ISO date, as bars.live.socket_feed reads it)"""
+    return json.dumps({'date': str(bar['date'])[:19].replace('T', ' '), 'open': bar['open'],
+                       'high': bar['high'], 'low': bar['low'], 'close': bar['close']})
+
+
+async def serve_replay(timeframe: str = '5min', start=None, end=None,
+                       speed: Optional[float] = None, session_gap: float = 0.0,
+                       host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+    """
+    Local TCP server: each connection gets its own replay of [start, end]
+    as JSON lines, then the connection is closed.
+    """
+    sessions = _sessions(timeframe, start, end)
+
+    async def handle(reader, writer):
+        try:
+            async for bars in _paced(sessions, timeframe, speed, session_gap, per_session=not speed):
+                for bar in (bars if isinstance(bars, list) else [bars]):
+                    writer.write((bar_json(bar) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,151 @@
+"""
+Session-Aligned Resampler
+=========================
+Derives any N-minute timeframe from the finest bars available in the store,
+aligned to the NSE session (buckets anchored at 09:15, last bucket truncated
+at 15:30 - e.g. the 15:15-15:30 bar of the 2-hour series).
+
+Resampled frames are cached under data/store/resampled/ keyed by the target
+timeframe, the source timeframe and a content hash of the source parts, so a
+change to the source invalidates the cache automatically.
+
+CLI:
+    python -m bars check-resample 120min      # compare stored vs derived bars
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import store
+from .cube import (NS_PER_DAY, NS_PER_MINUTE, SESSION_END_MINUTE,
+                   SESSION_START_MINUTE, timeframe_minutes)
+
+
+# =============================================================================
+# CORE RESAMPLING
+# =============================================================================
+
+def resample_bars(df: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """
+    Aggregate time-sorted bars into session-aligned `minutes` bars.
+
+    One vectorized pass: each bar gets the start time of its bucket, bucket
+    boundaries are where that key changes, and OHLC(V) are reduced with
+    ufunc.reduceat over the contiguous runs.
+    """
+    ts = store.epoch_ns(df['date'])
+    day_ns = ts - ts % NS_PER_DAY
+    minute_of_day = (ts - day_ns) // NS_PER_MINUTE
+
+    in_session = (minute_of_day >= SESSION_START_MINUTE) & (minute_of_day < SESSION_END_MINUTE)
+    bucket = (minute_of_day - SESSION_START_MINUTE) // minutes
+    key = day_ns + (SESSION_START_MINUTE + bucket * minutes) * NS_PER_MINUTE
+    key = key[in_session]
+
+    if len(key) == 0:
+        return pd.DataFrame(columns=['date'] + store.PRICE_COLUMNS)
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(key)) + 1))
+    ends = np.concatenate((starts[1:], [len(key)]))
+
+    out = pd.DataFrame({'date': pd.to_datetime(key[starts].view('datetime64[ns]'))})
+    out['open'] = df['open'].to_numpy(dtype='float64')[in_session][starts]
+    out['high'] = np.maximum.reduceat(df['high'].to_numpy(dtype='float64')[in_session], starts)
+    out['low'] = np.minimum.reduceat(df['low'].to_numpy(dtype='float64')[in_session], starts)
+    out['close'] = df['close'].to_numpy(dtype='float64')[in_session][ends - 1]
+    if 'volume' in df.columns:
+        out['volume'] = np.add.reduceat(df['volume'].to_numpy()[in_session], starts)
+
+    return out
+
+
+# =============================================================================
+# SOURCE SELECTION / CACHE
+# =============================================================================
+
+def available_timeframes():
+    """Stored or convertible timeframes, finest first"""
+    found = [tf for tf in store.SOURCE_FILES
+             if store.has_store(tf) or store.source_path(tf).exists()]
+    return sorted(found, key=timeframe_minutes)
+
+
+def finest_source(timeframe: str) -> str:
+    """Finest available timeframe that evenly divides `timeframe`"""
+    target = timeframe_minutes(timeframe)
+    for tf in available_timeframes():
+        minutes = timeframe_minutes(tf)
+        if minutes <= target and target % minutes == 0:
+            return tf
+    raise FileNotFoundError(f"No source bars available to derive {timeframe}")
+
+
+def source_hash(timeframe: str) -> str:
+    """Content hash of a timeframe's store (from the manifest checksums)"""
+    if not store.has_store(timeframe):
+        store.convert_csv(timeframe)
+    return store.store_checksum(timeframe)
+
+
+def cache_path(timeframe: str, source: str, digest: str) -> Path:
+    return store.STORE_DIR / "resampled" / f"{timeframe}-from-{source}-{digest}.parquet"
+
+
+def derive_bars(timeframe: str, source: Optional[str] = None) -> pd.DataFrame:
+    """
+    Full-history bars for `timeframe` derived from `source` (default: finest
+    available), served from the on-disk cache when the source is unchanged.
+    """
+    source = source or finest_source(timeframe)
+    digest = source_hash(source)
+    path = cache_path(timeframe, source, digest)
+
+    if path.exists():
+        df = pq.read_table(path).to_pandas()
+        df['date'] = pd.to_datetime(df.pop('ts').to_numpy(dtype='int64').view('datetime64[ns]'))
+        return df[['date'] + [c for c in df.columns if c != 'date']]
+
+    print(f"Resampling {source} -> {timeframe}...")
+    base = store.load_bars(source)
+    out = resample_bars(base, timeframe_minutes(timeframe))
+
+    # Drop cache files for older versions of the same source
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for old in path.parent.glob(f"{timeframe}-from-{source}-*.parquet"):
+        old.unlink()
+
+    table = out.drop(columns=['date']).copy()
+    table.insert(0, 'ts', store.epoch_ns(out['date']))
+    pq.write_table(pa.Table.from_pandas(table, preserve_index=False), path,
+                   row_group_size=store.ROW_GROUP_SIZE)
+    return out
+
+
+# =============================================================================
+# DRIFT CHECK
+# =============================================================================
+
+def compare_with_stored(timeframe: str, tolerance: float = 1e-6) -> pd.DataFrame:
+    """
+    Bars where the stored file disagrees with bars derived from the finest
+    source, over the period both cover.
+    """
+    source = finest_source(timeframe)
+    if source == timeframe:
+        raise ValueError(f"{timeframe} is already the finest available timeframe")
+
+    derived = derive_bars(timeframe, source)
+    stored = store.load_bars(timeframe, start=derived['date'].iloc[0], end=derived['date'].iloc[-1])
+
+    merged = stored.merge(derived, on='date', how='outer', suffixes=('_stored', '_derived'),
+                          indicator=True)
+    bad = merged['_merge'] != 'both'
+    for col in store.PRICE_COLUMNS:
+        bad |= ~np.isclose(merged[f'{col}_stored'], merged[f'{col}_derived'], atol=tolerance)
+    return merged[bad].reset_index(drop=True)
+
@@ -0,0 +1,159 @@
+"""
+Scenario Masks
+==============
+Day scenarios declared as data (a dict, or a JSON / YAML file) and compiled
+into boolean masks over a per-day feature table (bars.features):
+
+    SCENARIOS = {
+        '50-bull':   {'gap': {'>=': 50}, 'direction': 'bull', 'wick': 0.10},
+        '50-anybar': {'gap': {'>=': 50}},
+        'small-up':  {'gap': {'>': 0, '<': 50}, 'prev_close_ema': 'BULL'},
+    }
+    masks = scenario_masks(load_day_features(), SCENARIOS)     # days x scenarios, bool
+    curves = bar_masked_curves(df, masks)                      # bars.highlow
+
+A scenario is a dict of conditions, all of which must hold:
+
+    column: value                 equal (label, bool or number)
+    column: [v1, v2]              one of the values
+    column: {'>=': 50, '<': 100}  comparisons: <, <=, >, >=, ==, !=; the
+                                  right-hand side is a number, a column name
+                                  or 'factor * column'
+    direction: bull | bear        close above / below the open (is_bull / is_bear)
+    wick: ratio                   with a direction, the wick against it is at
+                                  most ratio x the candle range (strong bar)
+
+Every distinct condition (and 'factor * column' operand) is evaluated once
+and shared by all scenarios that use it, so hundreds of scenarios over the
+same few thresholds cost little more than the thresholds themselves.
+"""
+
+import json
+import operator
+from pathlib import Path
+from typing import Dict, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+DIRECTIONS = {'bull': 'is_bull', 'bear': 'is_bear'}
+# Wick against the bar's direction, as in bars.highlow.first_bar_type
+AGAINST_WICK = {'bull': 'upper_wick', 'bear': 'lower_wick'}
+
+Condition = Tuple[str, str, Hashable]   # (column, operator or 'in', right-hand side)
+
+
+# =============================================================================
+# COMPILE
+# =============================================================================
+
+def _operand(value) -> Hashable:
+    """Right-hand side of a comparison: a number or (factor, column)"""
+    if isinstance(value, str):
+        parts = [p.strip() for p in value.split('*')]
+        if len(parts) == 1:
+            return (1.0, parts[0])
+        if len(parts) == 2:
+            try:
+                return (float(parts[0]), parts[1])
+            except ValueError:
+                pass
+        raise ValueError(f"Expected a number, 'column' or 'factor * column', got '{value}'")
+    return float(value)
+
+
+def compile_scenario(spec: Dict) -> Tuple[Condition, ...]:
+    """The conditions of one scenario spec, in a hashable normal form"""
+    conditions = []
+    direction = spec.get('direction')
+    for key, value in spec.items():
+        if key == 'direction':
+            if value not in DIRECTIONS:
+                raise ValueError(f"Unknown direction '{value}'. Expected one of {list(DIRECTIONS)}")
+            conditions.append((DIRECTIONS[value], '==', True))
+        elif key == 'wick':
+            if direction not in AGAINST_WICK:
+                raise ValueError(f"'wick' needs a direction. Expected one of {list(AGAINST_WICK)}")
+            conditions.append((AGAINST_WICK[direction], '<=', (float(value), 'candle_len')))
+        elif isinstance(value, dict):
+            for op, rhs in value.items():
+                if op not in OPERATORS:
+                    raise ValueError(f"Unknown operator '{op}' for '{key}'. Expected one of {list(OPERATORS)}")
+                conditions.append((key, op, _operand(rhs)))
+        elif isinstance(value, (list, tuple)):
+            conditions.append((key, 'in', tuple(value)))
+        else:
+            conditions.append((key, '==', value))
+    return tuple(conditions)
+
+
+def load_scenarios(path) -> Dict[str, Dict]:
+    """
+    {name: spec} from a JSON or YAML file (YAML needs PyYAML).
+    """
+    path = Path(path)
+    with open(path) as f:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Reading YAML scenarios needs PyYAML (pip install pyyaml); "
+                                  "JSON scenario files work without it") from None
+            scenarios = yaml.safe_load(f)
+        else:
+            scenarios = json.load(f)
+    if not isinstance(scenarios, dict) or not all(isinstance(s, dict) for s in scenarios.values()):
+        raise ValueError(f"Expected a mapping of scenario name -> conditions in {path}")
+    return scenarios
+
+
+# =============================================================================
+# EVALUATE
+# =============================================================================
+
+def scenario_masks(features: pd.DataFrame, scenarios: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Boolean (days x scenarios) frame, index of `features`, one column per
+    scenario (in order). Missing values never match a condition.
+
+    Args:
+        features: Per-day table, e.g. bars.features.load_day_features()
+        scenarios: name -> spec (see module docstring)
+    """
+    operands, conditions = {}, {}
+
+    def column(name):
+        if name not in features.columns:
+            raise ValueError(f"Unknown feature column '{name}'. Expected one of {list(features.columns)}")
+        return features[name]
+
+    def operand(rhs):
+        if not isinstance(rhs, tuple):
+            return rhs
+        if rhs not in operands:
+            factor, name = rhs
+            operands[rhs] = column(name) if factor == 1.0 else factor * column(name)
+        return operands[rhs]
+
+    def evaluate(condition):
+        if condition not in conditions:
+            name, op, rhs = condition
+            if op == 'in':
+                result = column(name).isin(rhs)
+            else:
+                result = OPERATORS[op](column(name), operand(rhs))
+            conditions[condition] = result.to_numpy(dtype=bool, na_value=False)
+        return conditions[condition]
+
+    masks = {}
+    for name, spec in scenarios.items():
+        mask = np.ones(len(features), dtype=bool)
+        for condition in compile_scenario(spec):
+            mask = mask & evaluate(condition)
+        masks[name] = mask
+    return pd.DataFrame(masks, index=features.index, columns=list(scenarios))
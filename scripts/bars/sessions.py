@@ -0,0 +1,184 @@
+"""
+Session Index
+=============
+Per-day row offsets into a timeframe's bars, so a day (or a run of days) is
+a contiguous slice of the full-history frame and per-day reductions are a
+single ufunc.reduceat instead of a groupby.
+
+    df = load_bars('5min')
+    idx = load_session_index('5min')
+    day = idx.day_frame(df, '2024-03-15')           # contiguous view, no masking
+    day_high = idx.reduce(df['high'].to_numpy(), np.maximum)
+
+Layout (under data/store/<timeframe>/):
+    sessions.npz   # dates, start, end, first_ts, last_ts + source signature
+
+Rows are positions in `load_bars(timeframe)` with no date range. The index is
+rebuilt from the `ts` column alone whenever the store checksum changes (after
+a convert or an ingest).
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import store
+from .cube import NS_PER_DAY
+
+
+# =============================================================================
+# INDEX CONTAINER
+# =============================================================================
+
+@dataclass
+class SessionIndex:
+    """Start/end rows and time range of every trading day"""
+    dates: np.ndarray     # datetime64[D] (n_days,)
+    start: np.ndarray     # int64 first row of the day
+    end: np.ndarray       # int64 one past the last row of the day
+    first_ts: np.ndarray  # int64 epoch ns of the first bar
+    last_ts: np.ndarray   # int64 epoch ns of the last bar
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dates)
+
+    @property
+    def count(self) -> np.ndarray:
+        """Bars per day"""
+        return self.end - self.start
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.end[-1]) if self.n_days else 0
+
+    def __len__(self) -> int:
+        return self.n_days
+
+    def locate(self, day) -> int:
+        """Position of a date in the index (anything pd.Timestamp accepts)"""
+        key = np.datetime64(pd.Timestamp(day).date(), 'D')
+        pos = np.searchsorted(self.dates, key)
+        if pos >= self.n_days or self.dates[pos] != key:
+            raise KeyError(f"{day} not in session index")
+        return int(pos)
+
+    def rows(self, day) -> slice:
+        """Row slice of a single day"""
+        pos = self.locate(day)
+        return slice(int(self.start[pos]), int(self.end[pos]))
+
+    def range_rows(self, start=None, end=None) -> slice:
+        """Row slice covering all days in [start, end] (both inclusive)"""
+        lo = 0 if start is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(start).date(), 'D'), side='left')
+        hi = self.n_days if end is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(end).date(), 'D'), side='right')
+        if lo >= hi:
+            return slice(0, 0)
+        return slice(int(self.start[lo]), int(self.end[hi - 1]))
+
+    def day_frame(self, df: pd.DataFrame, day) -> pd.DataFrame:
+        """Bars of one day from the full-history frame"""
+        return df.iloc[self.rows(day)]
+
+    def range_frame(self, df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+        """Bars of a run of days from the full-history frame"""
+        return df.iloc[self.range_rows(start, end)]
+
+    def day_ids(self) -> np.ndarray:
+        """Day position of every row"""
+        return np.repeat(np.arange(self.n_days), self.count)
+
+    def bar_number(self) -> np.ndarray:
+        """Position of every row within its day (0 = first bar)"""
+        return np.arange(self.n_rows) - np.repeat(self.start, self.count)
+
+    def first(self, values: np.ndarray) -> np.ndarray:
+        """Value at the first bar of each day"""
+        return np.asarray(values)[self.start]
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        """Value at the last bar of each day"""
+        return np.asarray(values)[self.end - 1]
+
+    def nth(self, values: np.ndarray, n: int) -> np.ndarray:
+        """Value at bar `n` of each day (NaN where the day is shorter)"""
+        out = np.full(self.n_days, np.nan)
+        has = self.count > n
+        out[has] = np.asarray(values, dtype='float64')[self.start[has] + n]
+        return out
+
+    def reduce(self, values: np.ndarray, ufunc=np.add) -> np.ndarray:
+        """Per-day ufunc.reduceat (e.g. np.maximum for the day high)"""
+        return ufunc.reduceat(np.asarray(values), self.start)
+
+    def select(self, rows) -> 'SessionIndex':
+        """Subset of days by boolean mask or integer rows (offsets unchanged)"""
+        return SessionIndex(self.dates[rows], self.start[rows], self.end[rows],
+                            self.first_ts[rows], self.last_ts[rows])
+
+    def date_list(self):
+        """Dates as python datetime.date objects (matches df['date'].dt.date)"""
+        return list(pd.to_datetime(self.dates).date)
+
+
+# =============================================================================
+# BUILD / LOAD
+# =============================================================================
+
+def session_index_from_ts(ts: np.ndarray) -> SessionIndex:
+    """Index of a time-sorted int64 epoch-ns array"""
+    ts = np.asarray(ts, dtype='int64')
+    if len(ts) == 0:
+        empty = np.empty(0, dtype='int64')
+        return SessionIndex(np.empty(0, dtype='datetime64[D]'), empty, empty, empty, empty)
+
+    day_ns = ts - ts % NS_PER_DAY
+    start = np.concatenate(([0], np.flatnonzero(np.diff(day_ns)) + 1)).astype('int64')
+    end = np.concatenate((start[1:], [len(ts)])).astype('int64')
+    dates = day_ns[start].view('datetime64[ns]').astype('datetime64[D]')
+    return SessionIndex(dates, start, end, ts[start], ts[end - 1])
+
+
+def session_index(df: pd.DataFrame) -> SessionIndex:
+    """Index of any time-sorted bar frame with a `date` column"""
+    return session_index_from_ts(store.epoch_ns(df['date']))
+
+
+def index_path(timeframe: str) -> Path:
+    return store.store_path(timeframe) / "sessions.npz"
+
+
+def build_session_index(timeframe: str) -> SessionIndex:
+    """Build the index from the store's ts column and persist it"""
+    ts = store.load_table(timeframe, columns=[]).column('ts').to_numpy()
+    idx = session_index_from_ts(ts)
+
+    path = index_path(timeframe)
+    with open(path, 'wb') as f:
+        np.savez(f, dates=idx.dates, start=idx.start, end=idx.end,
+                 first_ts=idx.first_ts, last_ts=idx.last_ts,
+                 source=np.array(store.store_checksum(timeframe)))
+    return idx
+
+
+def load_session_index(timeframe: str = '5min') -> SessionIndex:
+    """
+    Session index for a stored timeframe, rebuilt if the store changed.
+    Derived timeframes are indexed on the fly from their resampled bars.
+    """
+    if not store.is_stored(timeframe):
+        return session_index(store.load_bars(timeframe, columns=[]))
+    if not store.has_store(timeframe):
+        store.convert_csv(timeframe)
+
+    path = index_path(timeframe)
+    if path.exists():
+        with np.load(path) as saved:
+            if str(saved['source']) == store.store_checksum(timeframe):
+                return SessionIndex(saved['dates'], saved['start'], saved['end'],
+                                    saved['first_ts'], saved['last_ts'])
+    return build_session_index(timeframe)
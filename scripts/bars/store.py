@@ -0,0 +1,317 @@
+"""
+Columnar Bar Store
+==================
+One-time conversion of the NIFTY 50 CSV files into typed Parquet datasets,
+plus a single `load_bars()` entry point used by every analysis script.
+
+Layout (under data/store/):
+    <timeframe>/part-00000.parquet   # ts (int64 epoch ns), open/high/low/close (float64), extras
+    <timeframe>/part-00001.parquet   # ...parts appended by `python -m bars ingest`
+    <timeframe>/manifest.json        # per-part row counts, time range, sha256; indicator state
+
+Timestamps are the exchange wall-clock times from the CSV stored as int64
+nanoseconds, so a date-range read is a predicate on a sorted integer column
+and only the matching row groups are decoded.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+STORE_DIR = DATA_DIR / "store"
+
+SOURCE_FILES = {
+    '5min': 'nifty50_minute_complete-5min.csv',
+    '30min': 'nifty50_minute_2022-30min.csv',
+    '120min': 'nifty50_minute_complete-120min.csv',
+}
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+ROW_GROUP_SIZE = 4096  # ~55 sessions of 5-min bars per row group
+MANIFEST_VERSION = 1
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def epoch_ns(dates) -> np.ndarray:
+    """Convert a datetime Series/array to int64 nanoseconds since epoch"""
+    return np.asarray(pd.to_datetime(dates), dtype='datetime64[ns]').view('int64')
+
+
+def source_path(timeframe: str) -> Path:
+    """Path of the raw CSV for a timeframe"""
+    if timeframe not in SOURCE_FILES:
+        raise ValueError(f"Unknown timeframe '{timeframe}'. Expected one of {list(SOURCE_FILES)}")
+    return DATA_DIR / SOURCE_FILES[timeframe]
+
+
+def store_path(timeframe: str) -> Path:
+    """Directory holding the Parquet parts for a timeframe"""
+    return STORE_DIR / timeframe
+
+
+def _range_bounds(start, end) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Turn user start/end into [lo, hi) epoch-ns bounds.
+    A date-only `end` (no time component) includes that whole day.
+    """
+    lo = hi = None
+    if start is not None:
+        lo = int(pd.Timestamp(start).value)
+    if end is not None:
+        end_ts = pd.Timestamp(end)
+        if end_ts == end_ts.normalize():
+            end_ts = end_ts + pd.Timedelta(days=1)
+        else:
+            end_ts = end_ts + pd.Timedelta(nanoseconds=1)
+        hi = int(end_ts.value)
+    return lo, hi
+
+
+# =============================================================================
+# CONVERSION
+# =============================================================================
+
+def read_source_csv(path) -> pd.DataFrame:
+    """
+    Parse a raw OHLC CSV into the store schema.
+    Accepts either a `date` or `datetime` column and sorts by time.
+    """
+    df = pd.read_csv(path)
+    df.columns = [c.strip() for c in df.columns]
+
+    if 'date' in df.columns:
+        dt_col = 'date'
+    elif 'datetime' in df.columns:
+        dt_col = 'datetime'
+    else:
+        raise ValueError(f"Could not find datetime column in {path}. Columns: {list(df.columns)}")
+
+    out = pd.DataFrame({'ts': epoch_ns(df[dt_col])})
+    for col in PRICE_COLUMNS:
+        out[col] = df[col].astype('float64')
+    for col in df.columns:
+        if col in (dt_col, 'ts') or col in PRICE_COLUMNS:
+            continue
+        out[col] = df[col]
+
+    return out.sort_values('ts', kind='stable').reset_index(drop=True)
+
+
+def next_part(timeframe: str) -> int:
+    """Part number after every part file on disk, listed in the manifest or not"""
+    numbers = [int(p.stem.split('-')[1]) for p in store_path(timeframe).glob("part-*.parquet")]
+    return max(numbers) + 1 if numbers else 0
+
+
+def write_part(df: pd.DataFrame, timeframe: str, part: int = 0) -> Path:
+    """Write one sorted Parquet part for a timeframe"""
+    out_dir = store_path(timeframe)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"part-{part:05d}.parquet"
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, path, row_group_size=ROW_GROUP_SIZE)
+    return path
+
+
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+def manifest_path(timeframe: str) -> Path:
+    return store_path(timeframe) / "manifest.json"
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def part_record(path: Path, df: pd.DataFrame) -> Dict:
+    """Manifest entry describing one written part"""
+    return {
+        'file': path.name,
+        'rows': int(len(df)),
+        'first_ts': int(df['ts'].iloc[0]) if len(df) else None,
+        'last_ts': int(df['ts'].iloc[-1]) if len(df) else None,
+        'sha256': file_sha256(path),
+    }
+
+
+def read_manifest(timeframe: str) -> Optional[Dict]:
+    path = manifest_path(timeframe)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(timeframe: str, parts: List[Dict], state: Optional[Dict] = None) -> Dict:
+    """
+    Record the parts that make up a timeframe plus any indicator state
+    carried between ingests. Downstream caches key on the part checksums.
+    """
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'timeframe': timeframe,
+        'rows': sum(p['rows'] for p in parts),
+        'last_ts': parts[-1]['last_ts'] if parts else None,
+        'parts': parts,
+        'state': state or {},
+    }
+    tmp = manifest_path(timeframe).with_suffix('.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    tmp.replace(manifest_path(timeframe))
+    return manifest
+
+
+def store_checksum(timeframe: str) -> str:
+    """Short hash identifying the exact contents of a timeframe's store"""
+    manifest = read_manifest(timeframe)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest for {timeframe}")
+    digest = hashlib.sha256()
+    for part in manifest['parts']:
+        digest.update(f"{part['file']}:{part['sha256']}".encode())
+    return digest.hexdigest()[:16]
+
+
+def convert_csv(timeframe: str) -> Path:
+    """
+    (Re)build the store for a timeframe from its CSV.
+    Any existing parts are replaced.
+    """
+    src = source_path(timeframe)
+    if not src.exists():
+        raise FileNotFoundError(f"Data file not found at {src}")
+
+    print(f"Converting {src.name} -> {store_path(timeframe)}")
+    df = read_source_csv(src)
+
+    out_dir = store_path(timeframe)
+    if out_dir.exists():
+        for old in out_dir.glob("part-*.parquet"):
+            old.unlink()
+
+    path = write_part(df, timeframe, 0)
+    write_manifest(timeframe, [part_record(path, df)])
+    return path
+
+
+def has_store(timeframe: str) -> bool:
+    return manifest_path(timeframe).exists()
+
+
+def list_parts(timeframe: str) -> List[Path]:
+    """Parts listed in the manifest (files not yet recorded are ignored)"""
+    manifest = read_manifest(timeframe)
+    if manifest is None:
+        return []
+    return [store_path(timeframe) / p['file'] for p in manifest['parts']]
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def load_table(timeframe: str, start=None, end=None,
+               columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Read bars for a timeframe as an Arrow table (ts kept as int64).
+    Converts the CSV on first use.
+    """
+    if not has_store(timeframe):
+        convert_csv(timeframe)
+
+    dataset = ds.dataset([str(p) for p in list_parts(timeframe)], format="parquet")
+
+    lo, hi = _range_bounds(start, end)
+    expr = None
+    if lo is not None:
+        expr = ds.field('ts') >= lo
+    if hi is not None:
+        cond = ds.field('ts') < hi
+        expr = cond if expr is None else expr & cond
+
+    if columns is not None and 'ts' not in columns:
+        columns = ['ts'] + list(columns)
+
+    return dataset.to_table(columns=columns, filter=expr)
+
+
+def is_stored(timeframe: str) -> bool:
+    """True if the timeframe has its own CSV or store (not derived)"""
+    return timeframe in SOURCE_FILES and (has_store(timeframe) or source_path(timeframe).exists())
+
+
+def load_bars(timeframe: str, start=None, end=None,
+              columns: Optional[List[str]] = None,
+              derived: bool = False) -> pd.DataFrame:
+    """
+    Load OHLC bars for a timeframe ('5min', '30min', '120min', or any
+    N-minute timeframe that can be resampled from stored bars).
+
+    Args:
+        timeframe: Key of SOURCE_FILES, or e.g. '15min' / '60min'
+        start: Inclusive start (anything pd.Timestamp accepts)
+        end: Inclusive end; a bare date includes the whole day
+        columns: Optional subset of columns to read
+        derived: Resample from the finest stored timeframe even if the
+                 timeframe has its own file (keeps timeframes consistent)
+
+    Returns:
+        DataFrame sorted by time with a `date` datetime column followed by
+        open/high/low/close and any extra columns stored for the timeframe.
+    """
+    if derived or not is_stored(timeframe):
+        from .resample import derive_bars
+        df = derive_bars(timeframe)
+        lo, hi = _range_bounds(start, end)
+        ts = epoch_ns(df['date'])
+        keep = np.ones(len(df), dtype=bool)
+        if lo is not None:
+            keep &= ts >= lo
+        if hi is not None:
+            keep &= ts < hi
+        df = df[keep]
+        if columns is not None:
+            df = df[['date'] + [c for c in columns if c != 'date']]
+        return df.reset_index(drop=True)
+
+    table = load_table(timeframe, start, end, columns)
+    df = table.to_pandas()
+
+    ts = df.pop('ts').to_numpy(dtype='int64')
+    df.insert(0, 'date', pd.to_datetime(ts.view('datetime64[ns]')))
+    return df.reset_index(drop=True)
+
+
+def convert_all() -> Dict[str, Path]:
+    """Convert every CSV present in data/"""
+    converted = {}
+    for timeframe in SOURCE_FILES:
+        if source_path(timeframe).exists():
+            converted[timeframe] = convert_csv(timeframe)
+        else:
+            print(f"[Skipping] {SOURCE_FILES[timeframe]} not found")
+    return converted
@@ -0,0 +1,297 @@
+"""
+Streaming Indicators
+====================
+Constant-time, bar-by-bar counterparts of bars.indicators for live use.
+Each object keeps only the state its recursion needs (in __slots__), can be
+snapshotted to a JSON-serializable dict and restored, and can be warm-started
+from stored history so the first live bar continues the series exactly.
+
+    trend = StreamingTrend.from_store('120min')   # state after the last stored bar
+    up, down = trend.update(new_close)
+
+Values match the vectorized versions: EMA and slope bit-for-bit, ATR/ADX to
+floating-point rounding (the rolling sum is kept as an exact window sum).
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import indicators, store
+
+
+# =============================================================================
+# BASE
+# =============================================================================
+
+def _true_range(bar, prev_close: Optional[float]) -> float:
+    tr = bar['high'] - bar['low']
+    if prev_close is not None:
+        tr = max(tr, abs(bar['high'] - prev_close), abs(bar['low'] - prev_close))
+    return float(tr)
+
+
+class _Streaming:
+    """
+    snapshot()/restore() over __slots__ (deques become lists). Restore into
+    an instance constructed with the same parameters.
+    """
+    __slots__ = ()
+
+    def snapshot(self) -> Dict:
+        state = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, deque):
+                value = list(value)
+            elif isinstance(value, _Streaming):
+                value = value.snapshot()
+            state[name] = value
+        return state
+
+    def restore(self, state: Dict) -> '_Streaming':
+        for name in self.__slots__:
+            current = getattr(self, name)
+            value = state[name]
+            if isinstance(current, deque):
+                value = deque(value, maxlen=current.maxlen)
+            elif isinstance(current, _Streaming):
+                value = current.restore(value)
+            setattr(self, name, value)
+        return self
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.snapshot()})"
+
+
+# =============================================================================
+# PRICE SERIES
+# =============================================================================
+
+class StreamingEMA(_Streaming):
+    """EMA with `Series.ewm(span=period, adjust=False)` semantics"""
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, period: Optional[int] = None, value: Optional[float] = None,
+                 alpha: Optional[float] = None):
+        if alpha is None:
+            alpha = 2.0 / (period + 1.0)
+        self.alpha = alpha
+        self.value = value
+
+    def update(self, x: float) -> float:
+        """Feed one value; NaN leaves the average unchanged"""
+        if x != x:
+            return self.value
+        if self.value is None:
+            self.value = float(x)
+        else:
+            # Same expression as pandas' adjust=False recursion
+            decay = 1.0 - self.alpha
+            self.value = (decay * self.value + self.alpha * x) / (decay + self.alpha)
+        return self.value
+
+    def warm_start(self, values) -> 'StreamingEMA':
+        """Set the state to the EMA after the last of `values` (vectorized)"""
+        values = np.asarray(values, dtype='float64')
+        if len(values):
+            if self.value is not None:
+                values = np.concatenate(([self.value], values))
+            self.value = float(pd.Series(values).ewm(alpha=self.alpha, adjust=False).mean().iloc[-1])
+        return self
+
+
+class StreamingSlope(_Streaming):
+    """Slope in degrees over `lookback` updates (0 until enough history)"""
+    __slots__ = ('lookback', 'history')
+
+    def __init__(self, lookback: int = 1):
+        self.lookback = lookback
+        self.history = deque(maxlen=lookback)
+
+    def update(self, y: float) -> float:
+        slope = 0.0
+        if len(self.history) == self.lookback:
+            slope = math.degrees(math.atan2(y - self.history[0], self.lookback))
+        self.history.append(float(y))
+        return slope
+
+    def warm_start(self, values) -> 'StreamingSlope':
+        self.history.extend(float(v) for v in np.asarray(values)[-self.lookback:])
+        return self
+
+
+# =============================================================================
+# BAR SERIES
+# =============================================================================
+
+class StreamingATR(_Streaming):
+    """Rolling-mean Average True Range over the last `period` bars"""
+    __slots__ = ('period', 'prev_close', 'window')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.window = deque(maxlen=period)
+
+    def update(self, bar) -> float:
+        """Feed a bar with high/low/close; NaN until `period` bars are seen"""
+        self.window.append(_true_range(bar, self.prev_close))
+        self.prev_close = float(bar['close'])
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self.window) < self.period:
+            return math.nan
+        return math.fsum(self.window) / self.period
+
+    def warm_start(self, high, low, close) -> 'StreamingATR':
+        tr = indicators.true_range(high, low, close)
+        self.window.extend(float(v) for v in tr[-self.period:])
+        if len(close):
+            self.prev_close = float(np.asarray(close)[-1])
+        return self
+
+
+class StreamingADX(_Streaming):
+    """
+    ADX with +DI/-DI, same definition as indicators.adx (EMA-smoothed DM over
+    rolling-mean ATR, or Wilder smoothing throughout with `wilder=True`).
+    """
+    __slots__ = ('period', 'wilder', 'prev_high', 'prev_low',
+                 'plus_dm', 'minus_dm', 'range_avg', 'dx', 'prev_close')
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_close = None
+        alpha = 1.0 / period if wilder else 2.0 / (period + 1.0)
+        self.plus_dm = StreamingEMA(alpha=alpha)
+        self.minus_dm = StreamingEMA(alpha=alpha)
+        self.dx = StreamingEMA(alpha=alpha)
+        self.range_avg = StreamingEMA(alpha=alpha) if wilder else StreamingATR(period)
+
+    def update(self, bar) -> Tuple[float, float, float]:
+        """Feed a bar with high/low/close; returns (adx, plus_di, minus_di)"""
+        up = down = 0.0
+        if self.prev_high is not None:
+            up_move = bar['high'] - self.prev_high
+            down_move = self.prev_low - bar['low']
+            up = up_move if (up_move > down_move and up_move > 0) else 0.0
+            down = down_move if (down_move > up_move and down_move > 0) else 0.0
+        self.prev_high = float(bar['high'])
+        self.prev_low = float(bar['low'])
+
+        plus = self.plus_dm.update(up)
+        minus = self.minus_dm.update(down)
+        if self.wilder:
+            tr = self.range_avg.update(_true_range(bar, self.prev_close))
+        else:
+            tr = self.range_avg.update(bar)
+        self.prev_close = float(bar['close'])
+
+        if not tr or tr != tr:
+            return self.dx.value if self.dx.value is not None else math.nan, math.nan, math.nan
+        plus_di = 100 * plus / tr
+        minus_di = 100 * minus / tr
+        total = plus_di + minus_di
+        if total:
+            self.dx.update(100 * abs(plus_di - minus_di) / total)
+        adx_value = self.dx.value if self.dx.value is not None else math.nan
+        return adx_value, plus_di, minus_di
+
+    def warm_start(self, high, low, close) -> 'StreamingADX':
+        for h, l, c in zip(high, low, close):
+            self.update({'high': h, 'low': l, 'close': c})
+        return self
+
+
+class DayRange(_Streaming):
+    """Running open/high/low of the current session; resets on a new date"""
+    __slots__ = ('day', 'open', 'high', 'low', 'bars')
+
+    def __init__(self):
+        self.day = None
+        self.open = self.high = self.low = None
+        self.bars = 0
+
+    def update(self, bar) -> Tuple[float, float]:
+        """Feed a bar with date/open/high/low; returns (high so far, low so far)"""
+        return self.update_day(str(np.datetime64(bar['date'], 'D')), float(bar['open']),
+                               float(bar['high']), float(bar['low']))
+
+    def update_day(self, day, open_: float, high: float, low: float) -> Tuple[float, float]:
+        """update() with the session key already known (any JSON value, e.g. epoch ns of midnight)"""
+        if day != self.day:
+            self.day = day
+            self.open, self.high, self.low = open_, high, low
+            self.bars = 0
+        else:
+            if high > self.high:
+                self.high = high
+            if low < self.low:
+                self.low = low
+        self.bars += 1
+        return self.high, self.low
+
+
+# =============================================================================
+# TREND RULE (rules.md)
+# =============================================================================
+
+class StreamingTrend(_Streaming):
+    """
+    Live uptrend/downtrend flags per rules.md, one close at a time:
+        uptrend   = EMA11 > EMA21 and slope(EMA21) > 10 deg
+        downtrend = EMA11 < EMA21 and slope(EMA21) < -10 deg
+    """
+    __slots__ = ('fast', 'slow', 'slope')
+
+    def __init__(self):
+        self.fast = StreamingEMA(indicators.FAST_PERIOD)
+        self.slow = StreamingEMA(indicators.SLOW_PERIOD)
+        self.slope = StreamingSlope(1)
+
+    def update(self, close: float) -> Tuple[bool, bool]:
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+        slope = self.slope.update(slow)
+        uptrend = fast > slow and slope > indicators.SLOPE_THRESHOLD
+        downtrend = fast < slow and slope < -indicators.SLOPE_THRESHOLD
+        return uptrend, downtrend
+
+    def manifest_state(self) -> Dict:
+        """State in the store manifest format ({'ema11', 'ema21'})"""
+        return {'ema11': self.fast.value, 'ema21': self.slow.value}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingTrend':
+        """Continue from a manifest state ({'ema11', 'ema21'})"""
+        trend = cls()
+        trend.fast.value = state['ema11']
+        trend.slow.value = state['ema21']
+        trend.slope.history.append(state['ema21'])
+        return trend
+
+    @classmethod
+    def from_history(cls, close) -> 'StreamingTrend':
+        """Warm start from a full close series (vectorized)"""
+        _, state = indicators.trend_columns(np.asarray(close, dtype='float64'))
+        return cls.from_state(state) if state else cls()
+
+    @classmethod
+    def from_store(cls, timeframe: str = '120min') -> 'StreamingTrend':
+        """
+        State after the last stored bar: read from the manifest when ingest
+        has recorded it, otherwise computed from the stored closes.
+        """
+        manifest = store.read_manifest(timeframe) if store.has_store(timeframe) else None
+        if manifest and manifest.get('state'):
+            return cls.from_state(manifest['state'])
+        return cls.from_history(store.load_bars(timeframe, columns=['close'])['close'])
@@ -0,0 +1,141 @@
+"""
+Trend-Rule Parameter Sweep
+==========================
+Scores every combination of the rules.md trend rule
+
+    bull = EMA(fast) > EMA(slow) and slope(EMA(slow), lookback) >  threshold
+    bear = EMA(fast) < EMA(slow) and slope(EMA(slow), lookback) < -threshold
+
+over grids of fast period, slow period, slope lookback and slope threshold.
+All EMAs are computed once as a (bars x periods) array and all slopes once
+per lookback; each (fast, slow, lookback) cell then scores every threshold
+with a few matrix products. Large grids are split across processes.
+
+Scoring is bars.evaluation.score_signals (as in trend_analysis_methods.py): a
+bull signal is correct if the close `forward_bars` later is higher, a bear
+signal if it is lower, and only bars with a full forward window are counted.
+
+    from bars import load_bars
+    from bars.sweep import trend_sweep
+    table = trend_sweep(load_bars('120min')['close'], range(5, 21), range(15, 61, 3),
+                        slope_lookbacks=[1, 2, 3], slope_thresholds=[0, 5, 10, 15, 20])
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .evaluation import SCORE_FIELDS, forward_return_pct, score_signals
+from .indicators import ema_periods, slope_degrees
+
+
+# Grids with fewer (fast, slow, lookback) cells than this run in-process
+PARALLEL_MIN_CELLS = 64
+
+RESULT_COLUMNS = ['fast', 'slow', 'slope_lookback', 'slope_threshold'] + SCORE_FIELDS
+
+
+# =============================================================================
+# SWEEP
+# =============================================================================
+
+# Shared by the scoring functions; set once per worker process
+_ARRAYS: Dict[str, np.ndarray] = {}
+
+
+def _init_arrays(emas, slopes, returns, thresholds):
+    _ARRAYS.update(
+        emas=emas,            # (bars, n_periods)
+        slopes=slopes,        # (n_lookbacks, bars, n_periods)
+        returns=returns,      # (bars,)
+        thresholds=np.asarray(thresholds, dtype='float64'),
+    )
+
+
+def _score_cells(cells: List[Tuple[int, int, int]]) -> List[Dict[str, np.ndarray]]:
+    """Score every threshold for each (fast col, slow col, lookback idx) cell"""
+    emas, slopes = _ARRAYS['emas'], _ARRAYS['slopes']
+    returns, thresholds = _ARRAYS['returns'], _ARRAYS['thresholds']
+
+    out = []
+    for fast, slow, lb in cells:
+        above = emas[:, fast] > emas[:, slow]
+        below = emas[:, fast] < emas[:, slow]
+        slope = slopes[lb, :, slow][:, np.newaxis]
+        bull = above[:, np.newaxis] & (slope > thresholds)
+        bear = below[:, np.newaxis] & (slope < -thresholds)
+        scores = score_signals(bull, bear, returns)
+        out.append({name: values[0] for name, values in scores.items()})
+    return out
+
+
+def trend_sweep(close,
+                fast_periods: Sequence[int],
+                slow_periods: Sequence[int],
+                slope_lookbacks: Sequence[int] = (1,),
+                slope_thresholds: Sequence[float] = (10.0,),
+                forward_bars: int = 12,
+                rank_by: str = 'overall_accuracy',
+                min_signals: int = 0,
+                workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Score all trend-rule parameter combinations on one close series.
+
+    Args:
+        close: Closing prices (e.g. load_bars('120min')['close'])
+        fast_periods / slow_periods: EMA spans; only fast < slow pairs are scored
+        slope_lookbacks: Bars over which the slow-EMA slope is measured
+        slope_thresholds: Minimum |slope| in degrees for a signal
+        forward_bars: Horizon of the forward return used for scoring
+        rank_by: Result column to sort by (descending)
+        min_signals: Drop combinations with fewer total signals
+        workers: Process count (default: all cores; 1 = no processes)
+
+    Returns:
+        One row per combination (RESULT_COLUMNS), best first
+    """
+    close = np.asarray(close, dtype='float64')
+    periods = sorted(set(fast_periods) | set(slow_periods))
+    col = {p: i for i, p in enumerate(periods)}
+    lookbacks = list(slope_lookbacks)
+    thresholds = np.asarray(slope_thresholds, dtype='float64')
+
+    emas = ema_periods(close, periods)
+    slopes = np.stack([slope_degrees(emas, lb) for lb in lookbacks])
+    returns = forward_return_pct(close, forward_bars)
+
+    cells = [(col[f], col[s], j)
+             for f in sorted(set(fast_periods))
+             for s in sorted(set(slow_periods)) if f < s
+             for j in range(len(lookbacks))]
+    if not cells:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(cells) >= PARALLEL_MIN_CELLS:
+        chunks = [cells[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_arrays,
+                                 initargs=(emas, slopes, returns, thresholds)) as pool:
+            parts = list(pool.map(_score_cells, chunks))
+        # Undo the round-robin split so rows follow `cells`
+        scored = [None] * len(cells)
+        for i, part in enumerate(parts):
+            scored[i::workers] = part
+    else:
+        _init_arrays(emas, slopes, returns, thresholds)
+        scored = _score_cells(cells)
+
+    n_thr = len(thresholds)
+    table = {name: np.concatenate([s[name] for s in scored]) for name in scored[0]}
+    table['fast'] = np.repeat([periods[f] for f, _, _ in cells], n_thr)
+    table['slow'] = np.repeat([periods[s] for _, s, _ in cells], n_thr)
+    table['slope_lookback'] = np.repeat([lookbacks[j] for _, _, j in cells], n_thr)
+    table['slope_threshold'] = np.tile(thresholds, len(cells))
+
+    result = pd.DataFrame(table)[RESULT_COLUMNS]
+    result = result[result['total_signals'] >= min_signals]
+    result = result.sort_values([rank_by, 'total_signals'], ascending=False, kind='stable')
+    return result.reset_index(drop=True)
@@ -2,94 +2,44 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_session_cube, high_low_curves
 
 # Configuration
-DATA_PATH = "../../data/nifty50_minute_complete-5min.csv"
 OUTPUT_DIR = "../../output/high_low_probability"
 OUTPUT_PLOT_PATH = os.path.join(OUTPUT_DIR, "high_low_probability.png")
 OUTPUT_CSV_PATH = os.path.join(OUTPUT_DIR, "high_low_probs.csv")
+OUTPUT_SURFACE_PATH = os.path.join(OUTPUT_DIR, "either_set_prob_by_offset.csv")
 
-def calculate_probabilities(df, offset=0):
-    """
-    Calculates the probability of having seen the day's high or low 
-    by a specific bar, given a noise offset.
-    
-    Logic:
-    - High is 'seen' if current_high + offset >= day_high
-    - Low is 'seen' if current_low - offset <= day_low
-    """
-    print(f"Calculating probabilities with offset: {offset}")
-    
-    calc_df = df.copy()
-
-    # Determine if the High/Low has been established (with offset)
-    calc_df['is_day_high_set'] = (calc_df['high_so_far'] + offset >= calc_df['day_high'])
-    calc_df['is_day_low_set'] = (calc_df['low_so_far'] - offset <= calc_df['day_low'])
-    calc_df['is_either_set'] = calc_df['is_day_high_set'] | calc_df['is_day_low_set']
-
-    # Aggregation
-    stats = calc_df.groupby('bar_index').agg(
-        high_set_count=('is_day_high_set', 'sum'),
-        low_set_count=('is_day_low_set', 'sum'),
-        either_set_count=('is_either_set', 'sum'),
-        total_days=('date_only', 'nunique')
-    ).reset_index()
-
-    # Calculate Probabilities
-    stats['prob_high_set'] = stats['high_set_count'] / stats['total_days']
-    stats['prob_low_set'] = stats['low_set_count'] / stats['total_days']
-    stats['prob_either_set'] = stats['either_set_count'] / stats['total_days']
-    
-    return stats
+# Offsets (points) covered by the probability surface
+MAX_OFFSET = 50
 
 def main():
-    if not os.path.exists(DATA_PATH):
-        print(f"Error: Data file not found at {DATA_PATH}")
-        return
-
     print("Loading data...")
     try:
-        df = pd.read_csv(DATA_PATH)
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
+        cube = load_session_cube('5min')
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error loading 5min bars: {e}")
         return
 
-    # 1. Parse Dates
-    if 'date' in df.columns:
-        dt_col = 'date'
-    elif 'datetime' in df.columns:
-        dt_col = 'datetime'
-    else:
-        print(f"Error: Could not find datetime column. Columns: {df.columns}")
-        return
+    print(f"Data loaded. Bars: {int(cube.mask.sum())}, Days: {cube.n_days}")
+    print(f"Range: {cube.dates[0]} to {cube.dates[-1]}")
 
-    print(f"Parsing datetime column '{dt_col}'...")
-    df['datetime'] = pd.to_datetime(df[dt_col])
-    df['date_only'] = df['datetime'].dt.date
+    # --- CALCULATE ALL OFFSETS ---
+    # Probability that the day's high/low has been seen by each bar
+    # (high_so_far + offset >= day_high, low_so_far - offset <= day_low),
+    # for every offset 0..MAX_OFFSET in one pass over the cube
+    print(f"Calculating probabilities for offsets 0-{MAX_OFFSET}")
+    curves = high_low_curves(cube, max_offset=MAX_OFFSET)
 
-    # 2. Sort Data
-    df = df.sort_values('datetime').reset_index(drop=True)
-
-    print(f"Data loaded. Rows: {len(df)}, Days: {df['date_only'].nunique()}")
-    print(f"Range: {df['date_only'].min()} to {df['date_only'].max()}")
-
-    # --- PRE-CALCULATE BASE METRICS ---
-    print("Pre-calculating daily metrics...")
-    
-    df['day_high'] = df.groupby('date_only')['high'].transform('max')
-    df['day_low'] = df.groupby('date_only')['low'].transform('min')
-    df['high_so_far'] = df.groupby('date_only')['high'].cummax()
-    df['low_so_far'] = df.groupby('date_only')['low'].cummin()
-    df['bar_index'] = df.groupby('date_only').cumcount() + 1
-
-    # --- CALCULATE BOTH SCENARIOS ---
-    
     # 1. Exact Match (Offset 0)
-    stats_exact = calculate_probabilities(df, offset=0)
+    stats_exact = curves.stats(0)
     
     # 2. Near Match (Offset 5)
     OFFSET_VAL = 5
-    stats_offset = calculate_probabilities(df, offset=OFFSET_VAL)
+    stats_offset = curves.stats(OFFSET_VAL)
 
     # --- PREPARE COMBINED DATA FOR CSV ---
     
@@ -123,6 +73,13 @@ def main():
     # Saving only the requested columns (bar_index and probs), count columns were already dropped in the merge selection above
     combined_stats.to_csv(OUTPUT_CSV_PATH, index=False)
 
+    # Either-set probability for every offset (rows) and bar (columns)
+    print(f"Saving offset surface to {OUTPUT_SURFACE_PATH}...")
+    surface = pd.DataFrame(curves.probability('either'),
+                           columns=[f'bar_{i}' for i in range(1, curves.n_bars + 1)])
+    surface.insert(0, 'offset', curves.offsets)
+    surface.to_csv(OUTPUT_SURFACE_PATH, index=False)
+
     # --- VISUALIZATION ---
     print(f"Generating plot to {OUTPUT_PLOT_PATH}...")
     
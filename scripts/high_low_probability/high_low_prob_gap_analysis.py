@@ -2,64 +2,46 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars
+from bars.features import first_bar_features
+from bars.highlow import bar_masked_curves
+from bars.scenarios import scenario_masks
 
 # Configuration
-DATA_PATH = "../../data/nifty50_minute_complete-5min.csv"
 OUTPUT_DIR = "../../output/gap_analysis"
+OFFSET_VAL = 10  # Near-match offset (points)
 
-def calculate_probabilities(df, offset=0):
-    """
-    Calculates the probability of having seen the day's high or low 
-    by a specific bar, given a noise offset.
-    """
-    # print(f"  Calculating probabilities with offset: {offset}")
-    
-    calc_df = df.copy()
-
-    # Determine if the High/Low has been established (with offset)
-    calc_df['is_day_high_set'] = (calc_df['high_so_far'] + offset >= calc_df['day_high'])
-    calc_df['is_day_low_set'] = (calc_df['low_so_far'] - offset <= calc_df['day_low'])
-    calc_df['is_either_set'] = calc_df['is_day_high_set'] | calc_df['is_day_low_set']
-
-    # Aggregation
-    stats = calc_df.groupby('bar_index').agg(
-        high_set_count=('is_day_high_set', 'sum'),
-        low_set_count=('is_day_low_set', 'sum'),
-        either_set_count=('is_either_set', 'sum'),
-        total_days=('date_only', 'nunique')
-    ).reset_index()
-
-    # Calculate Probabilities
-    stats['prob_high_set'] = stats['high_set_count'] / stats['total_days']
-    stats['prob_low_set'] = stats['low_set_count'] / stats['total_days']
-    stats['prob_either_set'] = stats['either_set_count'] / stats['total_days']
-    
-    return stats
+# Scenarios as data (bars.scenarios); gap in points from the previous close,
+# wick = largest allowed wick against the bar's direction, as a fraction of its range
+SCENARIOS = {
+    # 1. 50-bull: Gap >= 50, Bullish, Upper Wick <= 10%
+    "50-bull": {'gap': {'>=': 50}, 'direction': 'bull', 'wick': 0.10},
+    # 2. 50-anybar: Gap >= 50
+    "50-anybar": {'gap': {'>=': 50}},
+    # 3. 50-bear: Gap >= 50, Bearish, Lower Wick <= 10%
+    "50-bear": {'gap': {'>=': 50}, 'direction': 'bear', 'wick': 0.10},
+}
 
-def run_scenario(df, scenario_name, filter_indices):
+def run_scenario(curves, scenario_name, n_days):
     """
-    Runs the probability analysis for a specific subset of dates.
+    Runs the probability analysis for one scenario from its curves
+    (bar_masked_curves over the scenario's days).
     """
     print(f"\n=== Processing Scenario: {scenario_name} ===")
     
-    # Filter the main DataFrame to only keep valid dates
-    # We filter by 'date_only' found in the filtered first bars
-    valid_dates = filter_indices
-    print(f"Days matching criteria: {len(valid_dates)}")
+    print(f"Days matching criteria: {n_days}")
 
-    if len(valid_dates) == 0:
+    if n_days == 0:
         print("No days matched the criteria. Skipping.")
         return
 
-    df_filtered = df[df['date_only'].isin(valid_dates)].copy()
-
     # --- CALCULATE BOTH SCENARIOS ---
-    # 1. Exact Match (Offset 0)
-    stats_exact = calculate_probabilities(df_filtered, offset=0)
-    
-    # 2. Near Match (Offset 10)
-    OFFSET_VAL = 10
-    stats_offset = calculate_probabilities(df_filtered, offset=OFFSET_VAL)
+    # Offset 0 (exact) and OFFSET_VAL (near match) of the same curves
+    stats_exact = curves.stats(0)
+    stats_offset = curves.stats(OFFSET_VAL)
 
     # --- MERGE ---
     combined_stats = pd.merge(
@@ -101,7 +83,7 @@ def run_scenario(df, scenario_name, filter_indices):
     plt.plot(plot_data['bar_index'], plot_data[f'prob_low_set_offset_{OFFSET_VAL}'], label=f'Low Set (+/- {OFFSET_VAL})', color='red', linewidth=2, linestyle='--', alpha=0.7)
     plt.plot(plot_data['bar_index'], plot_data[f'prob_either_set_offset_{OFFSET_VAL}'], label=f'Total Prob (+/- {OFFSET_VAL})', color='gray', linewidth=4, linestyle='--')
 
-    plt.title(f'Probabilities: {scenario_name} (N={len(valid_dates)})', fontsize=16)
+    plt.title(f'Probabilities: {scenario_name} (N={n_days})', fontsize=16)
     plt.xlabel('Bar Index (5-min intervals)', fontsize=12)
     plt.ylabel('Probability (0.0 - 1.0)', fontsize=12)
     plt.legend(fontsize=10)
@@ -113,92 +95,36 @@ def run_scenario(df, scenario_name, filter_indices):
     plt.close() # Close figure to free memory
 
 def main():
-    if not os.path.exists(DATA_PATH):
-        print(f"Error: Data file not found at {DATA_PATH}")
-        return
-
     print("Loading data...")
     try:
-        df = pd.read_csv(DATA_PATH)
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
-        return
-
-    # 1. Parse Dates
-    if 'date' in df.columns:
-        dt_col = 'date'
-    elif 'datetime' in df.columns:
-        dt_col = 'datetime'
-    else:
-        print(f"Error: Could not find datetime column. Columns: {df.columns}")
+        df = load_bars('5min')
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error loading 5min bars: {e}")
         return
 
-    print(f"Parsing datetime column '{dt_col}'...")
-    df['datetime'] = pd.to_datetime(df[dt_col])
+    # Bars come back parsed and sorted by time
+    df['datetime'] = df['date']
     df['date_only'] = df['datetime'].dt.date
 
-    # 2. Sort Data
-    df = df.sort_values('datetime').reset_index(drop=True)
-
     print(f"Data loaded. Rows: {len(df)}, Days: {df['date_only'].nunique()}")
 
     # --- PRE-CALCULATE BASE METRICS ---
     print("Pre-calculating daily metrics...")
-    
-    df['day_high'] = df.groupby('date_only')['high'].transform('max')
-    df['day_low'] = df.groupby('date_only')['low'].transform('min')
-    df['high_so_far'] = df.groupby('date_only')['high'].cummax()
-    df['low_so_far'] = df.groupby('date_only')['low'].cummin()
-    df['bar_index'] = df.groupby('date_only').cumcount() + 1
-
-    # --- PREPARE 1ST BARS FOR FILTERING ---
-    df['prev_close'] = df['close'].shift(1)
-    
-    # Extract 1st bars of every day
-    # Note: Shift works correctly because data is sorted.
-    # For the very first row of dataset, prev_close is NaN, which is handled fine.
-    first_bars = df[df['bar_index'] == 1].copy()
-
-    # Common metrics
-    first_bars['gap'] = first_bars['open'] - first_bars['prev_close']
-    first_bars['candle_len'] = first_bars['high'] - first_bars['low']
-    first_bars['upper_wick'] = first_bars['high'] - first_bars['close']
-    first_bars['lower_wick'] = first_bars['close'] - first_bars['low']
-    first_bars['is_bull'] = first_bars['close'] > first_bars['open']
-    first_bars['is_bear'] = first_bars['close'] < first_bars['open']
-
-    # --- DEFINE SCENARIOS ---
-    
-    # 1. 50-bull: Gap >= 50, Bullish, Upper Wick <= 10%
-    cond_50_bull = (
-        (first_bars['gap'] >= 50) & 
-        (first_bars['is_bull']) & 
-        (first_bars['upper_wick'] <= 0.10 * first_bars['candle_len']) & 
-        (first_bars['candle_len'] > 0)
-    )
-    
-    # 2. 50-anybar: Gap >= 50
-    cond_50_any = (first_bars['gap'] >= 50)
-    
-    # 3. 50-bear: Gap >= 50, Bearish, Lower Wick <= 10%
-    cond_50_bear = (
-        (first_bars['gap'] >= 50) & 
-        (first_bars['is_bear']) & 
-        (first_bars['lower_wick'] <= 0.10 * first_bars['candle_len']) & 
-        (first_bars['candle_len'] > 0)
-    )
 
-    scenarios = [
-        ("50-bull", first_bars[cond_50_bull]['date_only'].unique()),
-        ("50-anybar", first_bars[cond_50_any]['date_only'].unique()),
-        ("50-bear", first_bars[cond_50_bear]['date_only'].unique())
-    ]
+    # 1st bar of every day with its gap from the previous bar's close
+    # (NaN for the very first day of the dataset, which matches no scenario)
+    features = first_bar_features(df)
+
+    # All scenario masks in one pass over the features, then one set of
+    # curves per scenario
+    masks = scenario_masks(features, SCENARIOS)
+    curves = bar_masked_curves(df, masks, max_offset=OFFSET_VAL)
 
     # --- RUN LOOP ---
-    for name, dates in scenarios:
-        run_scenario(df, name, dates)
+    for name in SCENARIOS:
+        run_scenario(curves[name], name, int(masks[name].sum()))
 
     print("\nAll scenarios completed.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import StreamingTrend, load_bars, load_session_cube
+from bars.live import LiveHighLowEngine, csv_feed, live_probability_table, socket_feed
+
+# Live "high / low already set" probabilities, bar by bar, for a stream of
+# 5-min bars: a CSV replayed as a stand-in for the broker feed, or JSON-line
+# bars from a local socket ({"date": ..., "open": ..., ...} per line).
+#
+# The table comes from the full 5-min history (trend x gap bucket x first-bar
+# type, as in high_low_prob_trend_analysis.py); the trend and previous close
+# continue from the end of the store unless --fresh is given.
+#
+#   python high_low_probability/live_high_low.py --csv today.csv
+#   python high_low_probability/live_high_low.py --socket 127.0.0.1:9000
+
+OFFSETS = (0, 10)
+
+
+async def print_updates(queue):
+    while (update := await queue.get()) is not None:
+        u = update
+        print(f"{u.date:%Y-%m-%d %H:%M} bar {u.bar_index + 1:>2} | H {u.high_so_far:.2f} L {u.low_so_far:.2f} | "
+              f"{u.trend or '-'} {u.gap_bucket or '-'} {u.first_bar} ({u.days} days) | "
+              + " | ".join(f"+{o}: high {_pct(h)} low {_pct(l)} either {_pct(e)}"
+                           for o, h, l, e in zip(u.offsets, u.prob_high_set, u.prob_low_set,
+                                                 u.prob_either_set))
+              + f" | {u.latency_us:.0f}us")
+
+
+def _pct(p):
+    return "  n/a" if p is None else f"{p:5.1%}"
+
+
+async def main(args):
+    print("Building probability table from the 5-min history...")
+    table = live_probability_table(load_session_cube('5min'), OFFSETS)
+    if args.fresh:
+        trend, prev_close = None, None
+    else:
+        trend = StreamingTrend.from_store('120min')
+        prev_close = float(load_bars('5min', columns=['close'])['close'].iloc[-1])
+
+    engine = LiveHighLowEngine(table, trend=trend, prev_close=prev_close, budget_us=args.budget_us)
+    printer = asyncio.create_task(print_updates(engine.subscribe()))
+    if args.socket:
+        host, port = args.socket.rsplit(':', 1)
+        feed = socket_feed(host, int(port))
+    else:
+        feed = csv_feed(args.csv, args.interval)
+    await engine.run(feed)
+    await printer
+    print(f"\nPer-bar latency: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live high/low-set probabilities for a 5-min bar stream")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="Replay bars from a CSV (date/datetime, open, high, low, close)")
+    source.add_argument('--socket', help="Read JSON-line bars from HOST:PORT")
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds between replayed bars")
+    parser.add_argument('--budget-us', type=float, default=1000.0, help="Per-bar latency budget")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Start without the store's trend state and last close")
+    asyncio.run(main(parser.parse_args()))
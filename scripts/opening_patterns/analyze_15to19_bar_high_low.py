@@ -1,112 +1,42 @@
 import pandas as pd
 import numpy as np
-import math
 import os
+import sys
 
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
-
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_daily_trends, load_session_cube, range_table
 
 def analyze_15to19_bar_high_low():
     # 1. Load 2hr data for Trend
     print("Loading 120min data for trend analysis...")
-    df_2hr = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-    df_2hr['date'] = pd.to_datetime(df_2hr['date'])
-    df_2hr = df_2hr.sort_values('date').reset_index(drop=True)
-
-    df_2hr['ema11'] = calculate_ema(df_2hr['close'], 11)
-    df_2hr['ema21'] = calculate_ema(df_2hr['close'], 21)
-    df_2hr['ema21_slope'] = calculate_slope_degrees(df_2hr['ema21'].values, lookback=1)
-
-    df_2hr['is_bull_trend'] = (df_2hr['ema11'] > df_2hr['ema21']) & (df_2hr['ema21_slope'] > 10)
-    df_2hr['is_bear_trend'] = (df_2hr['ema11'] < df_2hr['ema21']) & (df_2hr['ema21_slope'] < -10)
-
-    df_2hr['day_date'] = df_2hr['date'].dt.date
-    daily_trend_map = {}
-    
-    for day, day_data in df_2hr.groupby('day_date'):
-        start_bar = day_data[day_data['date'].dt.time == pd.to_datetime('09:15:00').time()]
-        if not start_bar.empty:
-            is_bull = start_bar.iloc[0]['is_bull_trend']
-            is_bear = start_bar.iloc[0]['is_bear_trend']
-            if is_bull:
-                daily_trend_map[day] = 'BULL'
-            elif is_bear:
-                daily_trend_map[day] = 'BEAR'
-            else:
-                daily_trend_map[day] = 'SIDEWAYS'
+    # Trend at the day's 09:15 2-hour bar (method1), from the shared label table
+    daily_trend = load_daily_trends().set_index('date')['method1_0915']
     
     # 2. Load 5min data for High/Low Analysis
     print("Loading 5min data for granular analysis...")
-    df_5min = pd.read_csv('../../data/nifty50_minute_complete-5min.csv')
-    df_5min['datetime'] = pd.to_datetime(df_5min['date'])
-    df_5min['day'] = df_5min['datetime'].dt.date
+    cube = load_session_cube('5min')
+    trend = daily_trend.reindex(pd.to_datetime(cube.dates)).to_numpy()
+    
+    # Bars 15 to 19 (slots 14-18, 10:25 - 10:45): the global day high / low
+    # occurred within these bars. Days need at least 20 bars.
+    # Window high / low of every day from the cube's sparse range table
+    ranges = range_table(cube)
+    high_in_window = ranges.contains_high(14, 18)
+    low_in_window = ranges.contains_low(14, 18)
+    day_open, day_close = cube.day_open(), cube.day_close()
+    enough_bars = cube.bar_count() >= 20
     
-    # Statistics Storage
+    # Statistics
+    bull_days = (trend == 'BULL') & enough_bars
+    bear_days = (trend == 'BEAR') & enough_bars
     results = {
-        'BULL': {'total_days': 0, 'high_in_window': 0, 'reversal_bear_close': 0},
-        'BEAR': {'total_days': 0, 'low_in_window': 0, 'reversal_bull_close': 0}
+        'BULL': {'total_days': int(bull_days.sum()),
+                 'high_in_window': int((bull_days & high_in_window).sum()),
+                 'reversal_bear_close': int((bull_days & high_in_window & (day_close < day_open)).sum())},
+        'BEAR': {'total_days': int(bear_days.sum()),
+                 'low_in_window': int((bear_days & low_in_window).sum()),
+                 'reversal_bull_close': int((bear_days & low_in_window & (day_close > day_open)).sum())}
     }
-    
-    daily_groups = df_5min.groupby('day')
-    
-    for day, group in daily_groups:
-        if day not in daily_trend_map:
-            continue
-            
-        trend = daily_trend_map[day]
-        if trend == 'SIDEWAYS':
-            continue
-            
-        group = group.sort_values('datetime')
-        
-        # We need bars 15 to 19 (indices 14 to 18)
-        # Assuming standard day starts at 09:15
-        # Bar 1: 09:15, Bar 15: 10:25, Bar 19: 10:45
-        
-        if len(group) < 20:
-            continue
-            
-        day_open = group.iloc[0]['open']
-        day_close = group.iloc[-1]['close']
-        day_high = group['high'].max()
-        day_low = group['low'].min()
-        
-        # Extract the window
-        # Indices are 0-based, so bar 15 is index 14
-        # Range 15-19 means indices 14, 15, 16, 17, 18
-        window_bars = group.iloc[14:19] 
-        
-        window_high = window_bars['high'].max()
-        window_low = window_bars['low'].min()
-        
-        if trend == 'BULL':
-            results['BULL']['total_days'] += 1
-            # Check if Day High was made EXCLUSIVELY in this window?
-            # Or just established there? User said "established exactly between"
-            # Standard interpretation: The global Day High occurred within these bars.
-            if window_high == day_high:
-                results['BULL']['high_in_window'] += 1
-                if day_close < day_open:
-                    results['BULL']['reversal_bear_close'] += 1
-                    
-        elif trend == 'BEAR':
-            results['BEAR']['total_days'] += 1
-            if window_low == day_low:
-                results['BEAR']['low_in_window'] += 1
-                if day_close > day_open:
-                    results['BEAR']['reversal_bull_close'] += 1
 
     # 3. Append to Report
     print("Appending to analysis file...")
@@ -1,61 +1,42 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import color_codes, load_session_cube, pattern_labels
+
+# First two bars by color pattern (bars.patterns, base 3). Strict
+# inequality, so a flat/doji bar is neither bull nor bear and goes to 'other'
+CATEGORIES = {
+    'two_bulls': ['Bull-Bull'],
+    'two_bears': ['Bear-Bear'],
+    'opposite': ['Bull-Bear', 'Bear-Bull'],
+}
 
 def analyze_30min_patterns():
     # Load the data
-    file_path = '../../data/nifty50_minute_2022-30min.csv'
-    df = pd.read_csv(file_path)
-    
-    # Parse date column
-    df['datetime'] = pd.to_datetime(df['date'])
-    df['day'] = df['datetime'].dt.date
-    
-    # Group by day
-    daily_groups = df.groupby('day')
-    
-    two_bulls = []
-    two_bears = []
-    opposite = []
-    other = [] # For cases where one might be flat/doji
+    cube = load_session_cube('30min')
+
+    # Pattern code of the first 2 bars of every day (-1 if one is missing)
+    codes = color_codes(cube, start=0, length=2)
+    labels = np.array(pattern_labels(2), dtype=object)[codes]
+    labels[codes < 0] = None
+    dates = np.array([str(day) for day in cube.date_list()], dtype=object)
     
-    for day, group in daily_groups:
-        # Sort by time just in case
-        group = group.sort_values('datetime')
-        
-        # We need at least 2 bars
-        if len(group) < 2:
-            continue
-            
-        bar1 = group.iloc[0]
-        bar2 = group.iloc[1]
-        
-        # Define bullish/bearish
-        # Using strict inequality, so flat is treated as neither (will go to 'opposite' logic check or 'other')
-        b1_bull = bar1['close'] > bar1['open']
-        b1_bear = bar1['close'] < bar1['open']
-        
-        b2_bull = bar2['close'] > bar2['open']
-        b2_bear = bar2['close'] < bar2['open']
-        
-        date_str = str(day)
-        
-        if b1_bull and b2_bull:
-            two_bulls.append(date_str)
-        elif b1_bear and b2_bear:
-            two_bears.append(date_str)
-        elif (b1_bull and b2_bear) or (b1_bear and b2_bull):
-            opposite.append(date_str)
-        else:
-            # Contains a flat/doji bar
-            other.append(date_str)
-            
+    two_bulls = list(dates[np.isin(labels, CATEGORIES['two_bulls'])])
+    two_bears = list(dates[np.isin(labels, CATEGORIES['two_bears'])])
+    opposite = list(dates[np.isin(labels, CATEGORIES['opposite'])])
+    # Contains a flat/doji bar
+    other = list(dates[(codes >= 0) & ~np.isin(labels, sum(CATEGORIES.values(), []))])
+
     # Output results
-    print(f"Total Days Analyzed: {len(daily_groups)}")
+    print(f"Total Days Analyzed: {cube.n_days}")
     print("-" * 30)
-    print(f"2 Bull Bars: {len(two_bulls)} days ({len(two_bulls)/len(daily_groups):.2%})")
-    print(f"2 Bear Bars: {len(two_bears)} days ({len(two_bears)/len(daily_groups):.2%})")
-    print(f"Opposite:    {len(opposite)} days ({len(opposite)/len(daily_groups):.2%})")
-    print(f"Other (Doji): {len(other)} days ({len(other)/len(daily_groups):.2%})")
+    print(f"2 Bull Bars: {len(two_bulls)} days ({len(two_bulls)/cube.n_days:.2%})")
+    print(f"2 Bear Bars: {len(two_bears)} days ({len(two_bears)/cube.n_days:.2%})")
+    print(f"Opposite:    {len(opposite)} days ({len(opposite)/cube.n_days:.2%})")
+    print(f"Other (Doji): {len(other)} days ({len(other)/cube.n_days:.2%})")
     
     # Save lists to files for inspection
     os.makedirs('output', exist_ok=True)
@@ -1,125 +1,46 @@
 import pandas as pd
 import numpy as np
-import math
 import os
+import sys
 
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import color_codes, day_outcomes, load_daily_trends, load_session_cube, pattern_outcomes
 
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
+# The 8 flat-free patterns of the 09:15, 09:45 and 10:15 bars (table order)
+PATTERNS = [
+    'Bull-Bull-Bull',
+    'Bull-Bull-Bear',
+    'Bull-Bear-Bull',
+    'Bear-Bull-Bull',
+    'Bull-Bear-Bear',
+    'Bear-Bull-Bear',
+    'Bear-Bear-Bull',
+    'Bear-Bear-Bear'
+]
 
 def analyze_3bar_patterns():
     # 1. Load and process 2hr data for Trend
     print("Loading 120min data for trend analysis...")
-    df_2hr = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-    df_2hr['date'] = pd.to_datetime(df_2hr['date'])
-    df_2hr = df_2hr.sort_values('date').reset_index(drop=True)
-
-    # Calculate Indicators
-    df_2hr['ema11'] = calculate_ema(df_2hr['close'], 11)
-    df_2hr['ema21'] = calculate_ema(df_2hr['close'], 21)
-    df_2hr['ema21_slope'] = calculate_slope_degrees(df_2hr['ema21'].values, lookback=1)
-
-    # Determine Trend
-    df_2hr['is_bull_trend'] = (df_2hr['ema11'] > df_2hr['ema21']) & (df_2hr['ema21_slope'] > 10)
-    df_2hr['is_bear_trend'] = (df_2hr['ema11'] < df_2hr['ema21']) & (df_2hr['ema21_slope'] < -10)
-
-    # Map Date -> Trend
-    df_2hr['day_date'] = df_2hr['date'].dt.date
-    daily_trend_map = {}
-    
-    for day, day_data in df_2hr.groupby('day_date'):
-        start_bar = day_data[day_data['date'].dt.time == pd.to_datetime('09:15:00').time()]
-        if not start_bar.empty:
-            is_bull = start_bar.iloc[0]['is_bull_trend']
-            is_bear = start_bar.iloc[0]['is_bear_trend']
-            if is_bull:
-                daily_trend_map[day] = 'BULL'
-            elif is_bear:
-                daily_trend_map[day] = 'BEAR'
-            else:
-                daily_trend_map[day] = 'SIDEWAYS'
+    # Trend at the day's 09:15 2-hour bar (method1), from the shared label table
+    daily_trend = load_daily_trends().set_index('date')['method1_0915']
     
     # 2. Load and process 30min data
     print("Loading 30min data for pattern analysis...")
-    df_30min = pd.read_csv('../../data/nifty50_minute_2022-30min.csv')
-    df_30min['datetime'] = pd.to_datetime(df_30min['date'])
-    df_30min['day'] = df_30min['datetime'].dt.date
-    
-    # Define all 8 patterns
-    patterns = [
-        'Bull-Bull-Bull',
-        'Bull-Bull-Bear',
-        'Bull-Bear-Bull',
-        'Bear-Bull-Bull',
-        'Bull-Bear-Bear',
-        'Bear-Bull-Bear',
-        'Bear-Bear-Bull',
-        'Bear-Bear-Bear'
-    ]
+    cube = load_session_cube('30min')
+    trend = daily_trend.reindex(pd.to_datetime(cube.dates))
     
-    # Storage
+    # Every day's first-3-bar pattern (bull / flat / bear) and close, counted
+    # per trend x pattern in one grouped aggregation
+    codes = color_codes(cube, start=0, length=3)
+    outcomes = day_outcomes(cube, 0, 3)[['day_bull', 'day_bear']]
+    table = pattern_outcomes(codes, 3, outcomes, by={'trend': trend})
     stats = {
-        'BULL': {p: {'total': 0, 'bull_close': 0, 'bear_close': 0} for p in patterns},
-        'BEAR': {p: {'total': 0, 'bull_close': 0, 'bear_close': 0} for p in patterns}
+        t: {p: {'total': int(table.at[(t, p), 'days']),
+                'bull_close': int(table.at[(t, p), 'day_bull']),
+                'bear_close': int(table.at[(t, p), 'day_bear'])} for p in PATTERNS}
+        for t in ['BULL', 'BEAR']
     }
-    
-    daily_groups = df_30min.groupby('day')
-    
-    for day, group in daily_groups:
-        if day not in daily_trend_map:
-            continue
-            
-        trend = daily_trend_map[day]
-        if trend == 'SIDEWAYS':
-            continue
-            
-        group = group.sort_values('datetime')
-        if len(group) < 3:
-            continue
-            
-        # Get first 3 bars
-        bars = [group.iloc[0], group.iloc[1], group.iloc[2]]
-        
-        # Determine types
-        types = []
-        for b in bars:
-            if b['close'] > b['open']:
-                types.append('Bull')
-            elif b['close'] < b['open']:
-                types.append('Bear')
-            else:
-                types.append('Flat')
-                
-        if 'Flat' in types:
-            continue
-            
-        pattern_str = "-".join(types)
-        
-        # Determine Day Outcome
-        day_open = group.iloc[0]['open']
-        day_close = group.iloc[-1]['close']
-        
-        day_is_bull = day_close > day_open
-        day_is_bear = day_close < day_open
-        
-        if pattern_str in stats[trend]:
-            stats[trend][pattern_str]['total'] += 1
-            if day_is_bull:
-                stats[trend][pattern_str]['bull_close'] += 1
-            elif day_is_bear:
-                stats[trend][pattern_str]['bear_close'] += 1
-            
+
     # 3. Append to existing Markdown Report
     print("Appending to analysis file...")
     
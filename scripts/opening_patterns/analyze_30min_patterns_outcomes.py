@@ -1,59 +1,19 @@
-import pandas as pd
-import numpy as np
-import math
 import os
+import sys
 
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
-
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, load_trend_map
 
 def analyze_patterns_and_outcomes():
     # 1. Load and process 2hr data for Trend
     print("Loading 120min data for trend analysis...")
-    df_2hr = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-    df_2hr['date'] = pd.to_datetime(df_2hr['date'])
-    df_2hr = df_2hr.sort_values('date').reset_index(drop=True)
-
-    # Calculate Indicators
-    df_2hr['ema11'] = calculate_ema(df_2hr['close'], 11)
-    df_2hr['ema21'] = calculate_ema(df_2hr['close'], 21)
-    df_2hr['ema21_slope'] = calculate_slope_degrees(df_2hr['ema21'].values, lookback=1)
-
-    # Determine Trend
-    df_2hr['is_bull_trend'] = (df_2hr['ema11'] > df_2hr['ema21']) & (df_2hr['ema21_slope'] > 10)
-    df_2hr['is_bear_trend'] = (df_2hr['ema11'] < df_2hr['ema21']) & (df_2hr['ema21_slope'] < -10)
-
-    # Map Date -> Trend
-    df_2hr['day_date'] = df_2hr['date'].dt.date
-    daily_trend_map = {}
-    
-    for day, day_data in df_2hr.groupby('day_date'):
-        start_bar = day_data[day_data['date'].dt.time == pd.to_datetime('09:15:00').time()]
-        if not start_bar.empty:
-            is_bull = start_bar.iloc[0]['is_bull_trend']
-            is_bear = start_bar.iloc[0]['is_bear_trend']
-            if is_bull:
-                daily_trend_map[day] = 'BULL'
-            elif is_bear:
-                daily_trend_map[day] = 'BEAR'
-            else:
-                daily_trend_map[day] = 'SIDEWAYS'
+    # Trend at the day's 09:15 2-hour bar (method1), from the shared label table
+    daily_trend_map = load_trend_map('method1_0915')
     
     # 2. Load and process 30min data
     print("Loading 30min data for pattern analysis...")
-    df_30min = pd.read_csv('../../data/nifty50_minute_2022-30min.csv')
-    df_30min['datetime'] = pd.to_datetime(df_30min['date'])
+    df_30min = load_bars('30min')
+    df_30min['datetime'] = df_30min['date']
     df_30min['day'] = df_30min['datetime'].dt.date
     
     # Storage for analysis
@@ -1,70 +1,49 @@
 import pandas as pd
 import numpy as np
-
-# Read the CSV file
-df = pd.read_csv('../../data/nifty50_minute_complete-5min.csv')
-df['date'] = pd.to_datetime(df['date'])
-
-# Extract date and time components
-df['trading_date'] = df['date'].dt.date
-df['time'] = df['date'].dt.time
-
-# Get first 30 minutes (6 bars) for each day
-# First 30 minutes: 09:15, 09:20, 09:25, 09:30, 09:35, 09:40
-first_30_min_times = [
-    pd.to_datetime('09:15:00').time(),
-    pd.to_datetime('09:20:00').time(),
-    pd.to_datetime('09:25:00').time(),
-    pd.to_datetime('09:30:00').time(),
-    pd.to_datetime('09:35:00').time(),
-    pd.to_datetime('09:40:00').time()
-]
-
-# Get last bar of each day (15:25:00 typically)
-last_bar_time = pd.to_datetime('15:25:00').time()
-
-# Group by trading date
-results = []
-
-for trading_date, day_data in df.groupby('trading_date'):
-    # Get first 30 minutes data
-    first_30_min = day_data[day_data['time'].isin(first_30_min_times)].copy()
-
-    # Skip if we don't have exactly 6 bars
-    if len(first_30_min) != 6:
-        continue
-
-    # Determine if each bar is bullish or bearish
-    first_30_min['is_bull'] = first_30_min['close'] > first_30_min['open']
-
-    # Get first 3 bars (09:15, 09:20, 09:25)
-    first_3_bars = first_30_min.iloc[:3]
-
-    # Check if all 3 consecutive bars are bull or bear
-    all_bull = first_3_bars['is_bull'].all()
-    all_bear = (~first_3_bars['is_bull']).all()
-
-    # Get day's open and close
-    day_open = day_data.iloc[0]['open']
-    last_bar = day_data[day_data['time'] == last_bar_time]
-
-    if len(last_bar) == 0:
-        # If no 15:25 bar, use the last available bar
-        day_close = day_data.iloc[-1]['close']
-    else:
-        day_close = last_bar.iloc[0]['close']
-
-    day_is_bull = day_close > day_open
-
-    results.append({
-        'date': trading_date,
-        'first_3_all_bull': all_bull,
-        'first_3_all_bear': all_bear,
-        'day_close_bull': day_is_bull,
-        'day_open': day_open,
-        'day_close': day_close,
-        'day_change': day_close - day_open
-    })
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, load_session_index
+
+# Read the 5-min bars and their per-day row offsets
+df = load_bars('5min')
+idx = load_session_index('5min')
+
+# Minute of day of every bar, positioned within its session
+minute = (df['date'].dt.hour * 60 + df['date'].dt.minute).to_numpy()
+day_ids = idx.day_ids()
+bar_no = idx.bar_number()
+
+# First 30 minutes (6 bars): 09:15, 09:20, 09:25, 09:30, 09:35, 09:40
+# A day qualifies only if its first 6 rows are exactly those times
+first_30_min_minutes = 9 * 60 + 15 + 5 * np.arange(6)
+in_first_30 = (bar_no < 6) & (minute == first_30_min_minutes[np.minimum(bar_no, 5)])
+has_first_30 = np.add.reduceat(in_first_30, idx.start) == 6
+
+# Determine if each bar is bullish or bearish, then check the first 3 bars of each day
+is_bull = (df['close'] > df['open']).to_numpy()
+first_3 = np.column_stack([idx.nth(is_bull, k) for k in range(3)]).astype(bool)
+all_bull = first_3.all(axis=1)
+all_bear = (~first_3).all(axis=1)
+
+# Day's open and close (15:25 bar if present, else the last available bar)
+close = df['close'].to_numpy()
+day_open = idx.first(df['open'].to_numpy())
+day_close = idx.last(close)
+at_last_bar_time = minute == 15 * 60 + 25
+day_close[day_ids[at_last_bar_time]] = close[at_last_bar_time]
+
+keep = has_first_30
+results = {
+    'date': np.array(idx.date_list(), dtype=object)[keep],
+    'first_3_all_bull': all_bull[keep],
+    'first_3_all_bear': all_bear[keep],
+    'day_close_bull': (day_close > day_open)[keep],
+    'day_open': day_open[keep],
+    'day_close': day_close[keep],
+    'day_change': (day_close - day_open)[keep],
+}
 
 results_df = pd.DataFrame(results)
 
@@ -1,38 +1,13 @@
 import pandas as pd
 import numpy as np
-import math
+import os
+import sys
 
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, load_day_features
 
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
-
-def is_strong_bear_candle(candle, max_wick_pct=0.30):
-    """Check if candle is strong bear (lower wick < 10% of total candle)"""
-    total_range = candle['high'] - candle['low']
-    if total_range == 0:
-        return False
-
-    # For bear candle: close < open
-    # Lower wick = close - low
-    is_bear = candle['close'] < candle['open']
-    if not is_bear:
-        return False
-
-    lower_wick = candle['close'] - candle['low']
-    wick_pct = lower_wick / total_range
-
-    return wick_pct <= max_wick_pct
+# Strong bear first bar: lower wick <= this fraction of the bar's range
+STRONG_BEAR_WICK = 0.30
 
 def find_plateau(prices, start_idx, min_bars=6, max_range_pct=0.005):
     """
@@ -107,95 +82,50 @@ def classify_day_pattern(day_data):
     # Default: Early Bounce Fade
     return "Case 1: Early Bounce Fade", high_bar, low_bar
 
-# Read 2hr data
-df_2hr = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-df_2hr['date'] = pd.to_datetime(df_2hr['date'])
-df_2hr = df_2hr.sort_values('date').reset_index(drop=True)
-
-df_2hr['ema11'] = calculate_ema(df_2hr['close'], 11)
-df_2hr['ema21'] = calculate_ema(df_2hr['close'], 21)
-df_2hr['ema21_slope'] = calculate_slope_degrees(df_2hr['ema21'].values, lookback=1)
-
-df_2hr['is_bull_trend'] = (df_2hr['ema11'] > df_2hr['ema21']) & (df_2hr['ema21_slope'] > 10)
-df_2hr['is_bear_trend'] = (df_2hr['ema11'] < df_2hr['ema21']) & (df_2hr['ema21_slope'] < -10)
-
-df_2hr['trading_date'] = df_2hr['date'].dt.date
-
-daily_trend = df_2hr[df_2hr['date'].dt.time == pd.to_datetime('09:15:00').time()][['trading_date', 'is_bull_trend', 'is_bear_trend']].copy()
-
-# Read 5min data
-df_5min = pd.read_csv('../../data/nifty50_minute_complete-5min.csv')
-df_5min['date'] = pd.to_datetime(df_5min['date'])
-df_5min['trading_date'] = df_5min['date'].dt.date
-df_5min['time'] = df_5min['date'].dt.time
-
-# Get previous day close for gap
-daily_data = df_5min.groupby('trading_date').agg({
-    'open': 'first',
-    'close': 'last'
-}).reset_index()
-daily_data['prev_close'] = daily_data['close'].shift(1)
-daily_data['gap_down'] = daily_data['open'] < daily_data['prev_close']
+# One row per day, indexed by date (bars.features): gap, first-bar wick
+# ratios, day high/low/range and the 2HR trend (rules.md method1 on the
+# 09:15 bar)
+features = load_day_features('5min')
+
+# Days with a previous close and a 2hr trend
+known = features['prev_close'].notna() & features['method1_0915'].notna()
+is_2hr_bear = known & (features['method1_0915'] == 'BEAR')
+is_gap_down = known & (features['open'] < features['prev_close'])
+
+# Filter: Only bear trend + gap down, first bar a strong bear candle
+# (lower wick ratio is NaN for a flat bar, which never qualifies)
+qualifying = features[is_2hr_bear & is_gap_down & features['is_bear']
+                      & (features['lower_wick_ratio'] <= STRONG_BEAR_WICK)]
+
+debug_counts = {
+    'total': len(features),
+    'bear_trend': int(is_2hr_bear.sum()),
+    'gap_down': int(is_gap_down.sum()),
+    'strong_bear': len(qualifying),
+}
+
+# Read 5min data (bars of the qualifying days only, for the pattern shapes)
+df_5min = load_bars('5min')
+df_5min = df_5min[df_5min['date'].dt.normalize().isin(qualifying.index)]
+day_bars = dict(tuple(df_5min.groupby(df_5min['date'].dt.normalize())))
 
 results = []
-debug_counts = {'total': 0, 'bear_trend': 0, 'gap_down': 0, 'strong_bear': 0}
-
-for trading_date, day_data in df_5min.groupby('trading_date'):
-    debug_counts['total'] += 1
-
-    # Get gap info
-    gap_info = daily_data[daily_data['trading_date'] == trading_date]
-    if len(gap_info) == 0 or pd.isna(gap_info.iloc[0]['prev_close']):
-        continue
-
-    is_gap_down = gap_info.iloc[0]['gap_down']
-
-    # Get 2hr trend
-    trend_info = daily_trend[daily_trend['trading_date'] == trading_date]
-    if len(trend_info) == 0:
-        continue
-
-    is_2hr_bear = trend_info.iloc[0]['is_bear_trend']
-
-    if is_2hr_bear:
-        debug_counts['bear_trend'] += 1
-
-    if is_gap_down:
-        debug_counts['gap_down'] += 1
-
-    # Filter: Only bear trend + gap down
-    if not (is_2hr_bear and is_gap_down):
-        continue
-
-    # Check first bar is strong bear
-    first_bar = day_data.iloc[0]
-    if not is_strong_bear_candle(first_bar):
-        continue
-
-    debug_counts['strong_bear'] += 1
-
+for trading_date, day in qualifying.iterrows():
     # Classify the day pattern
-    pattern, high_bar, low_bar = classify_day_pattern(day_data.reset_index(drop=True))
-
-    # Calculate stats
-    day_high = day_data['high'].max()
-    day_low = day_data['low'].min()
-    day_open = day_data.iloc[0]['open']
-    day_close = day_data.iloc[-1]['close']
-    day_range = day_high - day_low
+    pattern, high_bar, low_bar = classify_day_pattern(day_bars[trading_date].reset_index(drop=True))
 
     results.append({
-        'date': trading_date,
+        'date': trading_date.date(),
         'pattern': pattern,
         'high_bar': high_bar,
         'low_bar': low_bar,
-        'day_open': day_open,
-        'day_high': day_high,
-        'day_low': day_low,
-        'day_close': day_close,
-        'day_range': day_range,
-        'high_from_open_pct': (day_high - day_open) / day_open * 100,
-        'close_from_open_pct': (day_close - day_open) / day_open * 100
+        'day_open': day['open'],
+        'day_high': day['day_high'],
+        'day_low': day['day_low'],
+        'day_close': day['day_close'],
+        'day_range': day['day_range'],
+        'high_from_open_pct': (day['day_high'] - day['open']) / day['open'] * 100,
+        'close_from_open_pct': (day['day_close'] - day['open']) / day['open'] * 100
     })
 
 results_df = pd.DataFrame(results)
@@ -1,21 +1,17 @@
-import pandas as pd
 import os
+import sys
 
-def analyze_market_data(file_path):
-    try:
-        df = pd.read_csv(file_path)
-    except Exception as e:
-        return f"Error reading CSV: {e}"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars
 
-    # Clean column names
-    df.columns = [c.strip() for c in df.columns]
-    
-    # Combine Date and Time if strictly needed, but 'date' column seems to have both.
-    # Format is 2015-01-09 09:15:00
+def analyze_market_data(timeframe='5min'):
     try:
-        df['datetime'] = pd.to_datetime(df['date'])
-    except Exception as e:
-        return f"Error parsing dates: {e}"
+        df = load_bars(timeframe)
+    except (FileNotFoundError, ValueError) as e:
+        return f"Error loading bars: {e}"
+
+    # 'date' column holds the full bar timestamp (e.g. 2015-01-09 09:15:00)
+    df['datetime'] = df['date']
 
     df['date_only'] = df['datetime'].dt.date
     df['time_only'] = df['datetime'].dt.time
@@ -114,14 +110,10 @@ _Note: The "Day Close" is determined by comparing the opening price of the first
     print(f"Bear Prob: {prob_bear_after_3bear:.2f}%")
 
 if __name__ == "__main__":
-    file_path = "../../data/nifty50_minute_complete-5min.csv"
     output_path = "gemini_analysis.md"
     
-    if os.path.exists(file_path):
-        stats = analyze_market_data(file_path)
-        if isinstance(stats, dict):
-            write_markdown_report(stats, output_path)
-        else:
-            print(stats)
+    stats = analyze_market_data('5min')
+    if isinstance(stats, dict):
+        write_markdown_report(stats, output_path)
     else:
-        print(f"File not found: {file_path}")
+        print(stats)
@@ -1,8 +1,12 @@
-import pandas as pd
 import itertools
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars
 
 # Load the file
-df = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
+df = load_bars('120min')
 
 def get_state(row):
     if row['uptrend']:
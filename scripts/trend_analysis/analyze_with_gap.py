@@ -1,129 +1,36 @@
 import pandas as pd
 import numpy as np
-import math
-
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
-
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
-
-# Read 2hr data
-df_2hr = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-df_2hr['date'] = pd.to_datetime(df_2hr['date'])
-df_2hr = df_2hr.sort_values('date').reset_index(drop=True)
-
-df_2hr['ema11'] = calculate_ema(df_2hr['close'], 11)
-df_2hr['ema21'] = calculate_ema(df_2hr['close'], 21)
-df_2hr['ema21_slope'] = calculate_slope_degrees(df_2hr['ema21'].values, lookback=1)
-
-df_2hr['is_bull_trend'] = (df_2hr['ema11'] > df_2hr['ema21']) & (df_2hr['ema21_slope'] > 10)
-df_2hr['is_bear_trend'] = (df_2hr['ema11'] < df_2hr['ema21']) & (df_2hr['ema21_slope'] < -10)
-
-df_2hr['trading_date'] = df_2hr['date'].dt.date
-
-daily_trend = df_2hr[df_2hr['date'].dt.time == pd.to_datetime('09:15:00').time()][['trading_date', 'is_bull_trend', 'is_bear_trend']].copy()
-
-# Read 5min data
-df_5min = pd.read_csv('../../data/nifty50_minute_complete-5min.csv')
-df_5min['date'] = pd.to_datetime(df_5min['date'])
-df_5min['trading_date'] = df_5min['date'].dt.date
-df_5min['time'] = df_5min['date'].dt.time
-
-first_3_bar_times = [
-    pd.to_datetime('09:15:00').time(),
-    pd.to_datetime('09:20:00').time(),
-    pd.to_datetime('09:25:00').time(),
-    pd.to_datetime('09:30:00').time(),
-    pd.to_datetime('09:35:00').time(),
-    pd.to_datetime('09:40:00').time()
-]
-
-first_6_bar_times = first_3_bar_times
-
-last_bar_time = pd.to_datetime('15:25:00').time()
-
-# Get previous day close for gap calculation
-daily_data = df_5min.groupby('trading_date').agg({
-    'open': 'first',
-    'close': 'last'
-}).reset_index()
-daily_data['prev_close'] = daily_data['close'].shift(1)
-daily_data['gap_up'] = daily_data['open'] > daily_data['prev_close']
-daily_data['gap_down'] = daily_data['open'] < daily_data['prev_close']
-
-results = []
-
-for trading_date, day_data in df_5min.groupby('trading_date'):
-    # Get gap info
-    gap_info = daily_data[daily_data['trading_date'] == trading_date]
-    if len(gap_info) == 0:
-        continue
-
-    is_gap_up = gap_info.iloc[0]['gap_up']
-    is_gap_down = gap_info.iloc[0]['gap_down']
-
-    # First 3 bars
-    first_3_bars = day_data[day_data['time'].isin(first_3_bar_times[:3])].copy()
-    if len(first_3_bars) == 3:
-        first_3_bars['is_bull'] = first_3_bars['close'] > first_3_bars['open']
-        first_3_all_bull = first_3_bars['is_bull'].all()
-        first_3_all_bear = (~first_3_bars['is_bull']).all()
-    else:
-        first_3_all_bull = False
-        first_3_all_bear = False
-
-    # First 6 bars
-    first_6_bars = day_data[day_data['time'].isin(first_6_bar_times)].copy()
-    if len(first_6_bars) == 6:
-        first_6_bars['is_bull'] = first_6_bars['close'] > first_6_bars['open']
-        first_6_all_bull = first_6_bars['is_bull'].all()
-        first_6_all_bear = (~first_6_bars['is_bull']).all()
-    else:
-        first_6_all_bull = False
-        first_6_all_bear = False
-
-    # Day close
-    day_open = day_data.iloc[0]['open']
-    last_bar = day_data[day_data['time'] == last_bar_time]
-    if len(last_bar) == 0:
-        day_close = day_data.iloc[-1]['close']
-    else:
-        day_close = last_bar.iloc[0]['close']
-
-    day_is_bull = day_close > day_open
-
-    # 2hr trend
-    trend_info = daily_trend[daily_trend['trading_date'] == trading_date]
-    if len(trend_info) == 0:
-        continue
-
-    is_2hr_bull = trend_info.iloc[0]['is_bull_trend']
-    is_2hr_bear = trend_info.iloc[0]['is_bear_trend']
-
-    results.append({
-        'date': trading_date,
-        'gap_up': is_gap_up,
-        'gap_down': is_gap_down,
-        'first_3_all_bull': first_3_all_bull,
-        'first_3_all_bear': first_3_all_bear,
-        'first_6_all_bull': first_6_all_bull,
-        'first_6_all_bear': first_6_all_bear,
-        'day_close_bull': day_is_bull,
-        '2hr_bull_trend': is_2hr_bull,
-        '2hr_bear_trend': is_2hr_bear
-    })
-
-results_df = pd.DataFrame(results)
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_day_features
+
+# One row per day, indexed by date (bars.features): gap, the colors of the
+# first six 5-min bars (09:15 .. 09:40, NaN when missing), the close of the
+# last session bar and the 2HR trend (rules.md method1 on the 09:15 bar)
+features = load_day_features('5min')
+
+# Days without a 09:15 2hr bar have no trend and are left out
+days = features[features['method1_0915'].notna()]
+
+first_3 = days[['color_1', 'color_2', 'color_3']]
+first_6 = days[[f'color_{k}' for k in range(1, 7)]]
+
+results_df = pd.DataFrame({
+    'date': days.index.date,
+    'gap_up': days['open'] > days['prev_close'],
+    'gap_down': days['open'] < days['prev_close'],
+    # All bars present and bull; "bear" is every bar not bull (flat included)
+    'first_3_all_bull': (first_3 == 1).all(axis=1),
+    'first_3_all_bear': (first_3 <= 0).all(axis=1),
+    'first_6_all_bull': (first_6 == 1).all(axis=1),
+    'first_6_all_bear': (first_6 <= 0).all(axis=1),
+    # 15:25 close (the day's last bar if the session ended early)
+    'day_close_bull': days['session_close'] > days['open'],
+    '2hr_bull_trend': days['method1_0915'] == 'BULL',
+    '2hr_bear_trend': days['method1_0915'] == 'BEAR',
+}).reset_index(drop=True)
 
 # Question 3: First 3 bars + Gap
 print("=" * 80)
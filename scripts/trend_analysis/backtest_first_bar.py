@@ -0,0 +1,231 @@
+import os
+import sys
+from dataclasses import asdict
+from typing import Dict, List, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bars import atr, load_daily_trends, load_session_cube
+from bars.backtest import backtest_orders, equity_curves, max_drawdown, trade_summary
+from bars.optimize import window_metrics
+from first_bar_trade_generator import (SCALED_TRANCHE_SIZE, FirstBarTradeGenerator, ProbabilityTable,
+                                       StrategyParams)
+
+# Backtest of the three FirstBarTradeGenerator strategies on every historical
+# day of the 5-min session cube. Each day's ideas come from its first bar, the
+# previous close, the 50-session average (bars.daily_trend) and the 14-day ATR
+# of the days before; every order of every day is then run in one
+# bars.backtest pass:
+#   AGGRESSIVE_FADE  market at bar 1's close
+#   CONFIRMATION     limit at the zone midpoint, bars 2 .. entry_valid_until_bar
+#   SCALED           1/3 at bar 1's close, 1/3 limit at the pullback level and
+#                    1/3 stop entry at the breakout level, bars 2 .. entry_valid_until_bar
+# All share the idea's stop, three targets (exit percentages as sized) and
+# max_holding_bars, and are flat at the close. P&L is in NIFTY points per unit;
+# R = P&L / the idea's stop distance, and `pnl_pct` = R x position_pct is
+# the return on capital at the generator's position size. position_pct is the
+# size of the whole position: position_size_pct for the fade and confirmation,
+# position_size_pct / SCALED_TRANCHE_SIZE for SCALED, whose position_size_pct
+# is one of its three tranches while R covers all of them.
+#
+# The probability table is built from the same history, so this measures how
+# the trade mechanics play out, not an out-of-sample edge.
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../output/first_bar_backtest")
+ATR_PERIOD = 14
+STRATEGIES = ['AGGRESSIVE_FADE', 'CONFIRMATION', 'SCALED']
+
+
+def first_bar_inputs(cube) -> pd.DataFrame:
+    """
+    Generator inputs known at bar 1's close, one row per usable cube day
+    (index = cube row): open/high/low/close, prev_close, ma_50, atr, date.
+    """
+    day_close = cube.day_close()
+    day_atr = atr(cube.day_high(), cube.day_low(), day_close, ATR_PERIOD)
+    dates = pd.to_datetime(cube.dates)
+    daily = load_daily_trends()
+
+    inputs = pd.DataFrame(cube.values[:, 0, :], columns=['open', 'high', 'low', 'close'])
+    inputs['prev_close'] = np.r_[np.nan, day_close[:-1]]
+    inputs['ma_50'] = dates.map(pd.Series(daily['ma50_value'].to_numpy(), index=daily['date'])).to_numpy(dtype='float64')
+    inputs['atr'] = np.r_[np.nan, day_atr[:-1]]
+    inputs['date'] = dates
+    usable = cube.mask[:, 0] & inputs[['prev_close', 'ma_50', 'atr']].notna().all(axis=1).to_numpy()
+    return inputs[usable]
+
+
+def full_position_pct(strategy_type, size) -> np.ndarray:
+    """Whole-position size (%) from per-idea position_size_pct values (SCALED's is per tranche)"""
+    scaled = np.asarray(strategy_type) == 'SCALED'
+    size = np.asarray(size, dtype='float64')
+    return np.where(scaled, size / SCALED_TRANCHE_SIZE, size)
+
+
+def backtest_ideas(cube, generator: FirstBarTradeGenerator, inputs: pd.DataFrame,
+                   text: bool = True) -> pd.DataFrame:
+    """
+    Every traded idea of `generator` over `inputs`, with its backtest result
+    (filled, stopped, targets_hit, exit_reason, pnl, r_multiple, position_pct,
+    pnl_pct).
+    """
+    ctx, ideas = generator.generate_trade_ideas_batch(
+        inputs[['open', 'high', 'low', 'close']], inputs['prev_close'], inputs['ma_50'],
+        inputs['atr'], text=text)
+    # May leave no ideas (every cell NO_TRADE); the zero orders below then give
+    # an empty frame with the same columns
+    ideas = ideas[ideas['direction'] != 'NO_TRADE'].reset_index(drop=True)
+    ideas = ideas.join(ctx[['trend', 'gap_type', 'bar_type']], on='day')
+    ideas['date'] = inputs['date'].reindex(ideas['day']).to_numpy()
+    short = (ideas['direction'] == 'SHORT').to_numpy()
+
+    # One order per idea, three for SCALED
+    scaled = (ideas['strategy_type'] == 'SCALED').to_numpy()
+    bar = inputs.loc[ideas.loc[scaled, 'day']]
+    levels = generator.scaled_entry_levels(bar['high'], bar['low'], bar['close'], bar['atr'], short[scaled])
+    orders = pd.DataFrame({
+        'idea': np.arange(len(ideas)),
+        'size': 1.0,
+        'entry': ideas['entry_price'].to_numpy(),
+        'kind': np.where(ideas['strategy_type'] == 'AGGRESSIVE_FADE', 'market', 'limit'),
+    })[~scaled]
+    tranches = [pd.DataFrame({'idea': np.flatnonzero(scaled), 'size': 1 / 3, 'entry': level, 'kind': kind})
+                for level, kind in zip(levels, ['market', 'limit', 'stop'])]
+    orders = pd.concat([orders] + tranches, ignore_index=True)
+
+    idea = ideas.iloc[orders['idea']]
+    immediate = (orders['kind'] == 'market').to_numpy()
+    trades = backtest_orders(
+        cube, idea['day'], np.where(short[orders['idea']], -1, 1), orders['entry'], idea['stop_loss'],
+        idea[['target_1', 'target_2', 'target_3']].to_numpy(),
+        weights=idea[['target_1_pct', 'target_2_pct', 'target_3_pct']].to_numpy() / 100,
+        kind=orders['kind'].to_numpy(),
+        entry_from=np.where(immediate, 0, 1),
+        entry_until=np.where(immediate, 0, idea['entry_valid_until_bar'].to_numpy() - 1),
+        max_holding=idea['max_holding_bars'].to_numpy())
+
+    # Per idea: size-weighted P&L over its orders
+    trades['idea'] = orders['idea']
+    trades['weighted_pnl'] = trades['pnl'] * orders['size']
+    trades['weighted_targets'] = trades['targets_hit'] * orders['size']
+    trades['stopped'] &= trades['filled']
+    trades['all_targets'] = trades['exit_reason'] == 'target'
+    per_idea = trades.groupby('idea').agg(
+        filled=('filled', 'any'), stopped=('stopped', 'any'), pnl=('weighted_pnl', 'sum'),
+        targets_hit=('weighted_targets', 'sum'), all_targets=('all_targets', 'all'))
+    ideas = ideas.join(per_idea)
+    ideas['exit_reason'] = np.select([~ideas['filled'], ideas['stopped'], ideas['all_targets']],
+                                     ['no_fill', 'stop', 'target'], default='time')
+    ideas['r_multiple'] = np.where(ideas['filled'], ideas['pnl'] / ideas['stop_distance'], np.nan)
+    ideas['position_pct'] = full_position_pct(ideas['strategy_type'], ideas['position_size_pct'])
+    ideas['pnl_pct'] = np.where(ideas['filled'], ideas['r_multiple'] * ideas['position_pct'], 0.0)
+    return ideas
+
+
+def daily_returns(ideas: pd.DataFrame, inputs: pd.DataFrame,
+                  value: str = 'pnl_pct') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (days x STRATEGIES) `value` and filled-trade count per day of `inputs`
+    (each strategy trades at most once a day).
+    """
+    row = inputs.index.get_indexer(ideas['day'])
+    col = pd.Categorical(ideas['strategy_type'], categories=STRATEGIES).codes
+    pnl = np.zeros((len(inputs), len(STRATEGIES)))
+    traded = np.zeros((len(inputs), len(STRATEGIES)), dtype='int64')
+    filled = ideas['filled'].to_numpy()
+    np.add.at(pnl, (row[filled], col[filled]), ideas[value].to_numpy()[filled])
+    np.add.at(traded, (row[filled], col[filled]), 1)
+    return pnl, traded
+
+
+# =============================================================================
+# PARAMETER EVALUATION (process-pool workers)
+# =============================================================================
+
+# Set once per worker process by init_evaluation
+_STATE: Dict = {}
+
+
+def init_evaluation(inputs: pd.DataFrame, table: ProbabilityTable, windows: Dict[str, slice]):
+    """
+    Worker initializer: opens the 5-min cube memory-mapped, so every worker
+    reads the same shared pages of data/store/cube instead of a copy.
+    """
+    _STATE.update(cube=load_session_cube('5min'), inputs=inputs, table=table, windows=windows)
+
+
+def evaluate_param_sets(param_sets: List[Dict]) -> List[Dict]:
+    """
+    Backtest each {StrategyParams field: value} set; one flat dict per set
+    with `<window>_<series>_<metric>` for every window, STRATEGIES and 'ALL'
+    (the three strategies traded together), metrics from bars.optimize.
+    """
+    cube, inputs, windows = _STATE['cube'], _STATE['inputs'], _STATE['windows']
+    series = STRATEGIES + ['ALL']
+    out = []
+    for values in param_sets:
+        generator = FirstBarTradeGenerator(prob_table=_STATE['table'],
+                                           params=StrategyParams().with_values(**values))
+        ideas = backtest_ideas(cube, generator, inputs, text=False)
+        pnl, traded = daily_returns(ideas, inputs)
+        pnl = np.column_stack([pnl, pnl.sum(axis=1)])
+        traded = np.column_stack([traded, traded.sum(axis=1)])
+        row = {}
+        for window, metrics in window_metrics(pnl, traded, windows).items():
+            for metric, value in metrics.items():
+                for name, v in zip(series, value):
+                    row[f"{window}_{name}_{metric}"] = float(v)
+        out.append(row)
+    return out
+
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cube = load_session_cube('5min')
+    inputs = first_bar_inputs(cube)
+    generator = FirstBarTradeGenerator()
+
+    print("=" * 100)
+    print("FIRST BAR STRATEGY BACKTEST (5-MIN BARS)")
+    print("=" * 100)
+    print(f"Days: {len(inputs)} ({inputs['date'].iloc[0].date()} to {inputs['date'].iloc[-1].date()}) | "
+          f"Table: {generator.prob_table.meta['source']}")
+    print(f"Parameters: {asdict(generator.params)}")
+
+    ideas = backtest_ideas(cube, generator, inputs)
+
+    summary = trade_summary(ideas, ['strategy_type'])
+    by_direction = trade_summary(ideas, ['strategy_type', 'direction'])
+    equity = equity_curves(ideas, 'strategy_type').reindex(columns=STRATEGIES, fill_value=0.0)
+    summary['max_drawdown'] = summary['strategy_type'].map(max_drawdown(equity))
+
+    pd.set_option('display.width', 200)
+    print(f"\nIdeas with a trade: {len(ideas)}")
+    print("\nBY STRATEGY (pnl in points per unit, R = pnl / stop distance):")
+    print(summary.round(3).to_string(index=False))
+    print("\nBY STRATEGY AND DIRECTION:")
+    print(by_direction.round(3).to_string(index=False))
+
+    columns = ['date', 'strategy_type', 'direction', 'trend', 'gap_type', 'bar_type', 'entry_price',
+               'stop_loss', 'target_1', 'target_2', 'target_3', 'win_probability', 'position_size_pct',
+               'position_pct', 'filled', 'exit_reason', 'targets_hit', 'pnl', 'r_multiple', 'pnl_pct']
+    ideas[columns].to_csv(f"{OUTPUT_DIR}/trades.csv", index=False)
+    summary.to_csv(f"{OUTPUT_DIR}/summary.csv", index=False)
+    by_direction.to_csv(f"{OUTPUT_DIR}/summary_by_direction.csv", index=False)
+    equity.to_csv(f"{OUTPUT_DIR}/equity.csv")
+
+    plt.figure(figsize=(12, 6))
+    for strategy in STRATEGIES:
+        plt.plot(equity.index, equity[strategy], label=strategy)
+    plt.title('First Bar Strategies - Cumulative P&L (points per unit)')
+    plt.xlabel('Date')
+    plt.ylabel('Points')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(f"{OUTPUT_DIR}/equity.png")
+    print(f"\nSaved trades, summaries and equity curves to {OUTPUT_DIR}")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from first_bar_trade_generator import (ANALYSIS_TABLE, build_probability_table,
+                                       probability_table_path)
+
+# Regenerates the (trend, gap_type, bar_type) probability table used by
+# FirstBarTradeGenerator from the 5-min and 120-min bar stores and prints it
+# next to the figures of the original analysis.
+
+table = build_probability_table().save()
+print(f"Saved {len(table.table)} keys ({table.meta['days']} days) to {probability_table_path()}")
+
+print("\n" + "=" * 110)
+print(f"{'Trend':<10} {'Gap':<15} {'Bar':<12} {'P(High)':>8} {'P(Low)':>7} {'P(H±10)':>8} "
+      f"{'P(L±10)':>8} {'Days':>6}   {'Analysis (H/L/H10/L10/N)':<30}")
+print("=" * 110)
+for key, (p_high, p_low, p_high_10, p_low_10, days) in sorted(table.table.items()):
+    old = ANALYSIS_TABLE.get(key)
+    old_str = '/'.join(f"{v:.2f}" for v in old[:4]) + f"/{old[4]}" if old else "-"
+    print(f"{key[0]:<10} {key[1]:<15} {key[2]:<12} {p_high:>8.2f} {p_low:>7.2f} {p_high_10:>8.2f} "
+          f"{p_low_10:>8.2f} {days:>6}   {old_str:<30}")
+
+missing = sorted(set(ANALYSIS_TABLE) - set(table.table))
+if missing:
+    print(f"\nKeys below {table.meta['min_samples']} days (lookup falls back to neutral):")
+    for key in missing:
+        print(f"  {key}")
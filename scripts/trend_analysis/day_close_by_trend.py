@@ -1,31 +1,18 @@
 import pandas as pd
 import numpy as np
-import math
-
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
-
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, ema, slope_degrees
 
 # Read 2hr data
-df_2hr = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-df_2hr['date'] = pd.to_datetime(df_2hr['date'])
-df_2hr = df_2hr.sort_values('date').reset_index(drop=True)
+df_2hr = load_bars('120min')
 
 # Calculate EMAs and slope
-df_2hr['ema11'] = calculate_ema(df_2hr['close'], 11)
-df_2hr['ema21'] = calculate_ema(df_2hr['close'], 21)
-df_2hr['ema21_slope'] = calculate_slope_degrees(df_2hr['ema21'].values, lookback=1)
+df_2hr['ema11'] = ema(df_2hr['close'], 11)
+df_2hr['ema21'] = ema(df_2hr['close'], 21)
+df_2hr['ema21_slope'] = slope_degrees(df_2hr['ema21'].values, lookback=1)
 
 # Determine trend
 df_2hr['is_bull_trend'] = (df_2hr['ema11'] > df_2hr['ema21']) & (df_2hr['ema21_slope'] > 10)
@@ -37,8 +24,7 @@ df_2hr['trading_date'] = df_2hr['date'].dt.date
 daily_trend = df_2hr[df_2hr['date'].dt.time == pd.to_datetime('09:15:00').time()][['trading_date', 'is_bull_trend', 'is_bear_trend']].copy()
 
 # Read 5min data
-df_5min = pd.read_csv('../../data/nifty50_minute_complete-5min.csv')
-df_5min['date'] = pd.to_datetime(df_5min['date'])
+df_5min = load_bars('5min')
 df_5min['trading_date'] = df_5min['date'].dt.date
 df_5min['time'] = df_5min['date'].dt.time
 
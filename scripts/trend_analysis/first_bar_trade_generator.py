@@ -13,14 +13,20 @@ Trade Ideas Generated:
 3. SCALED POSITION - Split entry across multiple price levels/bars
 """
 
+import json
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
 import os
+import sys
 from pathlib import Path
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, load_daily_trends, store
+from bars.highlow import bar_conditional_curves, first_bar_frame
+
 
 # =============================================================================
 # ENUMS AND DATA CLASSES
@@ -54,6 +60,34 @@ class TradeDirection(Enum):
     NO_TRADE = "NO_TRADE"
 
 
+# Integer codes of the batch methods index into these
+BAR_TYPES = list(BarType)
+TREND_TYPES = list(TrendType)
+GAP_TYPES = list(GapType)
+DIRECTIONS = list(TradeDirection)
+CONFIDENCE_LEVELS = ['HIGH', 'MEDIUM', 'LOW']
+STRATEGY_TYPES = ['AGGRESSIVE_FADE', 'CONFIRMATION', 'SCALED']
+
+# Time windows (bars) and fill assumptions of the three strategies
+MAX_HOLDING_BARS = {'AGGRESSIVE_FADE': 30, 'CONFIRMATION': 25, 'SCALED': 35}
+STRONG_BAR_FADE_HOLDING_BARS = 20   # Fading a strong bull/bear bar
+ENTRY_VALID_UNTIL_BAR = {'AGGRESSIVE_FADE': 1, 'CONFIRMATION': 6, 'SCALED': 10}
+DEFAULT_ENTRY_VALID_UNTIL_BAR = 6   # No-trade ideas
+CONFIRM_TRIGGER_PROB = 0.65         # Estimated probability of getting filled
+SCALED_WIN_BONUS = 0.08             # Averaged entry adds to the win probability...
+SCALED_WIN_CAP = 0.65               # ...up to this cap
+SCALED_TRANCHE_SIZE = 0.33          # Per-tranche share of the Kelly size
+
+# Order type, risk level and exit % at targets 1-3 of each strategy
+ENTRY_TYPES = {'AGGRESSIVE_FADE': "IMMEDIATE", 'CONFIRMATION': "LIMIT", 'SCALED': "SCALED"}
+RISK_LEVELS = {'AGGRESSIVE_FADE': "HIGH", 'CONFIRMATION': "MEDIUM", 'SCALED': "LOW"}
+DEFAULT_TARGET_PCTS = (33.0, 33.0, 34.0)   # Also no-trade ideas
+TARGET_PCTS = {'AGGRESSIVE_FADE': DEFAULT_TARGET_PCTS, 'CONFIRMATION': DEFAULT_TARGET_PCTS,
+               'SCALED': (40.0, 35.0, 25.0)}
+TARGETS_R_FIELDS = {'AGGRESSIVE_FADE': 'fade_targets_r', 'CONFIRMATION': 'confirm_targets_r',
+                    'SCALED': 'scaled_targets_r'}     # StrategyParams field of each
+
+
 @dataclass
 class FirstBar:
     """First bar of the trading day"""
@@ -152,10 +186,10 @@ class TradeIdea:
     # Optional fields with defaults
     entry_zone_high: float = 0.0  # For limit orders
     entry_zone_low: float = 0.0
-    target_1_pct: float = 33.0  # % of position to exit
-    target_2_pct: float = 33.0
-    target_3_pct: float = 34.0
-    entry_valid_until_bar: int = 6  # Entry must trigger by this bar
+    target_1_pct: float = DEFAULT_TARGET_PCTS[0]  # % of position to exit
+    target_2_pct: float = DEFAULT_TARGET_PCTS[1]
+    target_3_pct: float = DEFAULT_TARGET_PCTS[2]
+    entry_valid_until_bar: int = DEFAULT_ENTRY_VALID_UNTIL_BAR  # Entry must trigger by this bar
     trigger_condition: str = ""
     notes: str = ""
 
@@ -183,81 +217,179 @@ class TradeIdea:
         }
 
 
+@dataclass(frozen=True)
+class StrategyParams:
+    """
+    Tunable multipliers of the three strategies (defaults: the original
+    hand-set values). ATR multiples place entries and stops; target R
+    multiples place the three targets at multiples of the stop distance.
+    """
+    # AGGRESSIVE_FADE
+    fade_stop_atr: float = 0.15
+    fade_targets_r: Tuple[float, float, float] = (1.0, 2.0, 3.0)
+
+    # CONFIRMATION
+    confirm_zone_atr: float = 0.20
+    confirm_stop_atr: float = 0.10
+    confirm_targets_r: Tuple[float, float, float] = (1.5, 2.5, 4.0)
+
+    # SCALED
+    scaled_pullback_atr: float = 0.05
+    scaled_breakout_atr: float = 0.10
+    scaled_stop_atr: float = 0.25
+    scaled_targets_r: Tuple[float, float, float] = (1.0, 1.75, 2.5)
+
+    # Share of the Kelly fraction used by confidence: HIGH, MEDIUM, LOW
+    kelly_fractions: Tuple[float, float, float] = (0.30, 0.20, 0.10)
+
+    @staticmethod
+    def average_rr(targets_r: Tuple[float, ...]) -> float:
+        """R:R for expected value and sizing: mean target R to 2 decimals (2.67 for 1.5/2.5/4.0)"""
+        return round(sum(targets_r) / len(targets_r), 2)
+
+    def targets_r(self, strategy_type: str) -> Tuple[float, float, float]:
+        """Target R multiples of one of STRATEGY_TYPES"""
+        return getattr(self, TARGETS_R_FIELDS[strategy_type])
+
+    def with_values(self, **values) -> 'StrategyParams':
+        """Copy with some fields replaced (target/kelly lists become tuples)"""
+        return replace(self, **{k: tuple(v) if isinstance(v, list) else v for k, v in values.items()})
+
+
 # =============================================================================
 # PROBABILITY LOOKUP TABLE
 # =============================================================================
 
+# Format: (trend, gap_type, bar_type) -> (prob_high, prob_low, prob_high_10, prob_low_10, sample_size)
+# where prob_high / prob_low = P(bar 1 sets the day high / low) and *_10 allow
+# a 10-point offset. Figures from the original 2,500-day analysis; used when no
+# table has been generated from the bar store (see build_probability_table).
+ANALYSIS_TABLE = {
+    # UPTREND + SMALL GAP UP scenarios
+    ('uptrend', 'small_gap_up', 'bull'): (0.09, 0.31, 0.26, 0.40, 309),
+    ('uptrend', 'small_gap_up', 'bear'): (0.37, 0.07, 0.52, 0.16, 408),
+    ('uptrend', 'small_gap_up', 'strong_bull'): (0.01, 0.42, 0.15, 0.51, 96),
+    ('uptrend', 'small_gap_up', 'strong_bear'): (0.45, 0.01, 0.54, 0.13, 113),
+    ('uptrend', 'small_gap_up', 'neutral'): (0.25, 0.17, 0.41, 0.26, 718),
+
+    # UPTREND + SMALL GAP DOWN scenarios
+    ('uptrend', 'small_gap_down', 'bull'): (0.07, 0.33, 0.18, 0.43, 134),
+    ('uptrend', 'small_gap_down', 'bear'): (0.28, 0.10, 0.38, 0.21, 176),
+    ('uptrend', 'small_gap_down', 'strong_bull'): (0.05, 0.29, 0.16, 0.37, 62),
+    ('uptrend', 'small_gap_down', 'strong_bear'): (0.48, 0.00, 0.58, 0.09, 33),
+    ('uptrend', 'small_gap_down', 'neutral'): (0.19, 0.20, 0.29, 0.30, 310),
+
+    # DOWNTREND + SMALL GAP UP scenarios
+    ('downtrend', 'small_gap_up', 'bull'): (0.09, 0.27, 0.21, 0.32, 149),
+    ('downtrend', 'small_gap_up', 'bear'): (0.33, 0.05, 0.43, 0.17, 230),
+    ('downtrend', 'small_gap_up', 'strong_bull'): (0.00, 0.33, 0.13, 0.35, 54),
+    ('downtrend', 'small_gap_up', 'strong_bear'): (0.39, 0.00, 0.48, 0.10, 61),
+    ('downtrend', 'small_gap_up', 'neutral'): (0.24, 0.14, 0.35, 0.23, 379),
+
+    # DOWNTREND + SMALL GAP DOWN scenarios
+    ('downtrend', 'small_gap_down', 'bull'): (0.13, 0.24, 0.26, 0.30, 76),
+    ('downtrend', 'small_gap_down', 'bear'): (0.35, 0.07, 0.43, 0.15, 118),
+    ('downtrend', 'small_gap_down', 'strong_bull'): (0.13, 0.24, 0.26, 0.30, 76),  # Using bull as proxy
+    ('downtrend', 'small_gap_down', 'strong_bear'): (0.35, 0.07, 0.43, 0.15, 118),  # Using bear as proxy
+    ('downtrend', 'small_gap_down', 'neutral'): (0.26, 0.13, 0.37, 0.21, 194),
+
+    # BEAR TREND + LARGE GAP UP scenarios (gap >= 50)
+    ('bear_trend', 'large_gap_up', 'bull'): (0.00, 0.38, 0.05, 0.41, 37),
+    ('bear_trend', 'large_gap_up', 'bear'): (0.46, 0.02, 0.52, 0.08, 48),
+    ('bear_trend', 'large_gap_up', 'strong_bull'): (0.00, 0.38, 0.05, 0.41, 37),
+    ('bear_trend', 'large_gap_up', 'strong_bear'): (0.46, 0.02, 0.52, 0.08, 48),
+    ('bear_trend', 'large_gap_up', 'neutral'): (0.24, 0.16, 0.29, 0.22, 85),
+
+    # BEAR TREND + LARGE GAP DOWN scenarios
+    ('bear_trend', 'large_gap_down', 'bull'): (0.05, 0.29, 0.05, 0.29, 21),
+    ('bear_trend', 'large_gap_down', 'bear'): (0.20, 0.00, 0.33, 0.13, 15),
+    ('bear_trend', 'large_gap_down', 'strong_bull'): (0.05, 0.29, 0.05, 0.29, 21),
+    ('bear_trend', 'large_gap_down', 'strong_bear'): (0.20, 0.00, 0.33, 0.13, 15),
+    ('bear_trend', 'large_gap_down', 'neutral'): (0.12, 0.15, 0.19, 0.21, 36),
+
+    # BULL TREND + LARGE GAP UP scenarios
+    ('bull_trend', 'large_gap_up', 'bull'): (0.00, 0.42, 0.06, 0.52, 33),
+    ('bull_trend', 'large_gap_up', 'bear'): (0.41, 0.04, 0.52, 0.20, 54),
+    ('bull_trend', 'large_gap_up', 'strong_bull'): (0.00, 0.42, 0.06, 0.52, 33),
+    ('bull_trend', 'large_gap_up', 'strong_bear'): (0.41, 0.04, 0.52, 0.20, 54),
+    ('bull_trend', 'large_gap_up', 'neutral'): (0.23, 0.17, 0.33, 0.24, 87),
+
+    # BULL TREND + LARGE GAP DOWN scenarios
+    ('bull_trend', 'large_gap_down', 'bull'): (0.03, 0.44, 0.08, 0.53, 36),
+    ('bull_trend', 'large_gap_down', 'bear'): (0.33, 0.00, 0.33, 0.11, 9),
+    ('bull_trend', 'large_gap_down', 'strong_bull'): (0.03, 0.44, 0.08, 0.53, 36),
+    ('bull_trend', 'large_gap_down', 'strong_bear'): (0.33, 0.00, 0.33, 0.11, 9),
+    ('bull_trend', 'large_gap_down', 'neutral'): (0.18, 0.22, 0.21, 0.32, 45),
+}
+
+PROBABILITY_TABLE_VERSION = 1
+PROBABILITY_FIELDS = ['prob_high', 'prob_low', 'prob_high_10', 'prob_low_10', 'sample_size']
+NEAR_OFFSET = 10          # Points for the *_10 probabilities
+MIN_TABLE_SAMPLES = 10    # Keys with fewer days fall back to the neutral bar type
+
+
+def probability_table_path() -> Path:
+    return store.STORE_DIR / "probability_table" / "first_bar.json"
+
+
+def _table_sources() -> Dict[str, str]:
+    """Checksums of the stores a generated table is computed from (None if not converted)"""
+    return {tf: store.store_checksum(tf) if store.has_store(tf) else None
+            for tf in ('5min', '120min')}
+
+
 class ProbabilityTable:
     """
-    Historical probability lookup based on our analysis.
+    Historical probability lookup.
     Format: (trend, gap_type, bar_type) -> (prob_high, prob_low, prob_high_10, prob_low_10, sample_size)
     """
 
-    def __init__(self):
-        # Build lookup table from our analysis
-        self.table = self._build_table()
-
-    def _build_table(self) -> Dict:
-        """Build probability lookup table from analysis results"""
-        table = {}
-
-        # UPTREND + SMALL GAP UP scenarios
-        table[('uptrend', 'small_gap_up', 'bull')] = (0.09, 0.31, 0.26, 0.40, 309)
-        table[('uptrend', 'small_gap_up', 'bear')] = (0.37, 0.07, 0.52, 0.16, 408)
-        table[('uptrend', 'small_gap_up', 'strong_bull')] = (0.01, 0.42, 0.15, 0.51, 96)
-        table[('uptrend', 'small_gap_up', 'strong_bear')] = (0.45, 0.01, 0.54, 0.13, 113)
-        table[('uptrend', 'small_gap_up', 'neutral')] = (0.25, 0.17, 0.41, 0.26, 718)
-
-        # UPTREND + SMALL GAP DOWN scenarios
-        table[('uptrend', 'small_gap_down', 'bull')] = (0.07, 0.33, 0.18, 0.43, 134)
-        table[('uptrend', 'small_gap_down', 'bear')] = (0.28, 0.10, 0.38, 0.21, 176)
-        table[('uptrend', 'small_gap_down', 'strong_bull')] = (0.05, 0.29, 0.16, 0.37, 62)
-        table[('uptrend', 'small_gap_down', 'strong_bear')] = (0.48, 0.00, 0.58, 0.09, 33)
-        table[('uptrend', 'small_gap_down', 'neutral')] = (0.19, 0.20, 0.29, 0.30, 310)
-
-        # DOWNTREND + SMALL GAP UP scenarios
-        table[('downtrend', 'small_gap_up', 'bull')] = (0.09, 0.27, 0.21, 0.32, 149)
-        table[('downtrend', 'small_gap_up', 'bear')] = (0.33, 0.05, 0.43, 0.17, 230)
-        table[('downtrend', 'small_gap_up', 'strong_bull')] = (0.00, 0.33, 0.13, 0.35, 54)
-        table[('downtrend', 'small_gap_up', 'strong_bear')] = (0.39, 0.00, 0.48, 0.10, 61)
-        table[('downtrend', 'small_gap_up', 'neutral')] = (0.24, 0.14, 0.35, 0.23, 379)
-
-        # DOWNTREND + SMALL GAP DOWN scenarios
-        table[('downtrend', 'small_gap_down', 'bull')] = (0.13, 0.24, 0.26, 0.30, 76)
-        table[('downtrend', 'small_gap_down', 'bear')] = (0.35, 0.07, 0.43, 0.15, 118)
-        table[('downtrend', 'small_gap_down', 'strong_bull')] = (0.13, 0.24, 0.26, 0.30, 76)  # Using bull as proxy
-        table[('downtrend', 'small_gap_down', 'strong_bear')] = (0.35, 0.07, 0.43, 0.15, 118)  # Using bear as proxy
-        table[('downtrend', 'small_gap_down', 'neutral')] = (0.26, 0.13, 0.37, 0.21, 194)
-
-        # BEAR TREND + LARGE GAP UP scenarios (gap >= 50)
-        table[('bear_trend', 'large_gap_up', 'bull')] = (0.00, 0.38, 0.05, 0.41, 37)
-        table[('bear_trend', 'large_gap_up', 'bear')] = (0.46, 0.02, 0.52, 0.08, 48)
-        table[('bear_trend', 'large_gap_up', 'strong_bull')] = (0.00, 0.38, 0.05, 0.41, 37)
-        table[('bear_trend', 'large_gap_up', 'strong_bear')] = (0.46, 0.02, 0.52, 0.08, 48)
-        table[('bear_trend', 'large_gap_up', 'neutral')] = (0.24, 0.16, 0.29, 0.22, 85)
-
-        # BEAR TREND + LARGE GAP DOWN scenarios
-        table[('bear_trend', 'large_gap_down', 'bull')] = (0.05, 0.29, 0.05, 0.29, 21)
-        table[('bear_trend', 'large_gap_down', 'bear')] = (0.20, 0.00, 0.33, 0.13, 15)
-        table[('bear_trend', 'large_gap_down', 'strong_bull')] = (0.05, 0.29, 0.05, 0.29, 21)
-        table[('bear_trend', 'large_gap_down', 'strong_bear')] = (0.20, 0.00, 0.33, 0.13, 15)
-        table[('bear_trend', 'large_gap_down', 'neutral')] = (0.12, 0.15, 0.19, 0.21, 36)
-
-        # BULL TREND + LARGE GAP UP scenarios
-        table[('bull_trend', 'large_gap_up', 'bull')] = (0.00, 0.42, 0.06, 0.52, 33)
-        table[('bull_trend', 'large_gap_up', 'bear')] = (0.41, 0.04, 0.52, 0.20, 54)
-        table[('bull_trend', 'large_gap_up', 'strong_bull')] = (0.00, 0.42, 0.06, 0.52, 33)
-        table[('bull_trend', 'large_gap_up', 'strong_bear')] = (0.41, 0.04, 0.52, 0.20, 54)
-        table[('bull_trend', 'large_gap_up', 'neutral')] = (0.23, 0.17, 0.33, 0.24, 87)
-
-        # BULL TREND + LARGE GAP DOWN scenarios
-        table[('bull_trend', 'large_gap_down', 'bull')] = (0.03, 0.44, 0.08, 0.53, 36)
-        table[('bull_trend', 'large_gap_down', 'bear')] = (0.33, 0.00, 0.33, 0.11, 9)
-        table[('bull_trend', 'large_gap_down', 'strong_bull')] = (0.03, 0.44, 0.08, 0.53, 36)
-        table[('bull_trend', 'large_gap_down', 'strong_bear')] = (0.33, 0.00, 0.33, 0.11, 9)
-        table[('bull_trend', 'large_gap_down', 'neutral')] = (0.18, 0.22, 0.21, 0.32, 45)
-
-        return table
+    _default: Optional['ProbabilityTable'] = None
+
+    def __init__(self, table: Optional[Dict] = None, meta: Optional[Dict] = None):
+        self.table = ANALYSIS_TABLE if table is None else table
+        self.meta = meta or {'source': 'analysis'}
+
+    @classmethod
+    def default(cls) -> 'ProbabilityTable':
+        """
+        Table shared by every generator: the generated file, rebuilt first if
+        the bar store has changed since; ANALYSIS_TABLE when there is neither
+        a file nor 5-min data. Loaded once per process.
+        """
+        if cls._default is None:
+            table = None
+            try:
+                table = cls.load()
+            except (FileNotFoundError, ValueError):
+                pass
+            have_data = store.is_stored('5min') and store.is_stored('120min')
+            if have_data and (table is None or table.meta.get('sources') != _table_sources()):
+                table = build_probability_table().save()
+            cls._default = table or cls()
+        return cls._default
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> 'ProbabilityTable':
+        """Read a table written by save()"""
+        path = Path(path or probability_table_path())
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != PROBABILITY_TABLE_VERSION or data.get('fields') != PROBABILITY_FIELDS:
+            raise ValueError(f"Unsupported probability table format in {path}")
+        table = {tuple(row[:3]): tuple(row[3:7]) + (int(row[7]),) for row in data['rows']}
+        meta = {k: v for k, v in data.items() if k != 'rows'}
+        return cls(table, meta)
+
+    def save(self, path: Optional[Path] = None) -> 'ProbabilityTable':
+        """Write the table as compact versioned JSON (one row per key)"""
+        path = Path(path or probability_table_path())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = dict(self.meta, version=PROBABILITY_TABLE_VERSION, fields=PROBABILITY_FIELDS,
+                    rows=[list(key) + list(values) for key, values in sorted(self.table.items())])
+        with open(path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        return self
 
     def lookup(self, trend: str, gap_type: str, bar_type: str) -> Tuple[float, float, float, float, int]:
         """
@@ -278,6 +410,63 @@ class ProbabilityTable:
         return (0.20, 0.20, 0.30, 0.30, 0)
 
 
+def build_probability_table(offset: int = NEAR_OFFSET,
+                            min_samples: int = MIN_TABLE_SAMPLES) -> ProbabilityTable:
+    """
+    Compute the lookup table from the bar store.
+
+    Each day is keyed with FirstBarTradeGenerator's own classify_bar /
+    classify_gap / classify_trend on its first 5-min bar, the previous
+    session's close and the 50-session average of daily closes up to the
+    previous session (bars.daily_trend `ma50_value`). prob_high / prob_low
+    are the share of those days whose first bar holds the day high / low,
+    the *_10 columns allow `offset` points.
+    """
+    print("Building first-bar probability table...")
+    df = load_bars('5min', columns=['open', 'high', 'low', 'close'])
+    first = first_bar_frame(df)
+    daily = load_daily_trends()
+    ma_50 = pd.Series(daily['ma50_value'].to_numpy(), index=daily['date'])
+    first['ma_50'] = first['date'].dt.normalize().map(ma_50)
+    known = first['prev_close'].notna() & first['ma_50'].notna()
+
+    # The generator's own rules, applied to every day at once
+    generator = FirstBarTradeGenerator(prob_table=ProbabilityTable())
+    codes = generator.classify_batch(first['open'], first['high'], first['low'],
+                                     first['close'], first['prev_close'], first['ma_50'])
+    unknown = ~known.to_numpy()
+    keys = {}
+    for name, members in (('trend', TREND_TYPES), ('gap_type', GAP_TYPES), ('bar_type', BAR_TYPES)):
+        labels = np.array([m.value for m in members], dtype=object)[codes[name]]
+        labels[unknown] = 'unknown'
+        keys[name] = labels
+
+    cube = bar_conditional_curves(df, keys, max_offset=offset)
+    table = {}
+    for cell in np.ndindex(cube.shape):
+        key = tuple(cube.labels[dim][i] for dim, i in zip(cube.dims, cell))
+        days = int(cube.days[cell])
+        if 'unknown' in key or days < min_samples:
+            continue
+        table[key] = (
+            round(cube.high_set[cell][0, 0] / days, 4),
+            round(cube.low_set[cell][0, 0] / days, 4),
+            round(cube.high_set[cell][offset, 0] / days, 4),
+            round(cube.low_set[cell][offset, 0] / days, 4),
+            days,
+        )
+
+    meta = {
+        'source': 'bar_store',
+        'sources': _table_sources(),
+        'built': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'offset': offset,
+        'min_samples': min_samples,
+        'days': int(known.sum()),
+    }
+    return ProbabilityTable(table, meta)
+
+
 # =============================================================================
 # MAIN TRADE GENERATOR CLASS
 # =============================================================================
@@ -287,15 +476,20 @@ class FirstBarTradeGenerator:
     Generates 3 complete algorithmic trade ideas based on first bar analysis.
     """
 
-    def __init__(self, default_atr: float = 100.0):
+    def __init__(self, default_atr: float = 100.0,
+                 prob_table: Optional[ProbabilityTable] = None,
+                 params: Optional[StrategyParams] = None):
         """
         Initialize the trade generator.
 
         Args:
             default_atr: Default ATR value if not provided (typical NIFTY range ~100-150)
+            prob_table: Probability lookup (default: ProbabilityTable.default())
+            params: Stop/target/sizing multipliers (default: StrategyParams())
         """
-        self.prob_table = ProbabilityTable()
+        self.prob_table = prob_table or ProbabilityTable.default()
         self.default_atr = default_atr
+        self.params = params or StrategyParams()
 
     # -------------------------------------------------------------------------
     # CLASSIFICATION METHODS
@@ -504,11 +698,7 @@ class FirstBarTradeGenerator:
         kelly = (win_prob * risk_reward - q) / risk_reward
 
         # Use fraction of Kelly based on confidence
-        kelly_fraction = {
-            'HIGH': 0.30,
-            'MEDIUM': 0.20,
-            'LOW': 0.10
-        }.get(confidence, 0.15)
+        kelly_fraction = dict(zip(CONFIDENCE_LEVELS, self.params.kelly_fractions)).get(confidence, 0.15)
 
         safe_kelly = kelly * kelly_fraction
 
@@ -538,28 +728,30 @@ class FirstBarTradeGenerator:
         Reward: Higher (full move capture potential)
         """
         confidence = self._get_confidence(ctx.sample_size)
+        p = self.params
+        r_1, r_2, r_3 = p.fade_targets_r
 
         if direction == TradeDirection.SHORT:
             entry_price = bar.close
-            stop_loss = bar.high + (atr * 0.15)  # Just above bar 1 high
+            stop_loss = bar.high + (atr * p.fade_stop_atr)  # Just above bar 1 high
             stop_distance = stop_loss - entry_price
 
-            # Targets based on ATR multiples
-            target_1 = entry_price - (stop_distance * 1.0)   # 1:1 R:R
-            target_2 = entry_price - (stop_distance * 2.0)   # 2:1 R:R
-            target_3 = entry_price - (stop_distance * 3.0)   # 3:1 R:R
+            # Targets at multiples of the stop distance (1:1, 2:1, 3:1 by default)
+            target_1 = entry_price - (stop_distance * r_1)
+            target_2 = entry_price - (stop_distance * r_2)
+            target_3 = entry_price - (stop_distance * r_3)
 
             win_prob = ctx.prob_high_bar1_offset10  # Use offset probability for realistic stop
             trigger = f"Enter SHORT at {entry_price:.0f} immediately after bar 1 close"
 
         elif direction == TradeDirection.LONG:
             entry_price = bar.close
-            stop_loss = bar.low - (atr * 0.15)  # Just below bar 1 low
+            stop_loss = bar.low - (atr * p.fade_stop_atr)  # Just below bar 1 low
             stop_distance = entry_price - stop_loss
 
-            target_1 = entry_price + (stop_distance * 1.0)
-            target_2 = entry_price + (stop_distance * 2.0)
-            target_3 = entry_price + (stop_distance * 3.0)
+            target_1 = entry_price + (stop_distance * r_1)
+            target_2 = entry_price + (stop_distance * r_2)
+            target_3 = entry_price + (stop_distance * r_3)
 
             win_prob = ctx.prob_low_bar1_offset10
             trigger = f"Enter LONG at {entry_price:.0f} immediately after bar 1 close"
@@ -569,7 +761,7 @@ class FirstBarTradeGenerator:
             return self._create_no_trade_idea("AGGRESSIVE_FADE", ctx)
 
         # Calculate R:R and expected value
-        avg_rr = 2.0  # Average of 1:1, 2:1, 3:1 with 33% each
+        avg_rr = p.average_rr(p.fade_targets_r)  # Average of 1:1, 2:1, 3:1 with 33% each
         expected_value = (win_prob * avg_rr * stop_distance) - ((1 - win_prob) * stop_distance)
         position_size = self._calculate_position_size(win_prob, avg_rr, confidence)
 
@@ -577,7 +769,7 @@ class FirstBarTradeGenerator:
             name="Aggressive Fade",
             strategy_type="AGGRESSIVE_FADE",
             direction=direction,
-            entry_type="IMMEDIATE",
+            entry_type=ENTRY_TYPES['AGGRESSIVE_FADE'],
             entry_price=entry_price,
             stop_loss=stop_loss,
             stop_distance=stop_distance,
@@ -589,9 +781,11 @@ class FirstBarTradeGenerator:
             win_probability=win_prob,
             risk_reward_ratio=avg_rr,
             expected_value=expected_value,
-            max_holding_bars=20 if ctx.bar_type in [BarType.STRONG_BEAR, BarType.STRONG_BULL] else 30,
-            entry_valid_until_bar=1,
-            risk_level="HIGH",
+            max_holding_bars=(STRONG_BAR_FADE_HOLDING_BARS
+                              if ctx.bar_type in [BarType.STRONG_BEAR, BarType.STRONG_BULL]
+                              else MAX_HOLDING_BARS['AGGRESSIVE_FADE']),
+            entry_valid_until_bar=ENTRY_VALID_UNTIL_BAR['AGGRESSIVE_FADE'],
+            risk_level=RISK_LEVELS['AGGRESSIVE_FADE'],
             confidence=confidence,
             trigger_condition=trigger,
             notes=f"Immediate entry opposite to {ctx.bar_type.value} bar. "
@@ -612,39 +806,41 @@ class FirstBarTradeGenerator:
         Reward: Higher R:R due to better entry
         """
         confidence = self._get_confidence(ctx.sample_size)
+        p = self.params
+        r_1, r_2, r_3 = p.confirm_targets_r
 
         if direction == TradeDirection.SHORT:
             # Wait for price to rally back toward bar 1 high
             entry_zone_high = bar.high
-            entry_zone_low = bar.high - (atr * 0.20)
+            entry_zone_low = bar.high - (atr * p.confirm_zone_atr)
             entry_price = (entry_zone_high + entry_zone_low) / 2  # Midpoint of zone
 
-            stop_loss = bar.high + (atr * 0.10)  # Tighter stop possible
+            stop_loss = bar.high + (atr * p.confirm_stop_atr)  # Tighter stop possible
             stop_distance = stop_loss - entry_price
 
-            target_1 = entry_price - (stop_distance * 1.5)
-            target_2 = entry_price - (stop_distance * 2.5)
-            target_3 = entry_price - (stop_distance * 4.0)
+            target_1 = entry_price - (stop_distance * r_1)
+            target_2 = entry_price - (stop_distance * r_2)
+            target_3 = entry_price - (stop_distance * r_3)
 
             # Lower win prob as trade may not trigger
-            trigger_prob = 0.65  # Estimated probability of getting filled
+            trigger_prob = CONFIRM_TRIGGER_PROB
             win_prob = ctx.prob_high_bar1_offset10 * trigger_prob
 
             trigger = f"Enter SHORT if price rallies to {entry_zone_low:.0f}-{entry_zone_high:.0f} zone in bars 2-6"
 
         elif direction == TradeDirection.LONG:
             entry_zone_low = bar.low
-            entry_zone_high = bar.low + (atr * 0.20)
+            entry_zone_high = bar.low + (atr * p.confirm_zone_atr)
             entry_price = (entry_zone_high + entry_zone_low) / 2
 
-            stop_loss = bar.low - (atr * 0.10)
+            stop_loss = bar.low - (atr * p.confirm_stop_atr)
             stop_distance = entry_price - stop_loss
 
-            target_1 = entry_price + (stop_distance * 1.5)
-            target_2 = entry_price + (stop_distance * 2.5)
-            target_3 = entry_price + (stop_distance * 4.0)
+            target_1 = entry_price + (stop_distance * r_1)
+            target_2 = entry_price + (stop_distance * r_2)
+            target_3 = entry_price + (stop_distance * r_3)
 
-            trigger_prob = 0.65
+            trigger_prob = CONFIRM_TRIGGER_PROB
             win_prob = ctx.prob_low_bar1_offset10 * trigger_prob
 
             trigger = f"Enter LONG if price dips to {entry_zone_low:.0f}-{entry_zone_high:.0f} zone in bars 2-6"
@@ -652,7 +848,7 @@ class FirstBarTradeGenerator:
         else:
             return self._create_no_trade_idea("CONFIRMATION", ctx)
 
-        avg_rr = 2.67  # Better R:R due to better entry
+        avg_rr = p.average_rr(p.confirm_targets_r)  # Better R:R due to better entry
         expected_value = (win_prob * avg_rr * stop_distance) - ((1 - win_prob) * stop_distance)
         position_size = self._calculate_position_size(win_prob / trigger_prob, avg_rr, confidence)
 
@@ -660,7 +856,7 @@ class FirstBarTradeGenerator:
             name="Confirmation Entry",
             strategy_type="CONFIRMATION",
             direction=direction,
-            entry_type="LIMIT",
+            entry_type=ENTRY_TYPES['CONFIRMATION'],
             entry_price=entry_price,
             entry_zone_high=entry_zone_high,
             entry_zone_low=entry_zone_low,
@@ -674,9 +870,9 @@ class FirstBarTradeGenerator:
             win_probability=win_prob,
             risk_reward_ratio=avg_rr,
             expected_value=expected_value,
-            max_holding_bars=25,
-            entry_valid_until_bar=6,
-            risk_level="MEDIUM",
+            max_holding_bars=MAX_HOLDING_BARS['CONFIRMATION'],
+            entry_valid_until_bar=ENTRY_VALID_UNTIL_BAR['CONFIRMATION'],
+            risk_level=RISK_LEVELS['CONFIRMATION'],
             confidence=confidence,
             trigger_condition=trigger,
             notes=f"Wait for pullback to bar 1 extreme zone. Better R:R but ~35% chance of no fill. "
@@ -698,25 +894,27 @@ class FirstBarTradeGenerator:
         Reward: Moderate (balanced approach)
         """
         confidence = self._get_confidence(ctx.sample_size)
+        p = self.params
+        r_1, r_2, r_3 = p.scaled_targets_r
 
         if direction == TradeDirection.SHORT:
             # Three entry levels
             entry_1 = bar.close  # Immediate
-            entry_2 = bar.high - (atr * 0.05)  # Near high (pullback)
-            entry_3 = bar.low - (atr * 0.10)  # Below low (breakdown confirmation)
+            entry_2 = bar.high - (atr * p.scaled_pullback_atr)  # Near high (pullback)
+            entry_3 = bar.low - (atr * p.scaled_breakout_atr)  # Below low (breakdown confirmation)
 
             avg_entry = (entry_1 + entry_2 + entry_3) / 3
 
             # Wider stop for scaled position
-            stop_loss = bar.high + (atr * 0.25)
+            stop_loss = bar.high + (atr * p.scaled_stop_atr)
             stop_distance = stop_loss - avg_entry
 
-            target_1 = avg_entry - (stop_distance * 1.0)
-            target_2 = avg_entry - (stop_distance * 1.75)
-            target_3 = avg_entry - (stop_distance * 2.5)
+            target_1 = avg_entry - (stop_distance * r_1)
+            target_2 = avg_entry - (stop_distance * r_2)
+            target_3 = avg_entry - (stop_distance * r_3)
 
             # Higher win prob due to averaging
-            win_prob = min(0.65, ctx.prob_high_bar1_offset10 + 0.08)
+            win_prob = min(SCALED_WIN_CAP, ctx.prob_high_bar1_offset10 + SCALED_WIN_BONUS)
 
             trigger = (f"Scale into SHORT: "
                       f"T1={entry_1:.0f} (now), "
@@ -725,19 +923,19 @@ class FirstBarTradeGenerator:
 
         elif direction == TradeDirection.LONG:
             entry_1 = bar.close
-            entry_2 = bar.low + (atr * 0.05)
-            entry_3 = bar.high + (atr * 0.10)
+            entry_2 = bar.low + (atr * p.scaled_pullback_atr)
+            entry_3 = bar.high + (atr * p.scaled_breakout_atr)
 
             avg_entry = (entry_1 + entry_2 + entry_3) / 3
 
-            stop_loss = bar.low - (atr * 0.25)
+            stop_loss = bar.low - (atr * p.scaled_stop_atr)
             stop_distance = avg_entry - stop_loss
 
-            target_1 = avg_entry + (stop_distance * 1.0)
-            target_2 = avg_entry + (stop_distance * 1.75)
-            target_3 = avg_entry + (stop_distance * 2.5)
+            target_1 = avg_entry + (stop_distance * r_1)
+            target_2 = avg_entry + (stop_distance * r_2)
+            target_3 = avg_entry + (stop_distance * r_3)
 
-            win_prob = min(0.65, ctx.prob_low_bar1_offset10 + 0.08)
+            win_prob = min(SCALED_WIN_CAP, ctx.prob_low_bar1_offset10 + SCALED_WIN_BONUS)
 
             trigger = (f"Scale into LONG: "
                       f"T1={entry_1:.0f} (now), "
@@ -747,35 +945,35 @@ class FirstBarTradeGenerator:
         else:
             return self._create_no_trade_idea("SCALED", ctx)
 
-        avg_rr = 1.75
+        avg_rr = p.average_rr(p.scaled_targets_r)
         expected_value = (win_prob * avg_rr * stop_distance) - ((1 - win_prob) * stop_distance)
         # Smaller per-tranche size
-        position_size = self._calculate_position_size(win_prob, avg_rr, confidence) * 0.33
+        position_size = self._calculate_position_size(win_prob, avg_rr, confidence) * SCALED_TRANCHE_SIZE
 
         return TradeIdea(
             name="Scaled Position",
             strategy_type="SCALED",
             direction=direction,
-            entry_type="SCALED",
+            entry_type=ENTRY_TYPES['SCALED'],
             entry_price=avg_entry,
             entry_zone_high=max(entry_1, entry_2, entry_3),
             entry_zone_low=min(entry_1, entry_2, entry_3),
             stop_loss=stop_loss,
             stop_distance=stop_distance,
             target_1=target_1,
-            target_1_pct=40.0,
+            target_1_pct=TARGET_PCTS['SCALED'][0],
             target_2=target_2,
-            target_2_pct=35.0,
+            target_2_pct=TARGET_PCTS['SCALED'][1],
             target_3=target_3,
-            target_3_pct=25.0,
+            target_3_pct=TARGET_PCTS['SCALED'][2],
             position_size_pct=position_size,
             risk_per_trade=stop_distance,
             win_probability=win_prob,
             risk_reward_ratio=avg_rr,
             expected_value=expected_value,
-            max_holding_bars=35,
-            entry_valid_until_bar=10,
-            risk_level="LOW",
+            max_holding_bars=MAX_HOLDING_BARS['SCALED'],
+            entry_valid_until_bar=ENTRY_VALID_UNTIL_BAR['SCALED'],
+            risk_level=RISK_LEVELS['SCALED'],
             confidence=confidence,
             trigger_condition=trigger,
             notes=f"Build position across 3 entries (33% each). "
@@ -847,6 +1045,382 @@ class FirstBarTradeGenerator:
 
         return ctx, ideas
 
+    # -------------------------------------------------------------------------
+    # BATCH GENERATION
+    # -------------------------------------------------------------------------
+
+    def classify_batch(self, open_price, high, low, close, prev_close,
+                       ma_50) -> Dict[str, np.ndarray]:
+        """
+        classify_bar / classify_gap / classify_trend over arrays of first bars.
+
+        Returns integer codes into BAR_TYPES / GAP_TYPES / TREND_TYPES
+        ('bar_type', 'gap_type', 'trend') plus 'gap_points' and
+        'trend_strength', equal to the scalar methods day by day.
+        """
+        o, h, l, c, pc, ma = np.broadcast_arrays(
+            *(np.asarray(x, dtype='float64') for x in (open_price, high, low, close, prev_close, ma_50)))
+
+        # classify_bar: STRONG_BULL, BULL, NEUTRAL, BEAR, STRONG_BEAR
+        rng = h - l
+        with np.errstate(divide='ignore', invalid='ignore'):
+            body_pct = np.where(rng == 0, 0.0, np.abs(c - o) / rng)
+        strong = body_pct > 0.60
+        bar_type = np.where(body_pct < 0.30, 2,
+                            np.where(c > o, np.where(strong, 0, 1), np.where(strong, 4, 3)))
+
+        # classify_gap: LARGE_GAP_UP, SMALL_GAP_UP, SMALL_GAP_DOWN, LARGE_GAP_DOWN
+        gap = o - pc
+        gap_type = np.select([gap >= 50, gap > 0, gap > -50], [0, 1, 2], default=3)
+
+        # classify_trend: UPTREND, DOWNTREND, BULL_TREND, BEAR_TREND
+        no_ma = ma == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff_pct = np.where(no_ma, 0.0, (c - ma) / ma * 100)
+        up = diff_pct > 0
+        large = (gap_type == 0) | (gap_type == 3)
+        trend = np.where(large, np.where(up, 2, 3), np.where(up, 0, 1))
+        trend[no_ma] = 0
+
+        return {'bar_type': bar_type, 'gap_type': gap_type, 'trend': trend,
+                'gap_points': gap, 'trend_strength': diff_pct}
+
+    def _lookup_array(self) -> np.ndarray:
+        """prob_table.lookup for every (trend, gap, bar) code, shape (4, 4, 5, 5)"""
+        return np.array([[[self.prob_table.lookup(self._get_trend_str(t),
+                                                  self._get_gap_type_str(g),
+                                                  self._get_bar_type_str(b))
+                           for b in BAR_TYPES] for g in GAP_TYPES] for t in TREND_TYPES],
+                        dtype='float64')
+
+    def build_context_batch(self, first_bars_df: pd.DataFrame, prev_close,
+                            ma_50) -> pd.DataFrame:
+        """
+        build_context for every row of `first_bars_df` (open/high/low/close).
+
+        Returns one row per input row (same index) with the MarketContext
+        fields; enum fields hold their values as categoricals.
+        """
+        codes = self.classify_batch(first_bars_df['open'], first_bars_df['high'],
+                                    first_bars_df['low'], first_bars_df['close'],
+                                    prev_close, ma_50)
+        return self.context_from_codes(codes['trend'], codes['gap_type'], codes['bar_type'],
+                                       codes['gap_points'], codes['trend_strength'],
+                                       index=first_bars_df.index)
+
+    def context_from_codes(self, trend, gap_type, bar_type, gap_points=0.0,
+                           trend_strength=0.0, index=None) -> pd.DataFrame:
+        """
+        MarketContext rows from TREND_TYPES / GAP_TYPES / BAR_TYPES codes
+        (the second half of build_context_batch; e.g. one row per cell).
+        """
+        trend, gap_type, bar_type, gap_points, trend_strength = np.broadcast_arrays(
+            np.asarray(trend, dtype='int64'), np.asarray(gap_type, dtype='int64'),
+            np.asarray(bar_type, dtype='int64'), np.asarray(gap_points, dtype='float64'),
+            np.asarray(trend_strength, dtype='float64'))
+        probs = self._lookup_array()[trend, gap_type, bar_type]
+        prob_high, prob_low, prob_high_10, prob_low_10 = probs[:, :4].T
+        sample_size = probs[:, 4].astype('int64')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            both = (prob_high > 0) & (prob_low > 0)
+            ratio = np.where(both, np.maximum(prob_high / prob_low, prob_low / prob_high),
+                             np.where((prob_high > 0) | (prob_low > 0), np.inf, 1.0))
+        edge = np.select([ratio >= 10, ratio >= 5, ratio >= 2, ratio >= 1.5],
+                         ['EXTREME', 'STRONG', 'MODERATE', 'WEAK'], default='NONE')
+
+        def categorical(code, members):
+            return pd.Categorical.from_codes(code, categories=[m.value for m in members])
+
+        return pd.DataFrame({
+            'trend': categorical(trend, TREND_TYPES),
+            'gap_type': categorical(gap_type, GAP_TYPES),
+            'bar_type': categorical(bar_type, BAR_TYPES),
+            'gap_points': gap_points,
+            'trend_strength': trend_strength,
+            'prob_high_bar1': prob_high,
+            'prob_low_bar1': prob_low,
+            'prob_high_bar1_offset10': prob_high_10,
+            'prob_low_bar1_offset10': prob_low_10,
+            'prob_either_bar1': prob_high + prob_low,
+            'sample_size': sample_size,
+            'high_low_ratio': ratio,
+            'edge_strength': edge.astype(object),
+        }, index=index)
+
+    def _direction_batch(self, ctx: pd.DataFrame) -> np.ndarray:
+        """_determine_direction per row, as codes into DIRECTIONS (LONG, SHORT, NO_TRADE)"""
+        bar = ctx['bar_type'].cat.codes.to_numpy()
+        prob_high = ctx['prob_high_bar1'].to_numpy()
+        prob_low = ctx['prob_low_bar1'].to_numpy()
+        neutral = bar == 2
+        short = (((bar == 3) | (bar == 4)) & (prob_high >= 0.25)) | \
+                (neutral & (prob_high > prob_low + 0.10))
+        long = (((bar == 0) | (bar == 1)) & (prob_low >= 0.25)) | \
+               (neutral & ~short & (prob_low > prob_high + 0.10))
+        direction = np.select([short, long], [1, 0], default=2)
+        direction[(ctx['edge_strength'] == 'NONE').to_numpy()] = 2
+        return direction
+
+    def _position_size_batch(self, win_prob: np.ndarray, risk_reward: float,
+                             confidence: np.ndarray) -> np.ndarray:
+        """_calculate_position_size per row (confidence as CONFIDENCE_LEVELS codes)"""
+        q = 1 - win_prob
+        kelly = (win_prob * risk_reward - q) / risk_reward
+        safe_kelly = kelly * np.array(self.params.kelly_fractions)[confidence]
+        size = np.maximum(0.5, np.minimum(3.0, safe_kelly * 100))
+        if risk_reward <= 0:
+            return np.full(len(win_prob), 0.5)
+        return np.where(win_prob <= 0, 0.5, size)
+
+    def strategy_odds_batch(self, ctx: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        What the probability cell of each context row fixes for the three
+        strategies (STRATEGY_TYPES order):
+            direction         codes into DIRECTIONS
+            confidence        codes into CONFIDENCE_LEVELS
+            win_base          offset-10 probability of the side traded
+            win_probability   (rows x 3)
+            position_size     (rows x 3) position_size_pct of a trade
+            max_holding_bars  (rows x 3)
+        """
+        direction = self._direction_batch(ctx)
+        short = direction == 1
+        sample_size = ctx['sample_size'].to_numpy()
+        confidence = np.select([sample_size >= 200, sample_size >= 100], [0, 1], default=2)
+        win_base = np.where(short, ctx['prob_high_bar1_offset10'].to_numpy(),
+                            ctx['prob_low_bar1_offset10'].to_numpy())
+        bar_code = ctx['bar_type'].cat.codes.to_numpy()
+        p = self.params
+
+        confirm_win = win_base * CONFIRM_TRIGGER_PROB
+        scaled_win = np.minimum(SCALED_WIN_CAP, win_base + SCALED_WIN_BONUS)
+        sizes = [
+            self._position_size_batch(win_base, p.average_rr(p.fade_targets_r), confidence),
+            self._position_size_batch(confirm_win / CONFIRM_TRIGGER_PROB,
+                                      p.average_rr(p.confirm_targets_r), confidence),
+            self._position_size_batch(scaled_win, p.average_rr(p.scaled_targets_r), confidence)
+            * SCALED_TRANCHE_SIZE,
+        ]
+        fade_holding = np.where((bar_code == 0) | (bar_code == 4), STRONG_BAR_FADE_HOLDING_BARS,
+                                MAX_HOLDING_BARS['AGGRESSIVE_FADE'])
+        holding = [fade_holding] + [np.full(len(ctx), MAX_HOLDING_BARS[s]) for s in STRATEGY_TYPES[1:]]
+        return {
+            'direction': direction,
+            'confidence': confidence,
+            'win_base': win_base,
+            'win_probability': np.column_stack([win_base, confirm_win, scaled_win]),
+            'position_size': np.column_stack(sizes),
+            'max_holding_bars': np.column_stack(holding),
+        }
+
+    def strategy_levels(self, high, low, close, atr) -> Dict[str, Tuple]:
+        """
+        Price levels of the _generate_* methods for a LONG trade, per
+        strategy: (entry, stop, stop_distance, (target_1, target_2, target_3),
+        entries), where entries is the fade's (entry,), the confirmation's
+        (zone_low, zone_high) and the scaled tranches (now, pullback, breakout).
+
+        A SHORT trade is the same arithmetic on negated prices (high = -low,
+        low = -high, close = -close) with every price negated back; negation
+        is exact, so the levels equal the SHORT branches bit for bit. Works
+        on floats (signal_service) and numpy arrays (the batch path) alike.
+        """
+        p = self.params
+
+        def brackets(strategy_type, entry, stop, entries):
+            distance = entry - stop
+            r_1, r_2, r_3 = p.targets_r(strategy_type)
+            targets = (entry + (distance * r_1), entry + (distance * r_2), entry + (distance * r_3))
+            return entry, stop, distance, targets, entries
+
+        zone_low, zone_high = low, low + (atr * p.confirm_zone_atr)
+        entries = (close, low + (atr * p.scaled_pullback_atr), high + (atr * p.scaled_breakout_atr))
+        return {
+            'AGGRESSIVE_FADE': brackets('AGGRESSIVE_FADE', close, low - (atr * p.fade_stop_atr), (close,)),
+            'CONFIRMATION': brackets('CONFIRMATION', (zone_high + zone_low) / 2,
+                                     low - (atr * p.confirm_stop_atr), (zone_low, zone_high)),
+            'SCALED': brackets('SCALED', (entries[0] + entries[1] + entries[2]) / 3,
+                               low - (atr * p.scaled_stop_atr), entries),
+        }
+
+    @staticmethod
+    def signed_bar(high, low, close, short):
+        """(side, high, low, close) in the LONG frame of strategy_levels, per row"""
+        high, low, close, short = (np.asarray(x) for x in (high, low, close, short))
+        return (np.where(short, -1.0, 1.0), np.where(short, -low, high), np.where(short, -high, low),
+                np.where(short, -close, close))
+
+    def scaled_entry_levels(self, high, low, close, atr, short) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tranche prices of the SCALED strategy per row: (now, pullback,
+        breakout/breakdown), as in _generate_scaled_entry.
+        """
+        side, high, low, close = self.signed_bar(high, low, close, short)
+        entries = self.strategy_levels(high, low, close, np.asarray(atr, dtype='float64'))['SCALED'][4]
+        return tuple(e * side for e in entries)
+
+    def generate_trade_ideas_batch(self, first_bars_df: pd.DataFrame, prev_close,
+                                   ma_50, atr=None, text: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        generate_trade_ideas for every row of `first_bars_df` at once.
+
+        Args:
+            first_bars_df: First bars, one row per day (open/high/low/close)
+            prev_close: Previous day's close per row (array, Series or scalar)
+            ma_50: 50-period moving average per row
+            atr: Average True Range per row or scalar (default: default_atr)
+            text: Format trigger_condition / notes (False leaves them empty,
+                for backtests that only need the numbers)
+
+        Returns:
+            (contexts, ideas): contexts as from build_context_batch; ideas
+            with one row per day x strategy (AGGRESSIVE_FADE, CONFIRMATION,
+            SCALED, in generate_trade_ideas order), a `day` column holding the
+            input index label and one column per TradeIdea field (direction as
+            its value, as in TradeIdea.to_dict).
+        """
+        if atr is None:
+            atr = self.default_atr
+        n = len(first_bars_df)
+        o, h, l, c, atr = np.broadcast_arrays(
+            *(np.asarray(x, dtype='float64') for x in (first_bars_df['open'], first_bars_df['high'],
+                                                       first_bars_df['low'], first_bars_df['close'], atr)))
+
+        ctx = self.build_context_batch(first_bars_df, prev_close, ma_50)
+        odds = self.strategy_odds_batch(ctx)
+        direction, confidence = odds['direction'], odds['confidence']
+        win, size, holding = odds['win_probability'], odds['position_size'], odds['max_holding_bars']
+        short = direction == 1
+        trade = direction != 2
+        side_name = np.where(short, 'SHORT', 'LONG')
+        sample_size = ctx['sample_size'].to_numpy()
+        prob_high = ctx['prob_high_bar1'].to_numpy()
+        prob_low = ctx['prob_low_bar1'].to_numpy()
+        bar_code = ctx['bar_type'].cat.codes.to_numpy()
+        edge = ctx['edge_strength'].to_numpy()
+
+        # Text is the slow part: notes depend only on the probability-table
+        # cell, so format them once per cell; price triggers only for trades
+        cell = (ctx['trend'].cat.codes.to_numpy() * len(GAP_TYPES)
+                + ctx['gap_type'].cat.codes.to_numpy()) * len(BAR_TYPES) + bar_code
+        _, cell_rows, cell_of_row = np.unique(cell, return_index=True, return_inverse=True)
+        trade_rows = np.flatnonzero(trade)
+
+        def per_cell(fmt):
+            if not text:
+                return np.full(n, "", dtype=object)
+            return np.array([fmt(i) for i in cell_rows], dtype=object)[cell_of_row.ravel()]
+
+        def per_trade(fmt, *columns):
+            out = np.full(n, "", dtype=object)
+            if not text:
+                return out
+            out[trade_rows] = [fmt(*values) for values in zip(*(col[trade_rows] for col in columns))]
+            return out
+
+        def ev(win_prob, rr, stop_distance):
+            return (win_prob * rr * stop_distance) - ((1 - win_prob) * stop_distance)
+
+        p = self.params
+        side, h_s, l_s, c_s = self.signed_bar(h, l, c, short)
+        levels = self.strategy_levels(h_s, l_s, c_s, atr)
+
+        def idea_columns(strategy):
+            entry, stop, dist, targets, entries = levels[strategy]
+            k = STRATEGY_TYPES.index(strategy)
+            rr = p.average_rr(p.targets_r(strategy))
+            pcts = TARGET_PCTS[strategy]
+            return {
+                'entry_type': ENTRY_TYPES[strategy],
+                'entry_price': entry * side, 'stop_loss': stop * side, 'stop_distance': dist,
+                'target_1': targets[0] * side, 'target_2': targets[1] * side, 'target_3': targets[2] * side,
+                'position_size_pct': size[:, k],
+                'win_probability': win[:, k], 'risk_reward_ratio': rr,
+                'expected_value': ev(win[:, k], rr, dist),
+                'max_holding_bars': holding[:, k],
+                'entry_valid_until_bar': ENTRY_VALID_UNTIL_BAR[strategy], 'risk_level': RISK_LEVELS[strategy],
+                'target_1_pct': pcts[0], 'target_2_pct': pcts[1], 'target_3_pct': pcts[2],
+            }, tuple(e * side for e in entries)
+
+        # STRATEGY 1: AGGRESSIVE FADE
+        fade, (entry,) = idea_columns('AGGRESSIVE_FADE')
+        fade.update({
+            'name': "Aggressive Fade",
+            'entry_zone_high': 0.0, 'entry_zone_low': 0.0,
+            'trigger_condition': per_trade(
+                lambda s, e: f"Enter {s} at {e:.0f} immediately after bar 1 close", side_name, entry),
+            'notes': per_cell(lambda i: f"Immediate entry opposite to {BAR_TYPES[bar_code[i]].value} bar. "
+                                        f"Based on {prob_high[i]:.0%}/{prob_low[i]:.0%} high/low probability. "
+                                        f"Sample: {sample_size[i]} days."),
+        })
+
+        # STRATEGY 2: CONFIRMATION ENTRY (the zone's ends swap sides for a short)
+        confirmation, (zone_a, zone_b) = idea_columns('CONFIRMATION')
+        zone_low, zone_high = np.where(short, zone_b, zone_a), np.where(short, zone_a, zone_b)
+        confirmation.update({
+            'name': "Confirmation Entry",
+            'entry_zone_high': zone_high, 'entry_zone_low': zone_low,
+            'trigger_condition': per_trade(
+                lambda s, zl, zh: f"Enter {s} if price {'rallies' if s == 'SHORT' else 'dips'} "
+                                  f"to {zl:.0f}-{zh:.0f} zone in bars 2-6", side_name, zone_low, zone_high),
+            'notes': "Wait for pullback to bar 1 extreme zone. Better R:R but ~35% chance of no fill. "
+                     "Cancel if not triggered by bar 6.",
+        })
+
+        # STRATEGY 3: SCALED POSITION
+        scaled, (entry_1, entry_2, entry_3) = idea_columns('SCALED')
+        scaled.update({
+            'name': "Scaled Position",
+            'entry_zone_high': np.maximum(np.maximum(entry_1, entry_2), entry_3),
+            'entry_zone_low': np.minimum(np.minimum(entry_1, entry_2), entry_3),
+            'trigger_condition': per_trade(
+                lambda s, e1, e2, e3: f"Scale into {s}: T1={e1:.0f} (now), "
+                                      f"T2={e2:.0f} ({'pullback' if s == 'SHORT' else 'dip'}), "
+                                      f"T3={e3:.0f} ({'breakdown' if s == 'SHORT' else 'breakout'})",
+                side_name, entry_1, entry_2, entry_3),
+            'notes': "Build position across 3 entries (33% each). "
+                     "If only partial fill, adjust stop accordingly. "
+                     "Most conservative approach with best risk management.",
+        })
+
+        # Rows without a trade get _create_no_trade_idea
+        no_trade_notes = per_cell(lambda i: f"Edge strength: {edge[i]}. "
+                                            f"High prob: {prob_high[i]:.0%}, Low prob: {prob_low[i]:.0%}. "
+                                            f"Bar type: {BAR_TYPES[bar_code[i]].value}. "
+                                            f"Consider waiting for better setup.")
+        no_trade = {
+            'entry_type': "NONE", 'entry_price': 0.0, 'stop_loss': 0.0, 'stop_distance': 0.0,
+            'target_1': 0.0, 'target_2': 0.0, 'target_3': 0.0, 'position_size_pct': 0.0,
+            'risk_per_trade': 0.0,
+            'win_probability': 0.0, 'risk_reward_ratio': 0.0, 'expected_value': 0.0,
+            'max_holding_bars': 0, 'entry_valid_until_bar': DEFAULT_ENTRY_VALID_UNTIL_BAR, 'risk_level': "NONE",
+            'entry_zone_high': 0.0, 'entry_zone_low': 0.0,
+            'target_1_pct': DEFAULT_TARGET_PCTS[0], 'target_2_pct': DEFAULT_TARGET_PCTS[1],
+            'target_3_pct': DEFAULT_TARGET_PCTS[2],
+            'trigger_condition': "No trade - insufficient edge", 'notes': no_trade_notes,
+        }
+
+        columns = {}
+        strategies = list(zip(STRATEGY_TYPES, (fade, confirmation, scaled)))
+        for name, values in strategies:
+            values['strategy_type'] = name
+            values['direction'] = np.array([d.value for d in DIRECTIONS])[direction]
+            values['confidence'] = np.array(CONFIDENCE_LEVELS)[confidence]
+            values['risk_per_trade'] = values['stop_distance']
+            for col, value in no_trade.items():
+                values[col] = np.where(trade, np.broadcast_to(values[col], n),
+                                       np.broadcast_to(value, n))
+            values['name'] = np.where(trade, values['name'], f"No Trade ({name})")
+
+        # Day-major rows: (day 0: fade, confirmation, scaled), (day 1: ...)
+        for f in fields(TradeIdea):
+            columns[f.name] = np.column_stack(
+                [np.broadcast_to(values[f.name], n) for _, values in strategies]).ravel()
+        ideas = pd.DataFrame(columns)
+        ideas.insert(0, 'day', np.repeat(first_bars_df.index.to_numpy(), len(strategies)))
+        return ctx, ideas
+
     # -------------------------------------------------------------------------
     # OUTPUT FORMATTING
     # -------------------------------------------------------------------------
@@ -1001,6 +1575,26 @@ def get_trade_ideas(open_price: float, high: float, low: float, close: float,
     return [idea.to_dict() for idea in ideas]
 
 
+def get_trade_ideas_batch(first_bars_df: pd.DataFrame, prev_close, ma_50,
+                          atr=100.0) -> pd.DataFrame:
+    """
+    Trade ideas for many days at once (for backtests over history).
+
+    Args:
+        first_bars_df: First bars, one row per day (open/high/low/close)
+        prev_close: Previous day's close per row
+        ma_50: 50-period moving average per row
+        atr: Average True Range per row or scalar (default 100)
+
+    Returns:
+        DataFrame with one row per day x strategy: `day` (index label of
+        first_bars_df) plus the TradeIdea fields
+    """
+    generator = FirstBarTradeGenerator()
+    ctx, ideas = generator.generate_trade_ideas_batch(first_bars_df, prev_close, ma_50, atr)
+    return ideas
+
+
 # =============================================================================
 # EXAMPLE USAGE
 # =============================================================================
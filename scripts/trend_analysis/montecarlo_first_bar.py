@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bars import load_session_cube
+from bars.montecarlo import simulate_paths
+from backtest_first_bar import backtest_ideas, daily_returns, first_bar_inputs, full_position_pct
+from first_bar_trade_generator import FirstBarTradeGenerator, StrategyParams
+
+# Drawdown and ruin risk of position-sizing policies for the three
+# FirstBarTradeGenerator strategies traded together. The per-trade R
+# multiples come from the backtest_first_bar.py backtest of every day; each
+# policy only changes the size each trade is taken at, so a day's return is
+# sum(R x size %) over its trades. bars.montecarlo then strings random blocks
+# of BLOCK consecutive historical days into N_PATHS paths of HORIZON days
+# (every policy on the same draws) and compounds them.
+#
+# Kelly policies are _calculate_position_size (capped fractional Kelly,
+# 0.5% - 3%) with the Kelly fractions per confidence level below; fixed
+# policies risk the same % of capital on every idea. Sizes are of the whole
+# position (backtest_first_bar.full_position_pct), as R is: a Kelly-sized
+# SCALED idea is its three tranches, not one.
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../output/first_bar_montecarlo")
+N_PATHS = 100_000
+HORIZON = 250           # sessions, about a year
+BLOCK = 5               # days per bootstrap block
+RUIN_LEVEL = 0.5        # ruined once equity is at half the starting capital
+SEED = 0
+
+KELLY_POLICIES = {
+    'kelly_half': (0.15, 0.10, 0.05),
+    'kelly_default': StrategyParams().kelly_fractions,
+    'kelly_double': (0.60, 0.40, 0.20),
+    'kelly_full': (1.0, 1.0, 1.0),
+}
+FIXED_POLICIES = {
+    'fixed_0.5pct': 0.5,
+    'fixed_1pct': 1.0,
+    'fixed_2pct': 2.0,
+}
+
+
+def policy_sizes(generator: FirstBarTradeGenerator, ideas: pd.DataFrame,
+                 inputs: pd.DataFrame) -> pd.DataFrame:
+    """Whole-position size (%) of every idea under each policy, one column per policy"""
+    sizes = pd.DataFrame(index=ideas.index)
+    key = pd.MultiIndex.from_frame(ideas[['day', 'strategy_type']])
+    for name, fractions in KELLY_POLICIES.items():
+        sized = FirstBarTradeGenerator(prob_table=generator.prob_table,
+                                       params=generator.params.with_values(kelly_fractions=fractions))
+        _, other = sized.generate_trade_ideas_batch(
+            inputs[['open', 'high', 'low', 'close']], inputs['prev_close'], inputs['ma_50'],
+            inputs['atr'], text=False)
+        size = other.set_index(['day', 'strategy_type'])['position_size_pct']
+        sizes[name] = full_position_pct(ideas['strategy_type'], size.reindex(key).to_numpy())
+    for name, size in FIXED_POLICIES.items():
+        sizes[name] = size
+    return sizes
+
+
+def policy_returns(ideas: pd.DataFrame, sizes: pd.DataFrame, inputs: pd.DataFrame) -> pd.DataFrame:
+    """(days x policies) return on capital, %, of all strategies together"""
+    returns = {}
+    for name in sizes:
+        pnl_pct = np.where(ideas['filled'], ideas['r_multiple'] * sizes[name], 0.0)
+        pnl, _ = daily_returns(ideas.assign(pnl_pct=pnl_pct), inputs)
+        returns[name] = pnl.sum(axis=1)
+    return pd.DataFrame(returns, index=pd.DatetimeIndex(inputs['date']))
+
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cube = load_session_cube('5min')
+    inputs = first_bar_inputs(cube)
+    generator = FirstBarTradeGenerator()
+
+    print("=" * 100)
+    print("FIRST BAR STRATEGIES - POSITION SIZING MONTE CARLO")
+    print("=" * 100)
+    print(f"Days: {len(inputs)} ({inputs['date'].iloc[0].date()} to {inputs['date'].iloc[-1].date()}) | "
+          f"Paths: {N_PATHS} x {HORIZON} days | Block: {BLOCK} days | Ruin: equity <= {RUIN_LEVEL:.0%}")
+
+    ideas = backtest_ideas(cube, generator, inputs, text=False)
+    returns = policy_returns(ideas, policy_sizes(generator, ideas, inputs), inputs)
+    print(f"Trades: {int(ideas['filled'].sum())} on {int((returns != 0).any(axis=1).sum())} days")
+
+    t0 = time.perf_counter()
+    result = simulate_paths(returns, N_PATHS, HORIZON, BLOCK, RUIN_LEVEL, SEED)
+    print(f"Simulated in {time.perf_counter() - t0:.1f}s")
+
+    # The history in its actual order, for reference
+    equity = np.vstack([np.ones(returns.shape[1]), np.cumprod(1 + returns.to_numpy() / 100, axis=0)])
+    peak = np.maximum.accumulate(equity, axis=0)
+    summary = result.summary()
+    summary.insert(1, 'avg_daily_return', returns.mean().to_numpy())
+    summary['history_max_drawdown'] = ((peak - equity) / peak).max(axis=0) * 100
+    summary['history_return'] = (equity[-1] - 1) * 100
+
+    pd.set_option('display.width', 250)
+    print(f"\nPER POLICY (drawdown and returns in %, over {HORIZON}-day paths):")
+    print(summary.round(4).to_string(index=False))
+
+    summary.to_csv(f"{OUTPUT_DIR}/summary.csv", index=False)
+    returns.to_csv(f"{OUTPUT_DIR}/daily_returns.csv")
+
+    plt.figure(figsize=(12, 6))
+    bins = np.linspace(0, min(100, result.max_drawdown.max()), 100)
+    for i, name in enumerate(result.policies):
+        plt.hist(result.max_drawdown[:, i], bins=bins, histtype='step', density=True, label=name)
+    plt.title(f'First Bar Strategies - Max Drawdown over {HORIZON} Days ({N_PATHS} paths)')
+    plt.xlabel('Max drawdown (%)')
+    plt.ylabel('Density')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(f"{OUTPUT_DIR}/max_drawdown.png")
+    print(f"\nSaved summary, daily returns and drawdown histogram to {OUTPUT_DIR}")
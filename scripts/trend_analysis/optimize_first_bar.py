@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bars import load_session_cube
+from bars.optimize import grid_size, map_parallel, pareto_front, random_parameters, walk_forward_splits
+from backtest_first_bar import evaluate_param_sets, first_bar_inputs, init_evaluation
+from first_bar_trade_generator import ProbabilityTable, StrategyParams
+
+# Random search over the stop / target / Kelly multipliers of
+# FirstBarTradeGenerator (StrategyParams), each set scored with the
+# backtest_first_bar.py backtest on every day. Workers open the 5-min
+# session cube memory-mapped, so the processes share one copy of the bars.
+#
+# Objective: expectancy (return on capital per trade, % = R x position size)
+# against the max drawdown of the cumulative return, for the three strategies
+# traded together (SERIES). Walk-forward: the days are cut into N_SPLITS + 1
+# blocks; for each split the Pareto front of the training blocks is scored on
+# the next block. The probability table itself is built on the full history.
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../output/first_bar_optimizer")
+
+SPACE = {
+    'fade_stop_atr': [0.05, 0.10, 0.15, 0.20, 0.30, 0.40],
+    'fade_targets_r': [(0.5, 1.0, 1.5), (1.0, 1.5, 2.0), (1.0, 2.0, 3.0), (1.5, 3.0, 4.5)],
+    'confirm_zone_atr': [0.10, 0.20, 0.30],
+    'confirm_stop_atr': [0.05, 0.10, 0.20],
+    'confirm_targets_r': [(1.0, 2.0, 3.0), (1.5, 2.5, 4.0), (2.0, 3.0, 5.0)],
+    'scaled_pullback_atr': [0.0, 0.05, 0.10],
+    'scaled_breakout_atr': [0.05, 0.10, 0.20],
+    'scaled_stop_atr': [0.15, 0.25, 0.40],
+    'scaled_targets_r': [(0.75, 1.25, 2.0), (1.0, 1.75, 2.5), (1.5, 2.5, 3.5)],
+    'kelly_fractions': [(0.20, 0.10, 0.05), (0.30, 0.20, 0.10), (0.50, 0.30, 0.15)],
+}
+N_SETS = 2000
+SEED = 1
+N_SPLITS = 4
+SERIES = 'ALL'          # 'AGGRESSIVE_FADE', 'CONFIRMATION', 'SCALED' or 'ALL'
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cube = load_session_cube('5min')
+    inputs = first_bar_inputs(cube)
+    dates = pd.DatetimeIndex(inputs['date'])
+
+    splits = walk_forward_splits(len(inputs), N_SPLITS)
+    windows = {'full': slice(None)}
+    for k, (train, test) in enumerate(splits):
+        windows[f"train{k}"] = train
+        windows[f"test{k}"] = test
+
+    defaults = StrategyParams()
+    default_set = {name: getattr(defaults, name) for name in SPACE}
+    param_sets = [default_set] + [s for s in random_parameters(SPACE, N_SETS, SEED) if s != default_set]
+
+    print("=" * 100)
+    print("FIRST BAR STRATEGY PARAMETER SEARCH")
+    print("=" * 100)
+    print(f"Days: {len(inputs)} | Grid: {grid_size(SPACE)} sets | Evaluated: {len(param_sets)} | "
+          f"Series: {SERIES}")
+
+    t0 = time.perf_counter()
+    rows = map_parallel(evaluate_param_sets, param_sets, initializer=init_evaluation,
+                        initargs=(inputs, ProbabilityTable.default(), windows))
+    print(f"Evaluated in {time.perf_counter() - t0:.1f}s")
+
+    params = pd.DataFrame(param_sets).astype(str)
+    results = pd.concat([params, pd.DataFrame(rows)], axis=1)
+    results.insert(0, 'set', np.arange(len(results)))
+
+    def metric(window, name):
+        return f"{window}_{SERIES}_{name}"
+
+    # Full-history front
+    on_front = pareto_front(results, metric('full', 'expectancy'), metric('full', 'max_drawdown'))
+    front = results[on_front].sort_values(metric('full', 'expectancy'), ascending=False)
+    shown = ['set'] + list(SPACE) + [metric('full', m) for m in ('trades', 'expectancy', 'max_drawdown', 'total')]
+    pd.set_option('display.width', 250)
+    pd.set_option('display.max_colwidth', 20)
+    print(f"\nPARETO FRONT, FULL HISTORY ({dates[0]:%Y-%m-%d} to {dates[-1]:%Y-%m-%d}), "
+          f"expectancy vs max drawdown (% of capital):")
+    print(front[shown].round(3).to_string(index=False))
+    default_row = results.iloc[0]
+    print(f"\nDefault parameters: expectancy {default_row[metric('full', 'expectancy')]:.3f}%, "
+          f"max drawdown {default_row[metric('full', 'max_drawdown')]:.2f}% "
+          f"(on front: {bool(on_front[0])})")
+
+    # Walk-forward: fronts chosen in-sample, scored on the following block
+    print("\nWALK-FORWARD (front chosen on train, scored on test):")
+    print(f"{'Split':<6} {'Train':<25} {'Test':<25} {'Front':>6} {'Test exp (front)':>17} "
+          f"{'Test exp (all)':>15} {'Test DD (front)':>16} {'Test DD (all)':>14}")
+    walk_forward = []
+    for k, (train, test) in enumerate(splits):
+        train_front = pareto_front(results, metric(f"train{k}", 'expectancy'),
+                                   metric(f"train{k}", 'max_drawdown'))
+        test_exp = results[metric(f"test{k}", 'expectancy')]
+        test_dd = results[metric(f"test{k}", 'max_drawdown')]
+        train_days = dates[train]
+        test_days = dates[test]
+        print(f"{k:<6} {f'{train_days[0]:%Y-%m-%d} - {train_days[-1]:%Y-%m-%d}':<25} "
+              f"{f'{test_days[0]:%Y-%m-%d} - {test_days[-1]:%Y-%m-%d}':<25} {train_front.sum():>6} "
+              f"{test_exp[train_front].mean():>17.3f} {test_exp.mean():>15.3f} "
+              f"{test_dd[train_front].mean():>16.2f} {test_dd.mean():>14.2f}")
+        part = results.loc[train_front, ['set'] + list(SPACE)].copy()
+        part.insert(0, 'split', k)
+        for window in (f"train{k}", f"test{k}"):
+            for name in ('trades', 'expectancy', 'max_drawdown', 'total'):
+                part[f"{window[:-len(str(k))]}_{name}"] = results.loc[train_front, metric(window, name)]
+        walk_forward.append(part)
+
+    results.to_csv(f"{OUTPUT_DIR}/results.csv", index=False)
+    front.to_csv(f"{OUTPUT_DIR}/pareto_front.csv", index=False)
+    pd.concat(walk_forward, ignore_index=True).to_csv(f"{OUTPUT_DIR}/walk_forward.csv", index=False)
+    print(f"\nResults saved to {OUTPUT_DIR}")
@@ -0,0 +1,329 @@
+"""
+First Bar Signal Service
+========================
+Long-lived process that answers first-bar trade idea requests as
+JSON lines, over stdin/stdout or a local TCP socket:
+
+    python trend_analysis/signal_service.py                 # stdin / stdout
+    python trend_analysis/signal_service.py --port 8765     # 127.0.0.1:8765
+
+    -> {"op": "ideas", "id": 1, "open": 21500, "high": 21520, "low": 21450,
+        "close": 21460, "prev_close": 21470, "ma_50": 21400, "atr": 100}
+    <- {"id": 1, "ok": true, "context": {...}, "ideas": [{...}, {...}, {...}]}
+    -> {"op": "stats"}
+    <- {"ok": true, "stats": {"count": ..., "p50_us": ..., "p99_us": ..., ...}}
+    -> {"op": "ping"}
+
+`analyze_first_bar` builds a generator, looks the probabilities up by
+string key and formats a report on every call. Here everything that only
+depends on the (trend, gap type, first-bar type) cell (probabilities, edge,
+direction, confidence, win probability and position size of each strategy)
+is computed once at start-up, by the generator's own batch helpers run over
+every cell, into a list indexed by the cell's integer codes. A request is
+the generator's classification, one list lookup and the strategies' price
+levels from FirstBarTradeGenerator.strategy_levels (shared with the batch
+path). Ideas carry the TradeIdea numbers without the trigger/notes text;
+they equal FirstBarTradeGenerator.generate_trade_ideas for the same inputs.
+
+Latency of `ideas` requests is measured from the received line to the
+serialized response and kept for the last bars.live.LATENCY_WINDOW requests;
+`stats` reports count, mean, p50, p99 and max in microseconds.
+"""
+
+import argparse
+import json
+import math
+import os
+import socket
+import socketserver
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bars.live import LatencyStats
+from first_bar_trade_generator import (BAR_TYPES, CONFIDENCE_LEVELS, DEFAULT_ENTRY_VALID_UNTIL_BAR,
+                                       DEFAULT_TARGET_PCTS, DIRECTIONS, ENTRY_TYPES, ENTRY_VALID_UNTIL_BAR,
+                                       GAP_TYPES, RISK_LEVELS, STRATEGY_TYPES, TARGET_PCTS, TREND_TYPES,
+                                       FirstBar, FirstBarTradeGenerator, TradeDirection)
+
+
+DEFAULT_HOST = '127.0.0.1'
+
+# Enum -> integer code of the cell index
+BAR_CODES = {b: i for i, b in enumerate(BAR_TYPES)}
+GAP_CODES = {g: i for i, g in enumerate(GAP_TYPES)}
+TREND_CODES = {t: i for i, t in enumerate(TREND_TYPES)}
+
+
+# =============================================================================
+# RESULT RECORDS
+# =============================================================================
+
+class SignalContext:
+    """MarketContext of one request (enum fields as their values)"""
+    __slots__ = ('trend', 'gap_type', 'bar_type', 'gap_points', 'trend_strength',
+                 'prob_high_bar1', 'prob_low_bar1', 'prob_high_bar1_offset10',
+                 'prob_low_bar1_offset10', 'prob_either_bar1', 'sample_size',
+                 'high_low_ratio', 'edge_strength')
+
+    def to_dict(self) -> dict:
+        """Fields for JSON; the inf high_low_ratio of a one-sided cell becomes None"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        if math.isinf(self.high_low_ratio):
+            fields['high_low_ratio'] = None
+        return fields
+
+
+class SignalIdea:
+    """TradeIdea numbers of one strategy (no trigger/notes text)"""
+    __slots__ = ('strategy_type', 'direction', 'entry_type', 'entry_price',
+                 'entry_zone_low', 'entry_zone_high', 'stop_loss', 'stop_distance',
+                 'target_1', 'target_2', 'target_3', 'target_1_pct', 'target_2_pct',
+                 'target_3_pct', 'position_size_pct', 'risk_per_trade', 'win_probability',
+                 'risk_reward_ratio', 'expected_value', 'max_holding_bars',
+                 'entry_valid_until_bar', 'risk_level', 'confidence')
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Cell:
+    """Everything a (trend, gap type, bar type) cell fixes, computed once"""
+    __slots__ = ('trend', 'gap_type', 'bar_type', 'prob_high', 'prob_low', 'prob_high_10',
+                 'prob_low_10', 'sample_size', 'ratio', 'edge', 'direction', 'confidence',
+                 'win', 'size', 'max_holding')
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+class FirstBarSignalEngine:
+    """
+    FirstBarTradeGenerator with the probability table and every per-cell
+    quantity preloaded into an integer-indexed list.
+    """
+
+    def __init__(self, generator: Optional[FirstBarTradeGenerator] = None):
+        self.generator = generator or FirstBarTradeGenerator()
+        self.params = self.generator.params
+        p = self.params
+        self.avg_rr = tuple(p.average_rr(p.targets_r(s)) for s in STRATEGY_TYPES)
+        self.cells = self._build_cells()
+
+    def _build_cells(self) -> List[_Cell]:
+        """Every cell in (trend, gap type, bar type) code order"""
+        shape = (len(TREND_TYPES), len(GAP_TYPES), len(BAR_TYPES))
+        t, g, b = np.unravel_index(np.arange(int(np.prod(shape))), shape)
+        ctx = self.generator.context_from_codes(t, g, b)
+        odds = self.generator.strategy_odds_batch(ctx)
+        cells = []
+        for i, row in enumerate(ctx.itertuples(index=False)):
+            cell = _Cell()
+            cell.trend, cell.gap_type, cell.bar_type = row.trend, row.gap_type, row.bar_type
+            cell.prob_high, cell.prob_low = float(row.prob_high_bar1), float(row.prob_low_bar1)
+            cell.prob_high_10 = float(row.prob_high_bar1_offset10)
+            cell.prob_low_10 = float(row.prob_low_bar1_offset10)
+            cell.sample_size = int(row.sample_size)
+            cell.ratio, cell.edge = float(row.high_low_ratio), row.edge_strength
+            cell.direction = DIRECTIONS[odds['direction'][i]]
+            cell.confidence = CONFIDENCE_LEVELS[odds['confidence'][i]]
+            cell.win = tuple(float(x) for x in odds['win_probability'][i])
+            cell.size = tuple(float(x) for x in odds['position_size'][i])
+            cell.max_holding = tuple(int(x) for x in odds['max_holding_bars'][i])
+            cells.append(cell)
+        return cells
+
+    def signal(self, open_price: float, high: float, low: float, close: float,
+               prev_close: float, ma_50: float,
+               atr: Optional[float] = None) -> Tuple[SignalContext, List[SignalIdea]]:
+        """generate_trade_ideas for one first bar, from the preloaded cells"""
+        if atr is None:
+            atr = self.generator.default_atr
+
+        gen = self.generator
+        bar_type = gen.classify_bar(FirstBar(open_price, high, low, close))
+        gap_type, gap = gen.classify_gap(prev_close, open_price)
+        trend, diff_pct = gen.classify_trend(close, ma_50, gap_type)
+        cell = self.cells[(TREND_CODES[trend] * len(GAP_TYPES) + GAP_CODES[gap_type])
+                          * len(BAR_TYPES) + BAR_CODES[bar_type]]
+
+        ctx = SignalContext()
+        ctx.trend, ctx.gap_type, ctx.bar_type = cell.trend, cell.gap_type, cell.bar_type
+        ctx.gap_points, ctx.trend_strength = gap, diff_pct
+        ctx.prob_high_bar1, ctx.prob_low_bar1 = cell.prob_high, cell.prob_low
+        ctx.prob_high_bar1_offset10, ctx.prob_low_bar1_offset10 = cell.prob_high_10, cell.prob_low_10
+        ctx.prob_either_bar1 = cell.prob_high + cell.prob_low
+        ctx.sample_size, ctx.high_low_ratio, ctx.edge_strength = cell.sample_size, cell.ratio, cell.edge
+
+        if cell.direction == TradeDirection.NO_TRADE:
+            return ctx, [self._no_trade(s, cell) for s in STRATEGY_TYPES]
+        # The generator's LONG-frame levels; a short negates the bar and the levels
+        if cell.direction == TradeDirection.SHORT:
+            side, levels = -1.0, self.generator.strategy_levels(-low, -high, -close, atr)
+        else:
+            side, levels = 1.0, self.generator.strategy_levels(high, low, close, atr)
+        return ctx, [self._idea(cell, k, strategy_type, side, levels[strategy_type])
+                     for k, strategy_type in enumerate(STRATEGY_TYPES)]
+
+    # -------------------------------------------------------------------------
+    # IDEAS
+    # -------------------------------------------------------------------------
+
+    def _idea(self, cell: _Cell, k: int, strategy_type: str, side: float, levels: tuple) -> SignalIdea:
+        """One strategy's idea from its FirstBarTradeGenerator.strategy_levels entry"""
+        entry, stop, stop_distance, targets, entries = levels
+        idea = SignalIdea()
+        idea.strategy_type = strategy_type
+        idea.direction = cell.direction.value
+        idea.entry_type, idea.risk_level = ENTRY_TYPES[strategy_type], RISK_LEVELS[strategy_type]
+        idea.entry_price, idea.stop_loss, idea.stop_distance = entry * side, stop * side, stop_distance
+        target_1, target_2, target_3 = targets
+        idea.target_1, idea.target_2, idea.target_3 = target_1 * side, target_2 * side, target_3 * side
+        if strategy_type == 'CONFIRMATION':
+            # (zone_low, zone_high) in the LONG frame: the ends swap for a short
+            zone_low, zone_high = entries
+            if side > 0:
+                idea.entry_zone_low, idea.entry_zone_high = zone_low, zone_high
+            else:
+                idea.entry_zone_low, idea.entry_zone_high = -zone_high, -zone_low
+        elif strategy_type == 'SCALED':
+            entries = [e * side for e in entries]
+            idea.entry_zone_low, idea.entry_zone_high = min(entries), max(entries)
+        else:
+            idea.entry_zone_low = idea.entry_zone_high = 0.0
+        idea.target_1_pct, idea.target_2_pct, idea.target_3_pct = TARGET_PCTS[strategy_type]
+        win, rr = cell.win[k], self.avg_rr[k]
+        idea.win_probability, idea.risk_reward_ratio = win, rr
+        idea.expected_value = (win * rr * stop_distance) - ((1 - win) * stop_distance)
+        idea.position_size_pct = cell.size[k]
+        idea.risk_per_trade = stop_distance
+        idea.max_holding_bars = cell.max_holding[k]
+        idea.entry_valid_until_bar = ENTRY_VALID_UNTIL_BAR[strategy_type]
+        idea.confidence = cell.confidence
+        return idea
+
+    def _no_trade(self, strategy_type: str, cell: _Cell) -> SignalIdea:
+        idea = SignalIdea()
+        for name in SignalIdea.__slots__:
+            setattr(idea, name, 0)
+        idea.strategy_type = strategy_type
+        idea.direction = TradeDirection.NO_TRADE.value
+        idea.entry_type = idea.risk_level = "NONE"
+        idea.target_1_pct, idea.target_2_pct, idea.target_3_pct = DEFAULT_TARGET_PCTS
+        idea.entry_valid_until_bar = DEFAULT_ENTRY_VALID_UNTIL_BAR
+        idea.confidence = cell.confidence
+        return idea
+
+
+# =============================================================================
+# SERVICE
+# =============================================================================
+
+BAR_FIELDS = ('open', 'high', 'low', 'close', 'prev_close', 'ma_50')
+
+
+def _finite(request: dict, field: str) -> float:
+    value = float(request[field])
+    if not math.isfinite(value):
+        raise ValueError(f"Field '{field}' must be a finite number, got {request[field]!r}")
+    return value
+
+
+class SignalService:
+    """JSON-lines request handler around one engine"""
+
+    def __init__(self, engine: Optional[FirstBarSignalEngine] = None):
+        self.engine = engine or FirstBarSignalEngine()
+        self.latency = LatencyStats()
+        self.started = time.time()
+
+    def handle(self, line: str) -> str:
+        """One request line -> one response line (without the newline)"""
+        start = time.perf_counter_ns()
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            op = request.get('op', 'ideas')
+            if op == 'ideas':
+                atr = request.get('atr')
+                ctx, ideas = self.engine.signal(*(_finite(request, f) for f in BAR_FIELDS),
+                                                atr=None if atr is None else _finite(request, 'atr'))
+                response = {'id': request_id, 'ok': True, 'context': ctx.to_dict(),
+                            'ideas': [idea.to_dict() for idea in ideas]}
+            elif op == 'stats':
+                response = {'id': request_id, 'ok': True, 'stats': self.latency.snapshot(),
+                            'uptime_s': round(time.time() - self.started, 1),
+                            'table': self.engine.generator.prob_table.meta.get('source')}
+            elif op == 'ping':
+                response = {'id': request_id, 'ok': True}
+            else:
+                raise ValueError(f"Unknown op '{op}'. Expected one of ['ideas', 'stats', 'ping']")
+            # Strict JSON: levels that overflow (huge finite inputs) fail the request
+            out = json.dumps(response, allow_nan=False)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            error = f"Missing field {e}" if isinstance(e, KeyError) else str(e)
+            return json.dumps({'id': request_id, 'ok': False, 'error': error})
+        if op == 'ideas':
+            self.latency.record(time.perf_counter_ns() - start)
+        return out
+
+    def serve_stdio(self, stdin=None, stdout=None):
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        for line in stdin:
+            if line.strip():
+                stdout.write(self.handle(line) + "\n")
+                stdout.flush()
+
+    def serve_tcp(self, host: str = DEFAULT_HOST, port: int = 0) -> socketserver.ThreadingTCPServer:
+        """TCP server (not yet serving) whose connections exchange JSON lines"""
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def handle(self):
+                for raw in self.rfile:
+                    if raw.strip():
+                        self.wfile.write((service.handle(raw.decode()) + "\n").encode())
+                        self.wfile.flush()
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="First-bar trade idea service (JSON lines)")
+    parser.add_argument('--port', type=int, default=None,
+                        help="Serve on a local TCP port instead of stdin/stdout")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    args = parser.parse_args()
+
+    service = SignalService()
+    if args.port is None:
+        service.serve_stdio()
+        return
+    server = service.serve_tcp(args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"First-bar signal service on {host}:{port} "
+          f"(table: {service.engine.generator.prob_table.meta.get('source')})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
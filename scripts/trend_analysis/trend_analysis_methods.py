@@ -1,85 +1,32 @@
 import pandas as pd
-import numpy as np
-import math
+import os
+import sys
 
-# Read the 2-hour CSV file
-df = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-df['date'] = pd.to_datetime(df['date'])
-df = df.sort_values('date').reset_index(drop=True)
-
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, ema, slope_degrees, adx, swing_flags
+from bars.evaluation import SCORE_FIELDS, forward_return_matrix, score_signals
 
-def calculate_ema(data, period):
-    """Calculate Exponential Moving Average"""
-    return data.ewm(span=period, adjust=False).mean()
-
-def calculate_slope_degrees(values, lookback=1):
-    """Calculate slope in degrees"""
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
-
-def calculate_atr(df, period=14):
-    """Calculate Average True Range"""
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    return atr
-
-def calculate_adx(df, period=14):
-    """Calculate ADX (Average Directional Index)"""
-    # Calculate +DM and -DM
-    high_diff = df['high'].diff()
-    low_diff = -df['low'].diff()
-
-    plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0)
-    minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0)
-
-    # Calculate ATR
-    atr = calculate_atr(df, period)
-
-    # Calculate +DI and -DI
-    plus_di = 100 * pd.Series(plus_dm).ewm(span=period, adjust=False).mean() / atr
-    minus_di = 100 * pd.Series(minus_dm).ewm(span=period, adjust=False).mean() / atr
-
-    # Calculate DX and ADX
-    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.ewm(span=period, adjust=False).mean()
-
-    return adx, plus_di, minus_di
+# Read the 2-hour CSV file
+df = load_bars('120min')
 
 # ============================================================================
 # CALCULATE INDICATORS
 # ============================================================================
 
 # EMAs
-df['ema11'] = calculate_ema(df['close'], 11)
-df['ema21'] = calculate_ema(df['close'], 21)
-df['ema50'] = calculate_ema(df['close'], 50)
+df['ema11'] = ema(df['close'], 11)
+df['ema21'] = ema(df['close'], 21)
+df['ema50'] = ema(df['close'], 50)
 
 # EMA 21 slope
-df['ema21_slope'] = calculate_slope_degrees(df['ema21'].values, lookback=1)
+df['ema21_slope'] = slope_degrees(df['ema21'].values, lookback=1)
 
 # ADX
-df['adx'], df['plus_di'], df['minus_di'] = calculate_adx(df, period=14)
+df['adx'], df['plus_di'], df['minus_di'] = adx(df['high'], df['low'], df['close'], period=14)
 
 # Higher Highs and Higher Lows (lookback 5 bars)
-df['hh'] = df['high'] > df['high'].shift(5)
-df['hl'] = df['low'] > df['low'].shift(5)
-df['lh'] = df['high'] < df['high'].shift(5)
-df['ll'] = df['low'] < df['low'].shift(5)
+for flag, values in swing_flags(df['high'], df['low'], lookback=5).items():
+    df[flag] = values
 
 # ============================================================================
 # TREND IDENTIFICATION METHODS
@@ -113,63 +60,41 @@ df['method6_bear'] = (df['ema11'] < df['ema21']) & (df['adx'] > 20) & (df['minus
 # EVALUATE EFFECTIVENESS
 # ============================================================================
 
+def evaluate_trend_methods(df, methods, forward_bars=3, horizons=None):
+    """
+    Evaluate how well each trend identification method predicts future price movement.
+
+    All methods and all horizons are scored at once from a (bars x horizons)
+    forward-return matrix. `methods` is a list of (bull_col, bear_col, name).
+
+    Returns:
+        (list of result dicts at `forward_bars`, {name: per-horizon DataFrame})
+    """
+    horizons = sorted(set(horizons or []) | {forward_bars})
+    bull = df[[bull_col for bull_col, _, _ in methods]].to_numpy(dtype=bool)
+    bear = df[[bear_col for _, bear_col, _ in methods]].to_numpy(dtype=bool)
+    scores = score_signals(bull, bear, forward_return_matrix(df['close'], horizons))
+
+    row = horizons.index(forward_bars)
+    all_results = []
+    curves = {}
+    for j, (_, _, method_name) in enumerate(methods):
+        results = {'method': method_name}
+        results.update({field: scores[field][row, j].item() for field in SCORE_FIELDS})
+        all_results.append(results)
+
+        curve = pd.DataFrame({field: scores[field][:, j] for field in SCORE_FIELDS})
+        curve.insert(0, 'horizon', horizons)
+        curves[method_name] = curve
+
+    return all_results, curves
+
 def evaluate_trend_method(df, bull_col, bear_col, method_name, forward_bars=3):
     """
     Evaluate how well a trend identification method predicts future price movement
     """
-    results = {
-        'method': method_name,
-        'bull_signals': 0,
-        'bull_correct': 0,
-        'bull_accuracy': 0,
-        'bull_avg_return': 0,
-        'bear_signals': 0,
-        'bear_correct': 0,
-        'bear_accuracy': 0,
-        'bear_avg_return': 0,
-        'total_signals': 0,
-        'overall_accuracy': 0
-    }
-
-    bull_returns = []
-    bear_returns = []
-
-    for i in range(len(df) - forward_bars):
-        current_price = df.iloc[i]['close']
-        future_price = df.iloc[i + forward_bars]['close']
-        price_change_pct = ((future_price - current_price) / current_price) * 100
-
-        # Bull signal
-        if df.iloc[i][bull_col]:
-            results['bull_signals'] += 1
-            bull_returns.append(price_change_pct)
-            if price_change_pct > 0:
-                results['bull_correct'] += 1
-
-        # Bear signal
-        if df.iloc[i][bear_col]:
-            results['bear_signals'] += 1
-            bear_returns.append(price_change_pct)
-            if price_change_pct < 0:
-                results['bear_correct'] += 1
-
-    # Calculate statistics
-    if results['bull_signals'] > 0:
-        results['bull_accuracy'] = (results['bull_correct'] / results['bull_signals']) * 100
-        results['bull_avg_return'] = np.mean(bull_returns)
-
-    if results['bear_signals'] > 0:
-        results['bear_accuracy'] = (results['bear_correct'] / results['bear_signals']) * 100
-        results['bear_avg_return'] = np.mean(bear_returns)
-
-    total_signals = results['bull_signals'] + results['bear_signals']
-    total_correct = results['bull_correct'] + results['bear_correct']
-
-    if total_signals > 0:
-        results['total_signals'] = total_signals
-        results['overall_accuracy'] = (total_correct / total_signals) * 100
-
-    return results
+    all_results, _ = evaluate_trend_methods(df, [(bull_col, bear_col, method_name)], forward_bars)
+    return all_results[0]
 
 # ============================================================================
 # RUN EVALUATION
@@ -190,15 +115,14 @@ methods = [
     ('method6', 'Combined: EMA + ADX>20')
 ]
 
-all_results = []
-
-for method_prefix, method_name in methods:
-    bull_col = f'{method_prefix}_bull'
-    bear_col = f'{method_prefix}_bear'
+HORIZONS = list(range(1, 49))  # 2 hours .. 4 trading days
 
-    results = evaluate_trend_method(df, bull_col, bear_col, method_name, forward_bars=12)
-    all_results.append(results)
+all_results, curves = evaluate_trend_methods(
+    df, [(f'{prefix}_bull', f'{prefix}_bear', name) for prefix, name in methods],
+    forward_bars=12, horizons=HORIZONS)
 
+for results in all_results:
+    method_name = results['method']
     print(f"\n{method_name}")
     print("-" * 100)
     print(f"BULLISH Signals: {results['bull_signals']:4d} | Accuracy: {results['bull_accuracy']:6.2f}% | Avg Return: {results['bull_avg_return']:+6.2f}%")
@@ -244,6 +168,21 @@ for i, result in enumerate(sorted_bear, 1):
     if result['bear_signals'] > 0:
         print(f"{i:<6} {result['method']:<50} {result['bear_accuracy']:6.2f}%     {result['bear_avg_return']:+6.2f}%")
 
+# ============================================================================
+# ACCURACY BY HORIZON
+# ============================================================================
+
+print("\n" + "=" * 100)
+print("OVERALL ACCURACY BY FORWARD HORIZON (bars)")
+print("=" * 100)
+
+curve_horizons = [1, 3, 6, 12, 24, 48]
+print(f"{'Method':<40}" + "".join(f"{h:>9}" for h in curve_horizons))
+print("-" * 100)
+for result in all_results:
+    curve = curves[result['method']].set_index('horizon')
+    print(f"{result['method']:<40}" + "".join(f"{curve.at[h, 'overall_accuracy']:8.2f}%" for h in curve_horizons))
+
 # ============================================================================
 # DETAILED INSIGHTS
 # ============================================================================
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars
+from bars.sweep import trend_sweep
+
+# Parameter sweep of the rules.md trend rule on 2-hour bars:
+#   bull = EMA(fast) > EMA(slow) and slope(EMA(slow), lookback) > threshold
+#   bear = EMA(fast) < EMA(slow) and slope(EMA(slow), lookback) < -threshold
+# scored like trend_analysis_methods.py (direction of the close 12 bars later).
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../output/trend_sweep")
+
+FAST_PERIODS = range(5, 21)
+SLOW_PERIODS = range(15, 61, 2)
+SLOPE_LOOKBACKS = [1, 2, 3, 5]
+SLOPE_THRESHOLDS = [0, 2.5, 5, 7.5, 10, 12.5, 15, 20, 25, 30]
+FORWARD_BARS = 12
+MIN_SIGNALS = 500
+
+df = load_bars('120min')
+
+n_combos = (sum(1 for f in FAST_PERIODS for s in SLOW_PERIODS if f < s)
+            * len(SLOPE_LOOKBACKS) * len(SLOPE_THRESHOLDS))
+print("=" * 100)
+print("TREND RULE PARAMETER SWEEP (2-HOUR BARS)")
+print("=" * 100)
+print(f"Bars: {len(df)} | Combinations: {n_combos} | Forward lookback: {FORWARD_BARS} bars")
+
+t0 = time.perf_counter()
+results = trend_sweep(df['close'], FAST_PERIODS, SLOW_PERIODS,
+                      slope_lookbacks=SLOPE_LOOKBACKS,
+                      slope_thresholds=SLOPE_THRESHOLDS,
+                      forward_bars=FORWARD_BARS)
+print(f"Swept in {time.perf_counter() - t0:.2f}s")
+
+ranked = results[results['total_signals'] >= MIN_SIGNALS].reset_index(drop=True)
+
+print("\n" + "=" * 100)
+print(f"TOP 20 BY OVERALL ACCURACY (min {MIN_SIGNALS} signals)")
+print("=" * 100)
+print(f"{'Rank':<6} {'Fast':>4} {'Slow':>4} {'LB':>3} {'Slope':>6} {'Bull Acc':>9} {'Bull Ret':>9} "
+      f"{'Bear Acc':>9} {'Bear Ret':>9} {'Signals':>8} {'Overall':>8}")
+print("-" * 100)
+for i, row in enumerate(ranked.head(20).itertuples()):
+    print(f"{i + 1:<6} {row.fast:>4} {row.slow:>4} {row.slope_lookback:>3} "
+          f"{row.slope_threshold:>5.1f}° {row.bull_accuracy:>8.2f}% {row.bull_avg_return:>+8.2f}% "
+          f"{row.bear_accuracy:>8.2f}% {row.bear_avg_return:>+8.2f}% "
+          f"{row.total_signals:>8} {row.overall_accuracy:>7.2f}%")
+
+# Where the current rule (EMA 11/21, 1-bar slope, 10 degrees) lands
+current = ranked[(ranked['fast'] == 11) & (ranked['slow'] == 21) &
+                 (ranked['slope_lookback'] == 1) & (ranked['slope_threshold'] == 10)]
+print("\n" + "=" * 100)
+print("CURRENT RULE (rules.md)")
+print("=" * 100)
+if len(current):
+    row = next(current.itertuples())
+    print(f"Rank {current.index[0] + 1} of {len(ranked)}")
+    print(f"BULLISH Signals: {row.bull_signals:4d} | Accuracy: {row.bull_accuracy:6.2f}% | Avg Return: {row.bull_avg_return:+6.2f}%")
+    print(f"BEARISH Signals: {row.bear_signals:4d} | Accuracy: {row.bear_accuracy:6.2f}% | Avg Return: {row.bear_avg_return:+6.2f}%")
+    print(f"OVERALL        : {row.total_signals:4d} | Accuracy: {row.overall_accuracy:6.2f}%")
+else:
+    print("Current rule not in the swept grid.")
+
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+csv_path = os.path.join(OUTPUT_DIR, "trend_rule_sweep_120min.csv")
+results.to_csv(csv_path, index=False)
+print(f"\nFull table saved to {os.path.abspath(csv_path)}")
@@ -0,0 +1,128 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, ema, ema_periods, slope_degrees, atr, adx, swing_flags
+
+# Benchmark of bars.indicators against the helpers that used to be copied into
+# each script. Every indicator must match the old version exactly (NaN where
+# the old version had NaN) before the timings mean anything.
+
+# ============================================================================
+# REFERENCE IMPLEMENTATIONS (as previously copied into the scripts)
+# ============================================================================
+
+def calculate_ema(data, period):
+    return data.ewm(span=period, adjust=False).mean()
+
+def calculate_slope_degrees(values, lookback=1):
+    slopes = []
+    for i in range(len(values)):
+        if i < lookback:
+            slopes.append(0)
+        else:
+            y_diff = values[i] - values[i - lookback]
+            x_diff = lookback
+            angle = math.degrees(math.atan2(y_diff, x_diff))
+            slopes.append(angle)
+    return slopes
+
+def calculate_atr(df, period=14):
+    high_low = df['high'] - df['low']
+    high_close = np.abs(df['high'] - df['close'].shift())
+    low_close = np.abs(df['low'] - df['close'].shift())
+
+    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
+
+def calculate_adx(df, period=14):
+    high_diff = df['high'].diff()
+    low_diff = -df['low'].diff()
+
+    plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0)
+    minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0)
+
+    atr_values = calculate_atr(df, period)
+
+    plus_di = 100 * pd.Series(plus_dm).ewm(span=period, adjust=False).mean() / atr_values
+    minus_di = 100 * pd.Series(minus_dm).ewm(span=period, adjust=False).mean() / atr_values
+
+    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    adx_values = dx.ewm(span=period, adjust=False).mean()
+
+    return adx_values, plus_di, minus_di
+
+# ============================================================================
+# HARNESS
+# ============================================================================
+
+def timed(func, repeat=5):
+    """Best wall time of `repeat` calls, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def identical(old, new):
+    old = np.asarray(old, dtype='float64')
+    new = np.asarray(new, dtype='float64')
+    return old.shape == new.shape and np.array_equal(old, new, equal_nan=True)
+
+def compare(name, old_func, new_func):
+    old_time, old = timed(old_func)
+    new_time, new = timed(new_func)
+    if not isinstance(old, tuple):
+        old, new = (old,), (new,)
+    same = all(identical(o, n) for o, n in zip(old, new))
+    print(f"{name:<28} {old_time * 1000:>10.2f} ms {new_time * 1000:>10.2f} ms "
+          f"{old_time / new_time:>8.1f}x   {'identical' if same else 'MISMATCH'}")
+    return same
+
+
+timeframe = sys.argv[1] if len(sys.argv) > 1 else '120min'
+df = load_bars(timeframe)
+close = df['close']
+ema21 = calculate_ema(close, 21).values
+print(f"{timeframe}: {len(df)} bars\n")
+print(f"{'Indicator':<28} {'old':>13} {'new':>13} {'speedup':>9}")
+print("-" * 80)
+
+checks = [
+    compare('ema(11)',
+            lambda: calculate_ema(close, 11),
+            lambda: ema(close, 11)),
+    compare('ema x [5..50] (46 spans)',
+            lambda: np.column_stack([calculate_ema(close, p) for p in range(5, 51)]),
+            lambda: ema_periods(close, range(5, 51))),
+    compare('slope_degrees(lookback=1)',
+            lambda: calculate_slope_degrees(ema21, lookback=1),
+            lambda: slope_degrees(ema21, lookback=1)),
+    compare('slope_degrees(lookback=3)',
+            lambda: calculate_slope_degrees(ema21, lookback=3),
+            lambda: slope_degrees(ema21, lookback=3)),
+    compare('atr(14)',
+            lambda: calculate_atr(df, 14),
+            lambda: atr(df['high'], df['low'], close, 14)),
+    compare('adx/+di/-di(14)',
+            lambda: calculate_adx(df, 14),
+            lambda: adx(df['high'], df['low'], close, 14)),
+    compare('hh/hl/lh/ll(5)',
+            lambda: tuple(cmp(df[col], df[col].shift(5)).to_numpy()
+                          for col, cmp in [('high', pd.Series.gt), ('low', pd.Series.gt),
+                                           ('high', pd.Series.lt), ('low', pd.Series.lt)]),
+            lambda: tuple(swing_flags(df['high'], df['low'], 5).values())),
+]
+
+print()
+if all(checks):
+    print("All indicators identical to the previous implementations.")
+else:
+    print("Some indicators differ from the previous implementations.")
+    sys.exit(1)
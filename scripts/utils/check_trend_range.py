@@ -1,34 +1,19 @@
-import pandas as pd
-import numpy as np
-import math
+import os
+import sys
 
-# Re-implement helper functions
-def calculate_ema(data, period):
-    return data.ewm(span=period, adjust=False).mean()
-
-def calculate_slope_degrees(values, lookback=1):
-    slopes = []
-    for i in range(len(values)):
-        if i < lookback:
-            slopes.append(0)
-        else:
-            y_diff = values[i] - values[i - lookback]
-            x_diff = lookback
-            angle = math.degrees(math.atan2(y_diff, x_diff))
-            slopes.append(angle)
-    return slopes
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import load_bars, ema, slope_degrees
 
+# Re-implement helper functions
 # Load data
-df = pd.read_csv('../../data/nifty50_minute_complete-120min.csv')
-df['date'] = pd.to_datetime(df['date'])
-df = df.sort_values('date').reset_index(drop=True)
+df = load_bars('120min')
 
 # Calculate EMAs
-df['ema11'] = calculate_ema(df['close'], 11)
-df['ema21'] = calculate_ema(df['close'], 21)
+df['ema11'] = ema(df['close'], 11)
+df['ema21'] = ema(df['close'], 21)
 
 # Calculate Slope
-df['ema21_slope'] = calculate_slope_degrees(df['ema21'].values, lookback=1)
+df['ema21_slope'] = slope_degrees(df['ema21'].values, lookback=1)
 
 # Determine Trend
 df['is_uptrend'] = (df['ema11'] > df['ema21']) & (df['ema21_slope'] > 10)
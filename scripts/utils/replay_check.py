@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bars import cube_from_bars, load_bars, resample_bars
+from bars.daily_trend import daily_trend_table
+from bars.highlow import SET_FIELDS, bar_conditional_curves, first_bar_frame, first_bar_type, gap_bucket
+from bars.live import TREND_LABELS, LiveHighLowEngine, live_probability_table
+from bars.replay import replay_bars, replay_sessions
+
+# Replays the whole 5-min store through bars.live.LiveHighLowEngine as fast as
+# possible and checks every published update against the offline path:
+#   day high/low      session cube day_high / day_low
+#   gap, first bar    first_bar_frame + gap_bucket / first_bar_type
+#   trend             daily_trend_table on the 2-hour bars resampled from the
+#                     same 5-min bars (prev_close_ema)
+#   probabilities     bar_conditional_curves over the bar frame (bar index =
+#                     position in the day)
+# The live table is built with the same resampled trend, so both sides
+# condition on identical labels. Sessions with a missing bar before their last
+# one are left out of the replay: the cube counts a bar by its slot and the bar
+# frame by its position, so their populations differ from the gap onwards.
+
+OFFSETS = (0, 10)
+TIMEFRAME = '5min'
+
+
+async def replay(table, feed):
+    engine = LiveHighLowEngine(table)
+    updates = engine.subscribe(maxsize=0)
+    t0 = time.perf_counter()
+    await engine.run(feed)
+    elapsed = time.perf_counter() - t0
+    out = []
+    while (update := updates.get_nowait()) is not None:
+        out.append(update)
+    return engine, out, elapsed
+
+
+def report(name, bad, total):
+    print(f"{name:<34} {total:>9} checked {bad:>7} mismatched   {'OK' if bad == 0 else 'MISMATCH'}")
+    return bad == 0
+
+
+df = load_bars(TIMEFRAME)
+stored = cube_from_bars(df, TIMEFRAME)
+complete = stored.bar_count() == stored.mask.shape[1] - np.argmax(stored.mask[:, ::-1], axis=1)
+df = df[df['date'].dt.normalize().isin(pd.to_datetime(stored.dates[complete]))].reset_index(drop=True)
+cube = cube_from_bars(df, TIMEFRAME)
+trends = daily_trend_table(resample_bars(df, 120))
+table = live_probability_table(cube, OFFSETS, trends)
+print(f"{TIMEFRAME}: {len(df)} bars, {cube.n_days} sessions "
+      f"({int((~complete).sum())} with a missing bar left out)\n")
+
+engine, updates, elapsed = asyncio.run(replay(table, replay_sessions(TIMEFRAME, bars=df)))
+print(f"Replay by session:  {elapsed:.2f}s  {cube.n_days / elapsed:,.0f} sessions/s  "
+      f"{len(updates) / elapsed:,.0f} bars/s")
+print(f"Per-bar latency:    {engine.stats()}")
+_, _, elapsed_bars = asyncio.run(replay(table, replay_bars(TIMEFRAME, bars=df)))
+print(f"Replay by bar:      {elapsed_bars:.2f}s  {cube.n_days / elapsed_bars:,.0f} sessions/s\n")
+
+live = pd.DataFrame({
+    'date': [u.date for u in updates],
+    'slot': [u.bar_index for u in updates],
+    'high_so_far': [u.high_so_far for u in updates],
+    'low_so_far': [u.low_so_far for u in updates],
+    'trend': [u.trend for u in updates],
+    'gap_bucket': [u.gap_bucket for u in updates],
+    'first_bar': [u.first_bar for u in updates],
+})
+live['day'] = live['date'].dt.normalize()
+per_day = live.groupby('day')
+last, first_live = per_day.last(), per_day.first()
+
+# Offline per-day values, in session order
+first = first_bar_frame(df)
+day_trend = pd.Series(trends['prev_close_ema'].astype(object).to_numpy(), index=trends['date'])
+offline = pd.DataFrame({
+    'trend': first['date'].dt.normalize().map(day_trend).to_numpy(),
+    'gap_bucket': np.asarray(gap_bucket(first['gap']).astype(object)),
+    'first_bar': np.asarray(first_bar_type(first['open'], first['high'], first['low'],
+                                           first['close']).astype(object)),
+}, index=first['date'].dt.normalize())
+offline['trend'] = offline['trend'].where(offline['trend'].isin(TREND_LABELS), None)
+offline.loc[offline['gap_bucket'] == 'unknown', 'gap_bucket'] = None
+
+checks = [
+    report('day high', int((last['high_so_far'].to_numpy() != cube.day_high()).sum()), cube.n_days),
+    report('day low', int((last['low_so_far'].to_numpy() != cube.day_low()).sum()), cube.n_days),
+]
+for column in ('trend', 'gap_bucket', 'first_bar'):
+    a = first_live[column].fillna('-').to_numpy()
+    b = offline[column].fillna('-').to_numpy()
+    checks.append(report(column, int((a != b).sum()), len(a)))
+
+# Probabilities: offline conditional curves per day cell at the bar's position
+curves = bar_conditional_curves(df, {
+    'trend': pd.Categorical(offline['trend'].fillna('unknown'), categories=TREND_LABELS + ['unknown']),
+    'gap': gap_bucket(first['gap']),
+    'first_bar': first_bar_type(first['open'], first['high'], first['low'], first['close']),
+}, max_offset=max(OFFSETS))
+cell_of_day = [tuple(v if isinstance(v, str) else None for v in cell)
+               for cell in zip(offline['trend'], offline['gap_bucket'], offline['first_bar'])]
+expected = {}
+for cell in set(cell_of_day):
+    selection = {dim: v for dim, v in zip(('trend', 'gap', 'first_bar'), cell) if v is not None}
+    selected = curves.select(**selection)
+    expected[cell] = np.stack([selected.probability(field)[list(OFFSETS)] for field in SET_FIELDS])
+
+day_number = live['day'].map(pd.Series(np.arange(len(offline)), index=offline.index)).to_numpy()
+bad = 0
+for i in range(len(updates)):
+    want = expected[cell_of_day[day_number[i]]][:, :, live['slot'].iat[i]]
+    got = np.array([updates[i].prob_high_set, updates[i].prob_low_set, updates[i].prob_either_set],
+                   dtype='float64')
+    bad += not np.allclose(got, want, rtol=0, atol=1e-12, equal_nan=True)
+checks.append(report('set probabilities (per bar)', bad, len(updates)))
+
+# Shutdown: an invalid bar (no close) or a cancel while the small bar queue is
+# full must end run() instead of leaving the receiver blocked on the queue
+SHUTDOWN_QUEUE = 8
+SHUTDOWN_TIMEOUT = 5.0
+
+
+async def invalid_feed():
+    yield df[['date', 'open', 'high', 'low']].iloc[0].to_dict()
+    async for bar in replay_bars(TIMEFRAME, bars=df):
+        yield bar
+
+
+async def shutdown(feed, cancel_after=None):
+    """How run() ended: exception name, 'cancelled', or 'timeout' if it did not"""
+    task = asyncio.create_task(LiveHighLowEngine(table).run(feed, queue_size=SHUTDOWN_QUEUE))
+    if cancel_after is not None:
+        await asyncio.sleep(cancel_after)
+        task.cancel()
+    done, _ = await asyncio.wait([task], timeout=SHUTDOWN_TIMEOUT)
+    if not done:
+        return 'timeout'
+    return 'cancelled' if task.cancelled() else type(task.exception()).__name__
+
+
+ended = asyncio.run(shutdown(invalid_feed()))
+checks.append(report(f'invalid bar, queue of {SHUTDOWN_QUEUE}', int(ended != 'KeyError'), 1))
+ended = asyncio.run(shutdown(replay_bars(TIMEFRAME, bars=df), cancel_after=0.01))
+checks.append(report(f'cancelled replay, queue of {SHUTDOWN_QUEUE}', int(ended != 'cancelled'), 1))
+
+print()
+if all(checks):
+    print("Live engine replay matches the offline computation.")
+else:
+    print("Live engine replay differs from the offline computation.")
+    sys.exit(1)